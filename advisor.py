@@ -0,0 +1,140 @@
+# advisor.py
+# "Best next clue" advisor: for each source, the expected entropy reduction of the next draw
+# given the current posterior and the cards still in that source's deck, net of its integrity
+# cost. Computed for a whole pool at once and memoized by posterior bucket.
+
+import functools
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_engine import (
+    DECK_EXHAUST,
+    EPS,
+    INTEGRITY_COST,
+    POOL_BY_SOURCE,
+    EvidenceCard,
+    GameEngine,
+    pool_tables,
+)
+from inference import bayes_update
+from simulate import DRAW_MODELS
+
+POSTERIOR_BUCKETS = 50           # per suspect: posteriors are snapped to 1/(50·n) before lookup
+BITS_PER_INTEGRITY_POINT = 0.02  # exchange rate: 15 integrity costs as much as 0.3 bits
+ADVISOR_CACHE_SIZE = 4096
+
+class SourceAdvice(NamedTuple):
+    source: str
+    gain_bits: float      # expected entropy reduction of the next draw
+    integrity_cost: int
+    value: float          # gain_bits - BITS_PER_INTEGRITY_POINT * integrity_cost
+    remaining: int        # cards the next draw can come from
+
+def entropy_bits(p: np.ndarray) -> np.ndarray:
+    """Shannon entropy (bits) over the last axis."""
+    p = np.maximum(p, EPS)
+    return -(p * np.log2(p)).sum(axis=-1)
+
+def expected_gain(posterior: np.ndarray, likelihood: np.ndarray, weights: np.ndarray,
+                  draw_model: str = "deck") -> float:
+    """Expected entropy reduction from drawing one of `likelihood`'s rows.
+
+    Under draw_model="deck" (how the app deals) a card comes up with its rarity odds alone,
+    P(card) = weight / Σ weight. Under "likelihood" its odds are weight × P(card | culprit), so
+    P(card) = Σ_g posterior_g · P(card | g). Either way the game then updates on the card's row.
+    """
+    if not len(likelihood):
+        return 0.0
+    if draw_model == "likelihood":
+        draw = weights[:, None] * likelihood                       # (cards × suspects)
+        p_card_given = draw / np.maximum(draw.sum(axis=0), EPS)     # columns sum to 1
+        p_card = p_card_given @ posterior                           # (cards,)
+    else:
+        p_card = weights / np.maximum(weights.sum(), EPS)
+    after = bayes_update(posterior, likelihood)
+    return float(entropy_bits(posterior) - p_card @ entropy_bits(after))
+
+def posterior_bucket(probs: Sequence[float]) -> Tuple[int, ...]:
+    """Cache key for a posterior. Resolution grows with the number of suspects, so the
+    half-bucket floor _compute_gain puts under ruled-out suspects stays ~1% of the mass."""
+    scale = POSTERIOR_BUCKETS * len(probs)
+    return tuple(int(round(float(p) * scale)) for p in probs)
+
+class Advisor:
+    """Per-source next-clue value for one set of pools. One instance serves every session."""
+
+    def __init__(self, pools: Optional[Dict[str, Sequence[EvidenceCard]]] = None,
+                 cache_size: int = ADVISOR_CACHE_SIZE,
+                 integrity_cost: Optional[Dict[str, int]] = None,
+                 suspects: Optional[Sequence[str]] = None,
+                 draw_model: str = "deck"):
+        if draw_model not in DRAW_MODELS:
+            raise ValueError(f"unknown draw model {draw_model!r}; expected one of {DRAW_MODELS}")
+        self.pools = pools or POOL_BY_SOURCE
+        self.draw_model = draw_model  # how the next card is dealt; see expected_gain
+        self.suspects = tuple(suspects) if suspects else None  # likelihood column order
+        self.integrity_cost = integrity_cost or INTEGRITY_COST
+        self._gain = functools.lru_cache(maxsize=cache_size)(self._compute_gain)
+
+    def _compute_gain(self, source: str, bucket: Tuple[int, ...], drawn: Tuple[int, ...]) -> float:
+        tables = pool_tables(self.pools[source], self.suspects)
+        keep = np.ones(len(tables.likelihood), dtype=bool)
+        keep[list(drawn)] = False
+        posterior = np.maximum(np.array(bucket, dtype=np.float64), 0.5)
+        return expected_gain(posterior / posterior.sum(), tables.likelihood[keep], tables.weights[keep],
+                             self.draw_model)
+
+    def _drawn(self, engine: GameEngine, source: str) -> Optional[Tuple[int, ...]]:
+        """Cards out of the deck for the next draw, or None if the deck is spent for good."""
+        deck = engine.state.decks.get(source)
+        if deck is None or deck.epoch < 0:
+            return ()
+        if deck.pos == len(deck):
+            return None if deck.policy == DECK_EXHAUST else ()  # the next draw starts a fresh pass
+        return tuple(sorted(deck.order[:deck.pos].tolist()))
+
+    def advise(self, engine: GameEngine) -> List[SourceAdvice]:
+        """Every source with cards left, best value first."""
+        bucket = posterior_bucket(engine.state.probs)
+        out = []
+        for source in self.pools:
+            drawn = self._drawn(engine, source)
+            if drawn is None or not len(self.pools[source]):
+                continue
+            gain = self._gain(source, bucket, drawn)
+            cost = self.integrity_cost[source]
+            out.append(SourceAdvice(source, gain, cost, gain - BITS_PER_INTEGRITY_POINT * cost,
+                                    len(self.pools[source]) - len(drawn)))
+        return sorted(out, key=lambda a: a.value, reverse=True)
+
+    def best(self, engine: GameEngine) -> Optional[SourceAdvice]:
+        advice = self.advise(engine)
+        return advice[0] if advice else None
+
+    def cache_info(self):
+        return self._gain.cache_info()
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="Time the advisor over random headless games.")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    advisor = Advisor()
+    calls, spent = 0, 0.0
+    for _ in range(args.games):
+        engine = GameEngine(rng=rng)
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            best = advisor.best(engine)
+            spent += time.perf_counter() - t0
+            calls += 1
+            engine.draw(best.source if rng.random() < 0.5 else rng.choice(list(advisor.pools)))
+    print(f"{calls:,} advice calls, {spent / calls * 1e6:.1f} µs each; cache {advisor.cache_info()}")
@@ -0,0 +1,224 @@
+# analytics.py
+# Offline aggregates over the telemetry store (see telemetry.py), computed a chunk of events at
+# a time into fixed-size count arrays, so memory stays flat however many events there are.
+# Log files are folded in parallel and merged. Writes small CSV (and Parquet, with pyarrow)
+# summaries that the instructor dashboard reads:  python analytics.py events.db --out analytics
+
+import importlib.util
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from game_engine import SOURCES, START_INTEGRITY, TUTOR_KEYS
+
+CHUNK_SIZE = 50_000
+MIX_CAP = 4                 # clue counts per source above this share the "4+" bucket
+INTEGRITY_BIN = 5
+CALIBRATION_BINS = 10
+MAX_ROUNDS = 20             # longer games share the last rounds bucket
+SUMMARY_TABLES = ("overview", "mix_accuracy", "integrity", "tutor", "calibration", "rounds")
+
+class Aggregates:
+    """Mergeable running totals. Every field is a fixed-size array or a scalar."""
+
+    def __init__(self):
+        n_mix = (MIX_CAP + 1) ** len(SOURCES)
+        self.events: Dict[str, int] = {}
+        self.first_ts = np.inf
+        self.last_ts = -np.inf
+        self.games = 0
+        self.mix_games = np.zeros(n_mix, dtype=np.int64)
+        self.mix_correct = np.zeros(n_mix, dtype=np.int64)
+        self.mix_rounds = np.zeros(n_mix, dtype=np.int64)
+        self.integrity = np.zeros(START_INTEGRITY // INTEGRITY_BIN + 1, dtype=np.int64)
+        self.tutor_shown = np.zeros(len(TUTOR_KEYS), dtype=np.int64)
+        self.tutor_dismissed = np.zeros(len(TUTOR_KEYS), dtype=np.int64)
+        self.cal_n = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self.cal_pred = np.zeros(CALIBRATION_BINS)
+        self.cal_correct = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self.brier = 0.0
+        self.rounds = np.zeros(MAX_ROUNDS + 1, dtype=np.int64)
+
+    def update(self, chunk: List[dict]):
+        """Fold one chunk of events in."""
+        if not chunk:
+            return
+        finals, shown, dismissed = [], [], []
+        for e in chunk:
+            kind = e["type"]
+            self.events[kind] = self.events.get(kind, 0) + 1
+            if kind == "final_score":
+                finals.append(e["data"])
+            elif kind in ("tutor_show", "tutor_dismiss") and e["data"].get("key") in TUTOR_KEYS:
+                (shown if kind == "tutor_show" else dismissed).append(TUTOR_KEYS.index(e["data"]["key"]))
+        ts = np.fromiter((e["ts"] for e in chunk), dtype=np.float64, count=len(chunk))
+        self.first_ts = min(self.first_ts, float(ts.min()))
+        self.last_ts = max(self.last_ts, float(ts.max()))
+        self.tutor_shown += np.bincount(shown, minlength=len(TUTOR_KEYS))
+        self.tutor_dismissed += np.bincount(dismissed, minlength=len(TUTOR_KEYS))
+        if finals:
+            self._update_games(finals)
+
+    def _update_games(self, finals: List[dict]):
+        n = len(finals)
+        correct = np.fromiter((bool(d["correct"]) for d in finals), dtype=bool, count=n)
+        rounds = np.fromiter((d["rounds"] for d in finals), dtype=np.int64, count=n)
+        integrity = np.fromiter((d["integrity"] for d in finals), dtype=np.int64, count=n)
+        posterior = np.fromiter((d["accused_posterior"] for d in finals), dtype=np.float64, count=n)
+        counts = np.zeros((n, len(SOURCES)), dtype=np.int64)
+        for i, d in enumerate(finals):
+            for s in d["sources"]:
+                counts[i, SOURCES.index(s)] += 1
+        mix = np.minimum(counts, MIX_CAP) @ (MIX_CAP + 1) ** np.arange(len(SOURCES))
+        size = len(self.mix_games)
+
+        self.games += n
+        self.mix_games += np.bincount(mix, minlength=size)
+        self.mix_correct += np.bincount(mix, weights=correct, minlength=size).astype(np.int64)
+        self.mix_rounds += np.bincount(mix, weights=rounds, minlength=size).astype(np.int64)
+        bins = np.clip(integrity // INTEGRITY_BIN, 0, len(self.integrity) - 1)
+        self.integrity += np.bincount(bins, minlength=len(self.integrity))
+        cal = np.minimum((posterior * CALIBRATION_BINS).astype(np.int64), CALIBRATION_BINS - 1)
+        self.cal_n += np.bincount(cal, minlength=CALIBRATION_BINS)
+        self.cal_pred += np.bincount(cal, weights=posterior, minlength=CALIBRATION_BINS)
+        self.cal_correct += np.bincount(cal, weights=correct, minlength=CALIBRATION_BINS).astype(np.int64)
+        self.brier += float(((posterior - correct) ** 2).sum())
+        self.rounds += np.bincount(np.minimum(rounds, MAX_ROUNDS), minlength=MAX_ROUNDS + 1)
+
+    def merge(self, other: "Aggregates") -> "Aggregates":
+        for kind, n in other.events.items():
+            self.events[kind] = self.events.get(kind, 0) + n
+        self.first_ts = min(self.first_ts, other.first_ts)
+        self.last_ts = max(self.last_ts, other.last_ts)
+        for name, value in vars(other).items():
+            if isinstance(value, np.ndarray) or name in ("games", "brier"):
+                setattr(self, name, getattr(self, name) + value)
+        return self
+
+    # ------------------------------------ tables --------------------------------------
+    def tables(self) -> Dict[str, "pd.DataFrame"]:
+        """The summaries as small DataFrames (one row per bucket)."""
+        import pandas as pd
+
+        games = max(1, self.games)
+        round_ids = np.arange(MAX_ROUNDS + 1)
+        overview = pd.DataFrame([{
+            "games": self.games,
+            "events": sum(self.events.values()),
+            **{f"{kind}_events": n for kind, n in sorted(self.events.items())},
+            "accuracy": self.mix_correct.sum() / games,
+            "mean_rounds": self.mix_rounds.sum() / games,
+            "brier": self.brier / games,
+            "first_ts": self.first_ts if self.games else None,
+            "last_ts": self.last_ts if self.games else None,
+        }])
+
+        played = np.flatnonzero(self.mix_games)
+        digits = (played[:, None] // (MIX_CAP + 1) ** np.arange(len(SOURCES))) % (MIX_CAP + 1)
+        mix = pd.DataFrame(digits, columns=list(SOURCES)).astype(str).replace(str(MIX_CAP), f"{MIX_CAP}+")
+        mix.insert(0, "mix", [" · ".join(f"{s} {c}" for s, c in zip(SOURCES, row) if c != "0") or "none"
+                              for row in mix.itertuples(index=False)])
+        mix["games"] = self.mix_games[played]
+        mix["accuracy"] = self.mix_correct[played] / self.mix_games[played]
+        mix["mean_rounds"] = self.mix_rounds[played] / self.mix_games[played]
+
+        lo = np.arange(len(self.integrity)) * INTEGRITY_BIN
+        integrity = pd.DataFrame({"integrity_from": lo, "games": self.integrity,
+                                  "share": self.integrity / games})
+
+        tutor = pd.DataFrame({"key": list(TUTOR_KEYS), "shown": self.tutor_shown,
+                              "dismissed": self.tutor_dismissed,
+                              "per_100_games": 100 * self.tutor_shown / games})
+
+        n = np.maximum(self.cal_n, 1)
+        calibration = pd.DataFrame({
+            "bin_from": np.arange(CALIBRATION_BINS) / CALIBRATION_BINS,
+            "games": self.cal_n,
+            "mean_posterior": np.where(self.cal_n > 0, self.cal_pred / n, np.nan),
+            "accuracy": np.where(self.cal_n > 0, self.cal_correct / n, np.nan),
+        })
+
+        rounds = pd.DataFrame({"rounds": round_ids, "games": self.rounds, "share": self.rounds / games})
+        return dict(overview=overview, mix_accuracy=mix.sort_values("games", ascending=False),
+                    integrity=integrity, tutor=tutor, calibration=calibration, rounds=rounds)
+
+# ----------------------------------- pipeline -----------------------------------------
+def chunks(events: Iterable[dict], size: int = CHUNK_SIZE) -> Iterator[List[dict]]:
+    it = iter(events)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+def aggregate(path: str, chunk_size: int = CHUNK_SIZE) -> Aggregates:
+    """Totals over one store (a SQLite file, a log directory or a single JSONL file)."""
+    from telemetry import read_events
+
+    agg = Aggregates()
+    for chunk in chunks(read_events(path), chunk_size):
+        agg.update(chunk)
+    return agg
+
+def analyze(path: str, chunk_size: int = CHUNK_SIZE, workers: Optional[int] = None) -> Aggregates:
+    """Totals over a store; the files of a JSONL log directory are folded in parallel."""
+    from telemetry import SQLITE_SUFFIXES, event_files
+
+    if path.endswith(SQLITE_SUFFIXES) or not os.path.isdir(path) or workers == 1:
+        return aggregate(path, chunk_size)
+    agg = Aggregates()
+    files = event_files(path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(aggregate, files, itertools.repeat(chunk_size)):
+            agg.merge(part)
+    return agg
+
+def has_parquet() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def write_summaries(agg: Aggregates, out_dir: str) -> List[str]:
+    """One CSV (and Parquet, if pyarrow is installed) per summary table."""
+    os.makedirs(out_dir, exist_ok=True)
+    parquet = has_parquet()
+    written = []
+    for name, df in agg.tables().items():
+        path = os.path.join(out_dir, f"{name}.csv")
+        df.to_csv(path, index=False)
+        written.append(path)
+        if parquet:
+            path = os.path.join(out_dir, f"{name}.parquet")
+            df.to_parquet(path, index=False)
+            written.append(path)
+    return written
+
+def read_summaries(out_dir: str) -> Dict[str, "pd.DataFrame"]:
+    """The precomputed tables, Parquet where present."""
+    import pandas as pd
+
+    out = {}
+    for name in SUMMARY_TABLES:
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path + ".parquet") and has_parquet():
+            out[name] = pd.read_parquet(path + ".parquet")
+        elif os.path.exists(path + ".csv"):
+            out[name] = pd.read_csv(path + ".csv")
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Aggregate stored game events into summary tables.")
+    parser.add_argument("store", help="events.db (SQLite), a JSONL log directory or one .jsonl file")
+    parser.add_argument("--out", default="analytics", help="directory for the summary tables")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="processes for log directories")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    agg = analyze(args.store, args.chunk_size, args.workers)
+    dt = time.perf_counter() - t0
+    n = sum(agg.events.values())
+    print(f"{n:,} events, {agg.games:,} finished games in {dt:.1f}s ({n / max(dt, 1e-9):,.0f} events/s)")
+    for path in write_summaries(agg, args.out):
+        print(f"wrote {path}")
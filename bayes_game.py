@@ -2,14 +2,23 @@
 # Streamlit game that teaches Bayesian inference + ethics with dynamic, context-aware coaching.
 # Fixed for older/newer Streamlit versions and cleaned of duplicate definitions / attr errors.
 
-import random
-from dataclasses import dataclass
-from typing import Dict, List, Literal, Optional
+import functools
+import os
+import time
+import uuid
+from typing import Dict, Optional
 
 import numpy as np
-import pandas as pd
 import streamlit as st
-import altair as alt
+
+from game_engine import (
+    DEFAULT_CASE,
+    Case,
+    EvidenceCard,
+    GameEngine,
+    GuardID,
+)
+from profiler import PROFILER, section, timed
 
 # --------------------------------------------------------------------------------------
 # ------------------------------- PAGE CONFIG & THEME ----------------------------------
@@ -37,6 +46,18 @@ def ui_progress(value: int, label: Optional[str] = None):
         if label:
             st.caption(label)
 
+def ui_fragment(fn):
+    """st.fragment (or experimental_fragment) where available; a plain call otherwise."""
+    frag = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return frag(fn) if frag else fn
+
+def ui_rerun_app():
+    """Escalate a fragment rerun to a full-app rerun."""
+    try:
+        st.rerun(scope="app")
+    except TypeError:
+        st.rerun()
+
 # A little CSS polish
 st.markdown(
     """
@@ -88,336 +109,290 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-GuardID = Literal["A", "B", "C"]
-
-# --------------------------------------------------------------------------------------
-# ----------------------------- GAME CONSTANTS / CONFIG --------------------------------
-# --------------------------------------------------------------------------------------
-RNG = random.Random()
-START_INTEGRITY = 100
-INTEGRITY_COST = {"CCTV": 0, "RUMOR": 5, "INTERROGATION": 15}
-ACCURACY_WEIGHT = 0.50
-INTEGRITY_WEIGHT = 0.25
-EFFICIENCY_WEIGHT = 0.15
-CAUTION_WEIGHT = 0.10
-ESCAPE_RISK_INCREASE_PER_ROUND = 9
-MAX_ESCAPE_RISK = 100
-EPS = 1e-6
-
-# Adaptive tutoring thresholds
-LOW_CONFIDENCE_THRESHOLD = 0.6
-LOW_INTEGRITY_THRESHOLD = 70
-TOO_MANY_INVASIVE_IN_ROW = 2
-
-@dataclass
-class EvidenceCard:
-    id: str
-    source: Literal["CCTV", "RUMOR", "INTERROGATION"]
-    text: str
-    likelihood: Dict[GuardID, float]  # P(evidence | guard i)
-    unethical: bool = False
-    biased_against: Optional[GuardID] = None
-    rarity: Literal["common", "rare"] = "common"
-
-# Evidence pools
-CCTV_POOL: List[EvidenceCard] = [
-    EvidenceCard("cctv_keycard_a_905","CCTV","Keycard swipe recorded at 9:05 PM by Guard A.",
-                 {"A":0.75,"B":0.15,"C":0.10}),
-    EvidenceCard("cctv_b_missing_5mins","CCTV","Guard B is missing from the corridor for 5 minutes on CCTV.",
-                 {"A":0.20,"B":0.70,"C":0.10}),
-    EvidenceCard("cctv_c_wrong_wing","CCTV","Guard C seen walking towards the wrong wing right before the alarm.",
-                 {"A":0.10,"B":0.20,"C":0.70}),
-    EvidenceCard("cctv_glove_b","CCTV","A missing glove found near the vault resembles Guard B’s uniform.",
-                 {"A":0.10,"B":0.80,"C":0.10}),
-    EvidenceCard("cctv_motion_off_a","CCTV","Motion sensor logs show the detector in Guard A’s zone was manually disabled.",
-                 {"A":0.80,"B":0.10,"C":0.10}, rarity="rare"),
-]
-
-RUMOR_POOL: List[EvidenceCard] = [
-    EvidenceCard("rumor_a_debt","RUMOR","Staff say Guard A has gambling debts and needed money.",
-                 {"A":0.65,"B":0.25,"C":0.10}, biased_against="A"),
-    EvidenceCard("rumor_b_attitude","RUMOR","People say Guard B’s been acting cocky about 'big changes' coming.",
-                 {"A":0.20,"B":0.65,"C":0.15}, biased_against="B"),
-    EvidenceCard("rumor_c_new_car","RUMOR","Rumor says Guard C just bought a new car in cash.",
-                 {"A":0.15,"B":0.20,"C":0.65}, biased_against="C"),
-]
-
-INTERROGATION_POOL: List[EvidenceCard] = [
-    EvidenceCard("int_a_slip","INTERROGATION","Under aggressive questioning, Guard A slips up on the timeline.",
-                 {"A":0.85,"B":0.10,"C":0.05}, unethical=True),
-    EvidenceCard("int_b_sweat","INTERROGATION","Guard B starts sweating when asked about keycards.",
-                 {"A":0.10,"B":0.80,"C":0.10}, unethical=True),
-    EvidenceCard("int_c_alibi","INTERROGATION","Guard C’s alibi breaks under repeated questioning.",
-                 {"A":0.05,"B":0.15,"C":0.80}, unethical=True),
-]
-
-POOL_BY_SOURCE = {"CCTV": CCTV_POOL, "RUMOR": RUMOR_POOL, "INTERROGATION": INTERROGATION_POOL}
-
 # --------------------------------------------------------------------------------------
 # --------------------------------- STATE HELPERS --------------------------------------
 # --------------------------------------------------------------------------------------
+CASE_PATH = os.environ.get("BAYES_GAME_CASE")  # optional case file (see cases.py)
+CATALOG_PATH = os.environ.get("BAYES_GAME_CATALOG")  # optional on-disk catalog (see catalog.py)
+METRICS_PATH = os.environ.get("BAYES_GAME_METRICS_FILE")  # Prometheus text file, rewritten every few seconds
+DEBUG = os.environ.get("BAYES_GAME_DEBUG") == "1"         # or open the app with ?debug=1
+TELEMETRY_PATH = os.environ.get("BAYES_GAME_TELEMETRY")  # events.db (SQLite) or a JSONL directory
+PREFETCH = os.environ.get("BAYES_GAME_PREFETCH", "1") == "1"  # precompute next clues in the background
+POLICY_PATH = os.environ.get(  # optimal-play table written by solver.py
+    "BAYES_GAME_POLICY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy.npz"))
+LEADERBOARD_PATH = os.environ.get("BAYES_GAME_LEADERBOARD", "")  # SQLite leaderboard (see leaderboard.py), opt-in
+
+SOURCE_LABELS = {"CCTV": "📹 CCTV Footage", "RUMOR": "🗣️ Staff Rumors",
+                 "INTERROGATION": "🚨 Aggressive Interrogation"}
+ACCUSE_BUTTONS_MAX = 12   # bigger cases get a suspect picker instead of a button each
+ACCUSE_COLUMNS = 3
+MAX_SUSPECT_ROWS = 8      # likelihood table rows shown per clue in big cases
+MAX_SUSPECT_COLUMNS = 5   # suspects (most suspected first) in the what-if table
+
+@st.cache_resource
+def load_game_case(case_path: Optional[str], catalog_path: Optional[str]) -> Case:
+    """The case every session plays, loaded once per process: a case file, else the built-in
+    case over a memory-mapped catalog (with the catalog's suspects), else the built-in case."""
+    if case_path:
+        from cases import load_case
+
+        return load_case(case_path)
+    if catalog_path:
+        from catalog import EvidenceCatalog
+
+        cat = EvidenceCatalog(catalog_path)
+        return DEFAULT_CASE.replace(suspects=cat.suspects, pools=cat.pools())
+    return DEFAULT_CASE
+
+def current_case() -> Case:
+    return load_game_case(CASE_PATH, CATALOG_PATH)
+
+@st.cache_resource
+def load_advisor(case_path: Optional[str], catalog_path: Optional[str]):
+    """One next-clue advisor (and its memo) per process and case."""
+    from advisor import Advisor
+
+    case = load_game_case(case_path, catalog_path)
+    return Advisor(case.pools, integrity_cost=case.integrity_cost, suspects=case.suspects)
+
+@st.cache_resource
+def load_telemetry(path: str):
+    """One event sink (and writer thread) per process."""
+    from telemetry import TelemetrySink
+
+    return TelemetrySink(path)
+
+@st.cache_resource
+def load_prefetcher():
+    """Worker threads shared by every session for next-step prefetch."""
+    from prefetch import Prefetcher
+
+    return Prefetcher()
+
+@st.cache_resource
+def load_policy(path: str):
+    """The solver's action-value table, or None if it hasn't been built."""
+    if not os.path.exists(path):
+        return None
+    from solver import PolicyTable
+
+    return PolicyTable(path)
+
+def session_seed() -> Optional[int]:
+    """?seed=N replays a given deal (culprit and clue order); otherwise every run is fresh.
+    Anything that isn't a 64-bit seed (session codes pack it into 8 bytes) is ignored."""
+    seed = st.query_params.get("seed")
+    if not (seed and seed.isascii() and seed.isdigit()):
+        return None
+    seed = int(seed)
+    return seed if seed < 2**64 else None
+
+@st.cache_resource
+def load_leaderboard_pool(path: str):
+    """One SQLite connection pool per process."""
+    from leaderboard import ConnectionPool
+
+    return ConnectionPool(path)
+
+@st.cache_resource
+def load_leaderboard(path: str, case_path: Optional[str], catalog_path: Optional[str]):
+    """The current case's board; its top-K heaps and rank counts are shared by every session."""
+    from leaderboard import Leaderboard
+
+    return Leaderboard(load_leaderboard_pool(path), load_game_case(case_path, catalog_path).signature)
+
+def current_leaderboard():
+    return load_leaderboard(LEADERBOARD_PATH, CASE_PATH, CATALOG_PATH) if LEADERBOARD_PATH else None
+
+def player_identity() -> tuple:
+    """(name, class) for the leaderboard, from ?player=…&class=… in the app URL."""
+    return st.query_params.get("player", "Anonymous")[:40], st.query_params.get("class", "")[:40]
+
 def init_state():
-    if "g" not in st.session_state:
-        st.session_state.g = {
-            "guilty": RNG.choice(["A","B","C"]),
-            "priors": {"A":1/3,"B":1/3,"C":1/3},
-            "posteriors": {"A":1/3,"B":1/3,"C":1/3},
-            "integrity": START_INTEGRITY,
-            "round": 0,
-            "escape_risk": 0,
-            "evidence_log": [],
-            "used_ids": set(),
-            "done": False,
-            "accused": None,
-            "scores": dict(),
-            "show_math": False,
-            "step": 0,  # 0-intro, 1-evidence, 2-accuse (modal), 3-debrief
-            "show_tutorial": True,
-            "show_ethics_modal": False,
-            "last_card": None,
-            "caution_points": 0,
-            "achievement_flags": set(),
-            # Adaptive tutoring
-            "tutor_messages": [],
-            "tutor_seen": set(),
-            "pending_accuse": None,
-            "show_accuse_modal": False,
-        }
+    if "engine" not in st.session_state:
+        seed = session_seed()
+        st.session_state.engine = GameEngine(case=current_case(), seed=seed)
+        st.session_state.ranked = seed is None  # a chosen deal (and its culprit) can be looked up
+        st.session_state.game_id = uuid.uuid4().hex  # telemetry groups events by game
 
 def reset_game():
-    st.session_state.pop("g", None)
+    st.session_state.pop("engine", None)
+    st.session_state.pop("leaderboard_run", None)
+    st.query_params.pop("seed", None)  # a new run is a new deal
     init_state()
 
-def normalize(d):
-    s = sum(d.values())
-    if s == 0:
-        return {"A":1/3,"B":1/3,"C":1/3}
-    return {k:v/s for k,v in d.items()}
-
-def bayesian_update(posterior, card: EvidenceCard):
-    updated = {g: max(posterior[g]*card.likelihood[g], EPS) for g in posterior}
-    return normalize(updated)
-
-def suspicion_df(posteriors):
-    return pd.DataFrame([{"Guard":k, "Suspicion":100*v} for k,v in posteriors.items()]).sort_values("Guard")
-
-def suspicion_chart(post):
-    df = suspicion_df(post)
-    ch = (
-        alt.Chart(df)
-        .mark_bar()
-        .encode(
-            x=alt.X("Guard:N", sort=["A","B","C"]),
-            y=alt.Y("Suspicion:Q", scale=alt.Scale(domain=[0,100])),
-            color=alt.Color("Guard:N", legend=None),
-            tooltip=["Guard", alt.Tooltip("Suspicion:Q", format=".1f")]
-        )
-        .properties(height=180)
-    )
-    st.altair_chart(ch, use_container_width=True)
-
-def pick_evidence(source):
-    g = st.session_state.g
-    pool = [e for e in POOL_BY_SOURCE[source] if e.id not in g["used_ids"]]
-    if not pool:
-        pool = POOL_BY_SOURCE[source]
-    return RNG.choice(pool)
-
-def add_evidence(card: EvidenceCard):
-    g = st.session_state.g
-    g["round"] += 1
-    g["escape_risk"] = min(MAX_ESCAPE_RISK, g["escape_risk"] + ESCAPE_RISK_INCREASE_PER_ROUND)
-    new_post = bayesian_update(g["posteriors"], card)
-    g["posteriors"] = new_post
-    g["integrity"] = max(0, g["integrity"] - INTEGRITY_COST[card.source])
-    g["caution_points"] += {"CCTV": 2, "RUMOR": 1, "INTERROGATION": 0}[card.source]
-
-    g["evidence_log"].append({
-        "round": g["round"],
-        "card": card,
-        "posteriors": new_post.copy(),
-        "integrity": g["integrity"],
-        "escape_risk": g["escape_risk"]
-    })
-    g["used_ids"].add(card.id)
-    g["last_card"] = card
-
-    # potentially open ethics modal
-    if card.source in ("RUMOR","INTERROGATION") and RNG.random() < 0.35:
-        g["show_ethics_modal"] = True
-
-    # run adaptive tutoring triggers after each evidence
-    run_tutoring_triggers(event="after_evidence")
-
-def accuse(guard: GuardID):
-    g = st.session_state.g
-    if g["done"]:
-        return
-    g["accused"] = guard
-    correct = (guard == g["guilty"])
-    g["done"] = True
-    g["step"] = 3
-    g["scores"] = compute_final_scores(correct)
-
-    if correct and g["integrity"] >= 90:
-        g["achievement_flags"].add("High Integrity")
-    if correct and len(g["evidence_log"]) <= 3:
-        g["achievement_flags"].add("Sherlock")
-    if correct and g["escape_risk"] >= 80:
-        g["achievement_flags"].add("Clutch Call")
-    if g["scores"]["final"] >= 90 and correct:
-        st.balloons()
+def current_engine() -> GameEngine:
+    return st.session_state.engine
 
-def compute_final_scores(correct: bool):
-    g = st.session_state.g
-    accuracy = 100.0 if correct else 0.0
-    n = len(g["evidence_log"])
-    efficiency = max(0.0, 100.0 - (n-1)*12.5)
-    integrity = g["integrity"]
-    max_possible = 2 * max(1, g["round"])
-    caution_raw = g["caution_points"] / max_possible
-    caution = int(100 * caution_raw)
-    final = (
-        ACCURACY_WEIGHT * accuracy +
-        INTEGRITY_WEIGHT * integrity +
-        EFFICIENCY_WEIGHT * efficiency +
-        CAUTION_WEIGHT * caution
-    )
-    return dict(
-        final=final,
-        accuracy=accuracy,
-        integrity=integrity,
-        efficiency=efficiency,
-        caution=caution
+def log_event(kind: str, **data):
+    """Queue a telemetry event for this game; returns immediately."""
+    if TELEMETRY_PATH:
+        load_telemetry(TELEMETRY_PATH).emit(kind, st.session_state.game_id, **data)
+
+def log_new_tutor_messages(before: int):
+    g = current_engine().state
+    for key in g.tutor_keys(g.tutor_pending & ~before):
+        log_event("tutor_show", key=key, round=g.round)
+
+def count_rerun():
+    st.session_state.rerun_count = st.session_state.get("rerun_count", 0) + 1
+
+def rerun_counter():
+    """Footer line: script runs so far (full and fragment) against actions taken."""
+    reruns, actions = st.session_state.rerun_count, st.session_state.get("action_count", 0)
+    st.markdown(
+        f'<div class="footer-tip">Reruns this session: {reruns} for {actions} actions '
+        f'(inline mutate + rerun would have cost {reruns + actions}).</div>',
+        unsafe_allow_html=True
     )
 
-def suspicion_history():
-    g = st.session_state.g
-    rows = []
-    for log in g["evidence_log"]:
-        r = log["round"]
-        for guard, prob in log["posteriors"].items():
-            rows.append({"Round": r, "Guard": guard, "Suspicion": prob * 100.0})
-    return pd.DataFrame(rows)
+def action(fn):
+    """Button callback: mutates state before the single rerun Streamlit does on click."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        st.session_state.action_count = st.session_state.get("action_count", 0) + 1
+        return fn(*args, **kwargs)
+    return wrapper
+
+# charts pulls in altair and pandas (~0.7s cold), so it is imported on first render rather
+# than at startup: the intro and tutorial screens never draw a chart.
+@timed("suspicion_chart")
+def suspicion_chart(percent: tuple):
+    """Meter for suspicion percentages in case.suspects order (MemoEntry.percent)."""
+    import charts
 
+    st.vega_lite_chart(charts.suspicion_spec(percent, current_engine().case.suspects), use_container_width=True)
+
+@timed("suspicion_history_chart")
 def suspicion_history_chart():
-    dfh = suspicion_history()
-    if dfh.empty:
+    import charts
+
+    view = current_engine().state.history_view()
+    if not len(view):
         st.info("No evidence yet → no history to plot.")
         return
-    ch = (
-        alt.Chart(dfh)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X("Round:Q"),
-            y=alt.Y("Suspicion:Q", scale=alt.Scale(domain=[0,100])),
-            color=alt.Color("Guard:N"),
-            tooltip=["Round","Guard","Suspicion"]
-        )
-        .properties(height=250)
-    )
-    st.altair_chart(ch, use_container_width=True)
+    st.vega_lite_chart(charts.history_spec(view, current_engine().case.suspects), use_container_width=True)
 
+@timed("radar_chart")
 def radar_chart(scores: Dict[str, float]):
-    cats = ["accuracy", "integrity", "efficiency", "caution"]
-    data = pd.DataFrame({
-        "category": cats,
-        "score": [scores[c] for c in cats]
-    })
-    data_loop = pd.concat([data, data.iloc[[0]]], ignore_index=True)
-    angle = {"accuracy":0,"integrity":90,"efficiency":180,"caution":270}
-    data_loop["angle"] = data_loop["category"].map(angle)
-    data_loop["x"] = data_loop["score"] * np.cos(np.deg2rad(data_loop["angle"]))
-    data_loop["y"] = data_loop["score"] * np.sin(np.deg2rad(data_loop["angle"]))
-
-    base = alt.Chart(data_loop).encode(
-        x=alt.X("x:Q", axis=None, scale=alt.Scale(domain=[-110,110])),
-        y=alt.Y("y:Q", axis=None, scale=alt.Scale(domain=[-110,110]))
-    )
-    polygon = base.mark_line(point=True, stroke="#6366F1", strokeWidth=3).encode(
-        tooltip=["category:N","score:Q"]
-    )
-    zero_df = pd.DataFrame({
-        "x":[0,0,0,0],
-        "y":[0,0,0,0],
-        "category":cats,
-        "angle":[angle[c] for c in cats]
-    })
-    spokes = alt.Chart(zero_df).mark_rule(stroke="#334155", strokeWidth=1).encode(
-        x="x:Q", y="y:Q",
-        x2=alt.value(100*np.cos(np.deg2rad(zero_df["angle"]))),
-        y2=alt.value(100*np.sin(np.deg2rad(zero_df["angle"])))
-    )
-    # Simplify the circle ring (avoid transform_calculate that may break older Altair)
-    circles = alt.Chart(pd.DataFrame({"r":[25,50,75,100]})).mark_circle(
-        stroke="#475569", fillOpacity=0.0
-    ).encode(
-        x=alt.value(0), y=alt.value(0), size="r:Q"
-    )
-    return (circles + spokes + polygon).properties(height=350)
-
-# ------------------------------ Adaptive Tutoring -------------------------------------
-
-def push_tutor_message(key: str, title: str, body: str, show_math_button: bool = False):
-    g = st.session_state.g
-    if key in g["tutor_seen"]:
-        return
-    g["tutor_seen"].add(key)
-    g["tutor_messages"].append({
-        "key": key,
-        "title": title,
-        "body": body,
-        "show_math_button": show_math_button
-    })
-
-def run_tutoring_triggers(event: str):
-    g = st.session_state.g
-    post = g["posteriors"]
-    max_post = max(post.values()) if post else 0.0
-
-    if g["round"] >= 2 and max_post < LOW_CONFIDENCE_THRESHOLD:
-        push_tutor_message(
-            "low_confidence_midgame",
-            "Your suspicion is still low 🤔",
-            "Your top suspicion is under 60%. Inference often needs more evidence. "
-            "Try pulling a neutral CCTV clue instead of a biased source to raise confidence reliably.",
-            show_math_button=True
-        )
+    import charts
 
-    if g["round"] >= 3 and g["integrity"] < LOW_INTEGRITY_THRESHOLD:
-        push_tutor_message(
-            "integrity_warning",
-            "Integrity is dropping fast ⚠️",
-            "Biased or unethical methods can push your probabilities hard — but at the cost of integrity. "
-            "Consider switching back to CCTV to balance ethics and accuracy.",
-            show_math_button=False
-        )
+    st.vega_lite_chart(charts.radar_spec(charts.score_key(scores)), use_container_width=True)
 
-    if len(g["evidence_log"]) >= TOO_MANY_INVASIVE_IN_ROW:
-        last_two = g["evidence_log"][-TOO_MANY_INVASIVE_IN_ROW:]
-        if all(ev["card"].source in ("RUMOR","INTERROGATION") for ev in last_two):
-            push_tutor_message(
-                "too_many_invasive",
-                "You're leaning heavily on risky evidence 😬",
-                "Two invasive/biased clues in a row. This can nuke your integrity and teach the wrong inference habit. "
-                "Try balancing with some neutral CCTV instead.",
-                show_math_button=False
-            )
+# ------------------------------ Engine wrappers ---------------------------------------
+def celebrate_if_great():
+    g = current_engine().state
+    if g.scores["final"] >= 90 and g.accused == g.guilty:
+        st.balloons()
 
+def case_closed():
+    """After a successful accusation: balloons, and the final-score event."""
+    celebrate_if_great()
+    g = current_engine().state
+    post = g.posteriors
+    log_event(
+        "final_score",
+        accused=g.accused, guilty=g.guilty, correct=g.accused == g.guilty,
+        rounds=g.round, integrity=g.integrity, sources=g.sources(1, g.cursor + 1),
+        accused_posterior=post[g.accused], top_posterior=max(post.values()),
+        achievements=g.achievements, scores=g.scores, trace=session_code(),
+    )
+    if TELEMETRY_PATH:  # the game is over: write it now, the process may never reach atexit
+        load_telemetry(TELEMETRY_PATH).flush(timeout=0)
+    board = current_leaderboard()
+    if board is not None and st.session_state.ranked:
+        player, class_id = player_identity()
+        st.session_state.leaderboard_run = board.record(current_engine(), player, class_id, session_code())
+
+def session_code() -> Optional[str]:
+    """The replay token for this session (see replay.py), or None if it can't be replayed."""
+    from replay import encode_trace
+
+    engine = current_engine()
+    return encode_trace(engine) if engine.state.seed is not None else None
+
+# ------------------------------ Button callbacks --------------------------------------
+@action
+def close_tutorial():
+    current_engine().start()
+
+@action
+def start_investigation():
+    current_engine().start()
+
+@action
+def gather_evidence(source: str):
+    g = current_engine().state
+    pending = g.tutor_pending
+    card = current_engine().draw(source)
+    log_event("add_evidence", source=source, card=card.id, round=g.round, integrity=g.integrity,
+              posterior=g.probs.tolist(), ethics_modal=g.show_ethics_modal)
+    log_new_tutor_messages(pending)
+    # Only the evidence board reruns after a draw, unless a modal or new tip must show up.
+    if g.show_ethics_modal or g.tutor_pending != pending:
+        st.session_state.needs_app_rerun = True
+
+@action
 def accuse_guard_with_check(guard: GuardID):
-    g = st.session_state.g
-    max_post = max(g["posteriors"].values()) if g["posteriors"] else 0.0
-    if (max_post < LOW_CONFIDENCE_THRESHOLD) or (g["integrity"] < LOW_INTEGRITY_THRESHOLD):
-        g["pending_accuse"] = guard
-        g["show_accuse_modal"] = True
-    else:
-        accuse(guard)
-
+    engine = current_engine()
+    st.session_state.needs_app_rerun = True  # a modal or the debrief comes next
+    if engine.accuse_guard_with_check(guard):
+        case_closed()
+    elif engine.state.show_accuse_modal:
+        g = engine.state
+        log_event("accuse_warning", guard=guard, top_posterior=float(g.probs.max()), integrity=g.integrity)
+
+@action
+def proceed_accuse():
+    engine = current_engine()
+    guard = engine.state.pending_accuse
+    if engine.proceed_accuse():
+        log_event("accuse_override", guard=guard)
+        case_closed()
+
+@action
+def cancel_accuse():
+    log_event("accuse_cancel", guard=current_engine().state.pending_accuse)
+    current_engine().cancel_accuse()
+
+@action
+def show_math():
+    # don't pop the tutor message so they can re-open again if needed
+    current_engine().state.show_math = True
+
+@action
+def dismiss_tutor_message(key: str):
+    current_engine().dismiss_tutor_message(key)
+    log_event("tutor_dismiss", key=key, round=current_engine().state.round)
+
+@action
+def stand_by_evidence():
+    engine = current_engine()
+    log_event("ethics_keep", card=engine.last_card.id, round=engine.state.round)
+    engine.stand_by_evidence()
+
+@action
+def undo_last_evidence():
+    engine = current_engine()
+    log_event("ethics_undo", card=engine.last_card.id, round=engine.state.round)
+    engine.retract_evidence()
+
+@action
+def rewind_to_round(to_round: int):
+    current_engine().rewind(to_round)
+    st.session_state.needs_app_rerun = True  # log cards outside the board may be gone
+
+@action
+def redo_evidence():
+    current_engine().redo()
+    st.session_state.needs_app_rerun = True
+
+@timed("tutor_panel")
 def tutor_panel():
-    g = st.session_state.g
-    if not g["tutor_messages"]:
+    g = current_engine().state
+    if not g.tutor_messages:
         return
-    for i, msg in enumerate(list(g["tutor_messages"])):
+    for i, msg in enumerate(list(g.tutor_messages)):
         with st.container():
             st.markdown(
                 f"""
@@ -431,18 +406,15 @@ def tutor_panel():
             cols = st.columns([1,1,6])
             with cols[0]:
                 if msg["show_math_button"]:
-                    if st.button("Show math", key=f"math_{msg['key']}"):
-                        g["show_math"] = True
-                        # don't pop this message so they can re-open again if needed
-                        st.experimental_rerun()
+                    st.button("Show math", key=f"math_{msg['key']}", on_click=show_math)
             with cols[1]:
-                if st.button("Dismiss", key=f"dismiss_{msg['key']}"):
-                    g["tutor_messages"].remove(msg)
-                    st.experimental_rerun()
+                st.button("Dismiss", key=f"dismiss_{msg['key']}",
+                          on_click=dismiss_tutor_message, args=(msg["key"],))
 
+@timed("tutorial_modal")
 def tutorial_modal():
-    g = st.session_state.g
-    if not g["show_tutorial"]:
+    g = current_engine().state
+    if not g.show_tutorial:
         return
 
     st.markdown(
@@ -476,25 +448,22 @@ def tutorial_modal():
 
     c1, c2, c3 = st.columns([1,2,1])
     with c2:
-        if st.button("🚀 Let's go!", key="start_game_button", use_container_width=True):
-            g["show_tutorial"] = False
-            g["step"] = 1
-            st.experimental_rerun()
+        st.button("🚀 Let's go!", key="start_game_button", use_container_width=True,
+                  on_click=close_tutorial)
 
     c1, c2, c3 = st.columns([1,2,1])
     with c2:
-        if st.button("❌ Close", key="close_tutorial_button", use_container_width=True):
-            g["show_tutorial"] = False
-            g["step"] = 1
-            st.experimental_rerun()
+        st.button("❌ Close", key="close_tutorial_button", use_container_width=True,
+                  on_click=close_tutorial)
 
+@timed("ethics_modal")
 def ethics_modal():
-    g = st.session_state.g
-    if not g["show_ethics_modal"]:
+    g = current_engine().state
+    if not g.show_ethics_modal:
         return
-    card = g["last_card"]
+    card = current_engine().last_card
     if not card:
-        g["show_ethics_modal"] = False
+        g.show_ethics_modal = False
         return
 
     st.markdown(
@@ -511,38 +480,22 @@ def ethics_modal():
     )
     c1, c2 = st.columns(2)
     with c1:
-        if st.button("I stand by it"):
-            g["show_ethics_modal"] = False
-            st.experimental_rerun()
+        st.button("I stand by it", on_click=stand_by_evidence)
     with c2:
-        if st.button("Undo last evidence"):
-            if g["evidence_log"]:
-                last = g["evidence_log"].pop()
-                g["used_ids"].discard(last["card"].id)
-                g["round"] -= 1
-                g["escape_risk"] = max(0, g["escape_risk"] - ESCAPE_RISK_INCREASE_PER_ROUND)
-                # recompute from scratch
-                g["posteriors"] = g["priors"].copy()
-                g["integrity"] = START_INTEGRITY
-                g["caution_points"] = 0
-                for ev in g["evidence_log"]:
-                    g["posteriors"] = ev["posteriors"].copy()
-                    g["integrity"] = ev["integrity"]
-                    g["caution_points"] += {"CCTV":2,"RUMOR":1,"INTERROGATION":0}[ev["card"].source]
-            g["show_ethics_modal"] = False
-            st.experimental_rerun()
+        st.button("Undo last evidence", on_click=undo_last_evidence)
 
+@timed("accuse_modal")
 def accuse_modal():
-    g = st.session_state.g
-    if not g["show_accuse_modal"]:
+    g = current_engine().state
+    if not g.show_accuse_modal:
         return
-    max_post = max(g["posteriors"].values()) if g["posteriors"] else 0.0
+    max_post = max(g.posteriors.values()) if g.posteriors else 0.0
     st.markdown(
         f"""
         <div class="modal">
           <div class="modal-inner">
             <h2>Are you sure you want to accuse now?</h2>
-            <p>Your current top suspicion is <b>{max_post*100:.1f}%</b>, and your integrity is <b>{g['integrity']}</b>.</p>
+            <p>Your current top suspicion is <b>{max_post*100:.1f}%</b>, and your integrity is <b>{g.integrity}</b>.</p>
             <p>Inference means waiting until you have enough evidence to be confident. One more neutral clue (CCTV) might help clarify things without hurting your integrity.</p>
           </div>
         </div>
@@ -551,15 +504,9 @@ def accuse_modal():
     )
     c1, c2 = st.columns(2)
     with c1:
-        if st.button("Proceed anyway"):
-            accuse(g["pending_accuse"])
-            g["show_accuse_modal"] = False
-            st.experimental_rerun()
+        st.button("Proceed anyway", on_click=proceed_accuse)
     with c2:
-        if st.button("Cancel & get more evidence"):
-            g["pending_accuse"] = None
-            g["show_accuse_modal"] = False
-            st.experimental_rerun()
+        st.button("Cancel & get more evidence", on_click=cancel_accuse)
 
 # --------------------------------------------------------------------------------------
 # -------------------------------------- UI PARTS --------------------------------------
@@ -589,23 +536,29 @@ def evidence_tags(card: EvidenceCard):
     return " ".join(tags)
 
 def evidence_card_view(log):
-    card = log["card"]
+    card = log.card
     tags = evidence_tags(card)
     st.markdown(
         f"""
         <div class="soft">
-          <div><strong>Round {log['round']}</strong> — <code>{card.source}</code> {tags}</div>
+          <div><strong>Round {log.round}</strong> — <code>{card.source}</code> {tags}</div>
           <div style="margin:.25rem 0 .5rem 0;">{card.text}</div>
-          <div class="dim">Integrity after: {log['integrity']}/100 • Escape Risk: {log['escape_risk']}%</div>
+          <div class="dim">Integrity after: {log.integrity}/100 • Escape Risk: {log.escape_risk}%</div>
         </div>
         """,
         unsafe_allow_html=True
     )
-    if st.session_state.g["show_math"]:
+    if current_engine().state.show_math:
+        import pandas as pd
+
+        case = current_engine().case
         like_df = pd.DataFrame(
-            [{"Guard": k, "P(evidence|Guard)": v} for k, v in card.likelihood.items()]
-        ).sort_values("Guard")
-        st.table(like_df.style.format({"P(evidence|Guard)": "{:.2f}"}))
+            [{"Suspect": case.name(k), "P(evidence|Suspect)": v} for k, v in card.likelihood.items()]
+        )
+        if len(like_df) > MAX_SUSPECT_ROWS:
+            like_df = like_df.nlargest(MAX_SUSPECT_ROWS, "P(evidence|Suspect)", keep="first")
+            st.caption(f"The {MAX_SUSPECT_ROWS} suspects this clue fits best, of {len(case)}.")
+        st.table(like_df.style.format({"P(evidence|Suspect)": "{:.2f}"}))
         st.markdown(
             r"""
 **Bayes (proportional form):**  
@@ -615,13 +568,220 @@ Posterior(G_i) \propto Prior(G_i) \times P(evidence \mid G_i)
 Normalize so the posteriors sum to 1.
 """
         )
-        suspicion_chart(log["posteriors"])
+        suspicion_chart(current_engine().memo_entry(log.round).percent)
+
+def what_if_previews():
+    """Math panel: average suspicion after one more clue from each source, over the cards
+    still in its deck. Read from the shared posterior memo, so it costs no extra updates."""
+    engine = current_engine()
+    probs = engine.state.probs
+    lead = int(probs.argmax())
+    shown = np.argsort(-probs, kind="stable")[:MAX_SUSPECT_COLUMNS] if len(probs) > MAX_SUSPECT_COLUMNS \
+        else np.arange(len(probs))
+    suspects = engine.case.suspects
+    rows = []
+    for source in engine.pools:
+        preview = engine.what_if(source)
+        if preview is None or not len(preview[0]):
+            continue
+        odds, after = preview
+        expected = odds @ after
+        rows.append({
+            "Next clue": source,
+            **{f"P({suspects[i]})": f"{100 * expected[i]:.1f}%" for i in shown.tolist()},
+            "Top suspect changes": f"{100 * float(odds[after.argmax(axis=1) != lead].sum()):.0f}%",
+        })
+    if rows:
+        st.markdown("**What if you draw next…**")
+        st.table(rows)
+
+def debug_sidebar():
+    """Per-section timings for this server process (every session), p50/p95 over the last
+    runs of each section. Opt-in via BAYES_GAME_DEBUG=1 or ?debug=1."""
+    stats = PROFILER.summary()
+    with st.sidebar:
+        st.subheader("⏱️ Section timings")
+        st.caption("Milliseconds, all sessions on this server. Fragment reruns time only their own sections.")
+        st.table([
+            {"section": name, "runs": v["count"], "last": round(v["last_ms"], 1),
+             "p50": round(v["p50_ms"], 1), "p95": round(v["p95_ms"], 1)}
+            for name, v in stats.items()
+        ])
+        memo = current_engine().memo.stats()
+        st.caption(f"Posterior memo: {memo['size']:,} positions, {memo['hits']:,} hits / "
+                   f"{memo['misses']:,} misses ({memo['hit_rate']:.0%}).")
+        if METRICS_PATH:
+            st.caption(f"Prometheus text: `{METRICS_PATH}`")
+
+def optimal_play_review():
+    """Debrief: where the player's choices differ from the precomputed optimal policy."""
+    engine = current_engine()
+    table = load_policy(POLICY_PATH)
+    if table is None or not table.matches(engine.case, engine.pools):
+        return
+    decisions = table.review(engine)
+    if not decisions:
+        return
+    st.subheader("🤖 What would the optimal detective do?")
+    if table.draw_model == "deck":
+        assumption = ("It plays the decks as this game deals them: clues don't depend on who did it, "
+                      "so only the prior odds make an accusation right.")
+    else:
+        assumption = ("It assumes clues turn up in proportion to how well they fit the thief — "
+                      "this game's decks don't work that way.")
+    st.caption(f"{assumption} Playing optimally from the first clue scores "
+               f"{table.opening_value:.1f} on average.")
+    misses = [d for d in decisions if d.best_value - d.taken_value >= 0.5]
+    if not misses:
+        st.success("Every choice you made matches the optimal detective's.")
+    for d in misses:
+        st.markdown(
+            f"- **Round {d.round}:** you chose *{d.taken}* (expected final score {d.taken_value:.1f}); "
+            f"the optimal detective would have chosen *{d.best}* ({d.best_value:.1f})."
+        )
+
+def leaderboard_table(runs, highlight: Optional[int]):
+    st.dataframe(
+        [{"#": i, "player": ("➡️ " if r.id == highlight else "") + r.player, "class": r.class_id,
+          "score": r.final, "achievements": ", ".join(r.achievement_names)}
+         for i, r in enumerate(runs, 1)],
+        hide_index=True, use_container_width=True,
+    )
+
+@timed("leaderboard_panel")
+def leaderboard_panel():
+    """Debrief: this run's rank and the top runs, all from the shared in-memory caches."""
+    from leaderboard import TOP_K
+
+    board, run = current_leaderboard(), st.session_state.get("leaderboard_run")
+    if board is None:
+        return
+    st.subheader("🏆 Leaderboard")
+    if run is None:
+        st.caption("This run replayed a chosen deal (`?seed=` in the URL), so it isn't ranked.")
+        leaderboard_table(board.top(TOP_K), None)
+        return
+    c1, c2 = st.columns(2)
+    c1.metric("Your rank", f"#{board.rank(run.final):,}", help=f"of {board.size():,} runs of this case")
+    if run.class_id:
+        c2.metric(f"Rank in {run.class_id}", f"#{board.rank(run.final, run.class_id):,}",
+                  help=f"of {board.size(run.class_id):,} runs in the class")
+    else:
+        c2.caption("Add `?class=<code>&player=<name>` to the app URL to join a class leaderboard.")
+    scopes = [("All players", {})]
+    if run.class_id:
+        scopes.append((run.class_id, {"class_id": run.class_id}))
+    scopes += [(f"🏅 {a}", {"achievement": a}) for a in run.achievement_names]
+    for tab, (_, scope) in zip(st.tabs([label for label, _ in scopes]), scopes):
+        with tab:
+            leaderboard_table(board.top(TOP_K, **scope), run.id)
+
+def accuse_grid():
+    """One button per suspect, or for big cases a picker (suspicion shown, the top suspect
+    preselected) and one button, so a rerun doesn't build a widget per suspect."""
+    engine = current_engine()
+    case, probs = engine.case, engine.state.probs
+    if len(case) <= ACCUSE_BUTTONS_MAX:
+        cols = st.columns(min(len(case), ACCUSE_COLUMNS))
+        for i, suspect in enumerate(case.suspects):
+            with cols[i % len(cols)]:
+                st.button(f"🎯 Accuse {case.name(suspect)}", on_click=accuse_guard_with_check, args=(suspect,))
+        return
+    pick_col, button_col = st.columns([3,1])
+    with pick_col:
+        pick = st.selectbox(
+            "Suspect", case.suspects, index=int(probs.argmax()),
+            format_func=lambda s: f"{case.name(s)} — {100 * float(probs[case.index[s]]):.1f}%",
+            label_visibility="collapsed",
+        )
+    with button_col:
+        st.button("🎯 Accuse", use_container_width=True, on_click=accuse_guard_with_check, args=(pick,))
+
+def time_travel_controls():
+    """Rewind / redo. Lives in the evidence board so its range follows every draw."""
+    g = current_engine().state
+    if not (g.cursor or g.can_redo):
+        return
+    r1, r2, r3 = st.columns([2,1,1])
+    with r1:
+        target = st.number_input("Rewind to round", min_value=0, max_value=max(0, g.cursor - 1),
+                                 value=max(0, g.cursor - 1), step=1)
+    with r2:
+        st.button("⏪ Rewind", on_click=rewind_to_round, args=(int(target),), disabled=not g.cursor)
+    with r3:
+        st.button("⏩ Redo", on_click=redo_evidence, disabled=not g.can_redo)
+
+@ui_fragment
+def evidence_board():
+    """Meter, evidence buttons, rewind/redo, history chart, the accusation controls and the
+    newest log cards. Reruns on its own when an evidence button is clicked, so everything
+    that depends on the current round is drawn here, the rerun counter included."""
+    if not st.session_state.pop("full_run", False):  # a fragment-only run
+        count_rerun()
+    if st.session_state.pop("needs_app_rerun", False):
+        ui_rerun_app()
+    g = current_engine().state
+
+    c_top = st.columns([1.2,1,1])
+    with c_top[0]:
+        st.subheader("Suspicion Meter")
+        suspicion_chart(current_engine().memo_entry().percent)
+    with c_top[1]:
+        st.subheader("Integrity")
+        ui_progress(int(g.integrity), f"{g.integrity}/100")
+    with c_top[2]:
+        st.subheader("Escape Risk")
+        ui_progress(int(g.escape_risk), f"{g.escape_risk}%")
+
+    ui_divider()
+    st.subheader("Gather Evidence")
+    best = load_advisor(CASE_PATH, CATALOG_PATH).best(current_engine())
+    if best is not None and best.gain_bits > 0.01:
+        cost = f"costs {best.integrity_cost} integrity" if best.integrity_cost else "no integrity cost"
+        st.caption(f"💡 Best next clue: **{best.source}** — expect to resolve {best.gain_bits:.2f} bits "
+                   f"of uncertainty, {cost}.")
+    case = current_engine().case
+    sources = [s for s, pool in case.pools.items() if len(pool)]
+    for col, source in zip(st.columns(len(sources)), sources):
+        cost = case.integrity_cost[source]
+        with col:
+            st.button(SOURCE_LABELS[source] + (f" (−{cost} Integrity)" if cost else ""),
+                      use_container_width=True, on_click=gather_evidence, args=(source,))
+    time_travel_controls()
+    if g.show_math:
+        what_if_previews()
+
+    ui_divider()
+    st.subheader("Suspicion History")
+    suspicion_history_chart()
+
+    ui_divider()
+    st.subheader("Make your call")
+    accuse_grid()
+
+    ui_divider()
+    st.subheader("Evidence Log & Belief Updates")
+    if not g.cursor:
+        st.info("No evidence yet. Pull from CCTV, Rumors, or Interrogation above.")
+    else:
+        with section("evidence_card_view"):
+            for log in current_engine().evidence_log(start=st.session_state.get("log_split", 0))[::-1]:
+                evidence_card_view(log)
+
+    # The player now reads the board; work out every next clue's position meanwhile.
+    if PREFETCH and not g.done:
+        st.session_state.prefetch = load_prefetcher().schedule(current_engine(), st.session_state.get("prefetch"))
+    rerun_counter()
 
 # --------------------------------------------------------------------------------------
 # ----------------------------------- APP EXECUTION ------------------------------------
 # --------------------------------------------------------------------------------------
+run_started = time.perf_counter()
 init_state()
-g = st.session_state.g
+count_rerun()
+st.session_state.full_run = True  # the evidence board counts its own runs only when alone
+st.session_state.pop("needs_app_rerun", None)  # a full run is already under way
+g = current_engine().state
 
 # Modals (top-level)
 tutorial_modal()
@@ -629,96 +789,46 @@ ethics_modal()
 accuse_modal()
 
 # Header
-st.markdown('<div class="big-title">🖼️ The Lost Painting Heist — Adaptive</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="big-title">🖼️ {current_engine().case.title} — Adaptive</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Inference + ethics, now with context-aware tutoring.</div>', unsafe_allow_html=True)
-step_indicator(g["step"])
+step_indicator(g.step)
 st.markdown("<br/>", unsafe_allow_html=True)
 
 # INTRO
-if g["step"] == 0 and not g["show_tutorial"]:
-    st.write(
-        "You’re the museum’s lead investigator. A priceless painting is missing. "
-        "Three guards — **A, B, C** — were on duty. "
-        "Your job: **infer who’s guilty**, balancing speed, certainty, and ethics."
-    )
-    if st.button("Start Investigation →"):
-        g["step"] = 1
-        st.experimental_rerun()
+if g.step == 0 and not g.show_tutorial:
+    case = current_engine().case
+    st.write(case.intro or f"{len(case)} suspects. Your job: **infer who’s guilty**, "
+                           "balancing speed, certainty, and ethics.")
+    st.button("Start Investigation →", on_click=start_investigation)
 
 # EVIDENCE
-if g["step"] == 1:
+if g.step == 1:
     # Adaptive tutor panel (top)
     tutor_panel()
 
-    c_top = st.columns([1.2,1,1])
-    with c_top[0]:
-        st.subheader("Suspicion Meter")
-        suspicion_chart(g["posteriors"])
-    with c_top[1]:
-        st.subheader("Integrity")
-        ui_progress(int(g["integrity"]), f"{g['integrity']}/100")
-    with c_top[2]:
-        st.subheader("Escape Risk")
-        ui_progress(int(g["escape_risk"]), f"{g['escape_risk']}%")
-
     with st.expander("Show Bayesian math panel", expanded=False):
-        g["show_math"] = st.checkbox("Show math & likelihood tables for each clue", value=g["show_math"])
-
-    ui_divider()
-    st.subheader("Gather Evidence")
-    e1, e2, e3 = st.columns(3)
-    with e1:
-        if st.button("📹 CCTV Footage", use_container_width=True):
-            add_evidence(pick_evidence("CCTV"))
-            st.experimental_rerun()
-    with e2:
-        if st.button("🗣️ Staff Rumors (−5 Integrity)", use_container_width=True):
-            add_evidence(pick_evidence("RUMOR"))
-            st.experimental_rerun()
-    with e3:
-        if st.button("🚨 Aggressive Interrogation (−15 Integrity)", use_container_width=True):
-            add_evidence(pick_evidence("INTERROGATION"))
-            st.experimental_rerun()
-
-    ui_divider()
-    st.subheader("Evidence Log & Belief Updates")
-    if not g["evidence_log"]:
-        st.info("No evidence yet. Pull from CCTV, Rumors, or Interrogation above.")
-    else:
-        for log in g["evidence_log"][::-1]:
+        g.show_math = st.checkbox("Show math & likelihood tables for each clue", value=g.show_math)
+
+    # Cards already in the log on a full run are drawn below the fragment; the fragment
+    # only draws what was added since, so a click re-renders one card, not the whole log.
+    st.session_state.log_split = g.cursor
+    evidence_board()
+    with section("evidence_card_view"):
+        for log in current_engine().evidence_log(stop=st.session_state.log_split)[::-1]:
             evidence_card_view(log)
 
-    ui_divider()
-    st.subheader("Suspicion History")
-    suspicion_history_chart()
-
-    ui_divider()
-    st.subheader("Make your call")
-    left, mid, right = st.columns([1,1,1])
-    with left:
-        if st.button("🎯 Accuse Guard A"):
-            accuse_guard_with_check("A")
-            st.experimental_rerun()
-    with mid:
-        if st.button("🎯 Accuse Guard B"):
-            accuse_guard_with_check("B")
-            st.experimental_rerun()
-    with right:
-        if st.button("🎯 Accuse Guard C"):
-            accuse_guard_with_check("C")
-            st.experimental_rerun()
-
 # DEBRIEF
-if g["step"] == 3 and g["done"]:
+if g.step == 3 and g.done:
     ui_divider()
     st.header("🧠 Verdict & Debrief")
-    correct = (g["accused"] == g["guilty"])
+    correct = (g.accused == g.guilty)
+    accused, guilty = g.case.name(g.accused), g.case.name(g.guilty)
     if correct:
-        st.success(f"✅ You accused Guard {g['accused']} — and you were **RIGHT**! The thief was Guard {g['guilty']}.")
+        st.success(f"✅ You accused {accused} — and you were **RIGHT**! The thief was {guilty}.")
     else:
-        st.error(f"❌ You accused Guard {g['accused']} — but the thief was **Guard {g['guilty']}**.")
+        st.error(f"❌ You accused {accused} — but the thief was **{guilty}**.")
 
-    s = g["scores"]
+    s = g.scores
     c1, c2, c3, c4 = st.columns(4)
     with c1:
         st.markdown(f"<div class='scorebox'><h2>{s['accuracy']:.0f}</h2><span>Accuracy</span></div>", unsafe_allow_html=True)
@@ -730,13 +840,16 @@ if g["step"] == 3 and g["done"]:
         st.markdown(f"<div class='scorebox'><h2>{s['caution']:.0f}</h2><span>Caution (Ethical)</span></div>", unsafe_allow_html=True)
 
     st.subheader(f"🏁 Final Score: **{s['final']:.1f}** / 100")
-    st.altair_chart(radar_chart(s), use_container_width=True)
+    radar_chart(s)
 
-    if g["achievement_flags"]:
+    if g.achievement_flags:
         st.subheader("🏅 Achievements")
-        for a in g["achievement_flags"]:
+        for a in g.achievements:
             st.markdown(f"- **{a}**")
 
+    leaderboard_panel()
+    optimal_play_review()
+
     ui_divider()
     st.subheader("Reflection")
     st.markdown(
@@ -747,7 +860,20 @@ if g["step"] == 3 and g["done"]:
 """
     )
 
+    code = session_code()
+    if code:
+        st.caption("Session code (reproduces this run exactly with `python replay.py <code>`):")
+        st.code(code, language=None)
+
     ui_divider()
     st.button("🔁 New Run (random culprit & clues)", on_click=reset_game)
 
+if g.step != 1:  # on the evidence step the board draws the counter, so fragment runs update it
+    rerun_counter()
 st.markdown('<div class="footer-tip">vAdaptive (fixed) — Streamlit, Altair, Pandas, NumPy. No external deps.</div>', unsafe_allow_html=True)
+
+PROFILER.record("script_run", time.perf_counter() - run_started)
+if METRICS_PATH:
+    PROFILER.export(METRICS_PATH)
+if DEBUG or st.query_params.get("debug") == "1":
+    debug_sidebar()
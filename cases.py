@@ -0,0 +1,153 @@
+# cases.py
+# Case files: suspects, priors, evidence pools and source costs as JSON, so bigger scenarios
+# need no code changes. A card's likelihood may list only the suspects it points at, with "*"
+# for everyone else; pools can also come from a memory-mapped catalog (see catalog.py).
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from game_engine import DEFAULT_CASE, EPS, ESCAPE_RISK_INCREASE_PER_ROUND, SOURCES, Case, EvidenceCard
+
+CASE_VERSION = 1
+CARD_FIELDS = ("id", "source", "text", "likelihood", "unethical", "biased_against", "rarity")
+
+def _card(raw: dict, suspects: Sequence[str]) -> EvidenceCard:
+    missing = [f for f in ("id", "source", "text", "likelihood") if f not in raw]
+    if missing:
+        raise ValueError(f"card {raw.get('id', '?')!r} is missing {', '.join(missing)}")
+    given = dict(raw["likelihood"])
+    rest = float(given.pop("*", EPS))
+    unknown = set(given) - set(suspects)
+    if unknown:
+        raise ValueError(f"card {raw['id']!r} names unknown suspects {sorted(unknown)}")
+    return EvidenceCard(
+        id=raw["id"],
+        source=raw["source"],
+        text=raw["text"],
+        likelihood={s: float(given.get(s, rest)) for s in suspects},
+        unethical=bool(raw.get("unethical", False)),
+        biased_against=raw.get("biased_against"),
+        rarity=raw.get("rarity", "common"),
+    )
+
+def case_from_dict(raw: dict, base_dir: str = ".") -> Case:
+    """Build a Case from parsed JSON. Relative catalog paths resolve against `base_dir`."""
+    if raw.get("version", CASE_VERSION) != CASE_VERSION:
+        raise ValueError(f"case version {raw['version']} is not supported (expected {CASE_VERSION})")
+    suspects, names, priors = [], {}, []
+    for s in raw["suspects"]:
+        s = {"id": s} if isinstance(s, str) else s
+        suspects.append(s["id"])
+        if "name" in s:
+            names[s["id"]] = s["name"]
+        priors.append(float(s.get("prior", 1.0)))
+
+    if "catalog" in raw:
+        from catalog import EvidenceCatalog
+
+        cat = EvidenceCatalog(os.path.join(base_dir, raw["catalog"]))
+        if cat.suspects != tuple(suspects):
+            raise ValueError(f"catalog {raw['catalog']} is for suspects {cat.suspects}, the case has {tuple(suspects)}")
+        pools = cat.pools()
+    else:
+        pools: Dict[str, List[EvidenceCard]] = {s: [] for s in SOURCES}
+        for c in raw.get("evidence", []):
+            if c.get("source") not in pools:
+                raise ValueError(f"card {c.get('id', '?')!r} has unknown source {c.get('source')!r}")
+            pools[c["source"]].append(_card(c, suspects))
+
+    return Case(
+        title=raw.get("title", "Untitled case"),
+        suspects=suspects,
+        pools=pools,
+        priors=priors,
+        integrity_cost=raw.get("integrity_cost"),
+        caution_points=raw.get("caution_points"),
+        names=names,
+        intro=raw.get("intro", ""),
+        escape_risk_per_round=raw.get("escape_risk_per_round", ESCAPE_RISK_INCREASE_PER_ROUND),
+    )
+
+def load_case(path: str) -> Case:
+    with open(path, encoding="utf-8") as f:
+        return case_from_dict(json.load(f), os.path.dirname(os.path.abspath(path)))
+
+def case_to_dict(case: Case) -> dict:
+    suspects = [{"id": s, **({"name": case.names[s]} if s in case.names else {}),
+                 "prior": round(float(p), 6)} for s, p in zip(case.suspects, case.priors.tolist())]
+    evidence = []
+    for pool in case.pools.values():
+        for c in pool:
+            card = {f: getattr(c, f) for f in CARD_FIELDS}
+            values = list(card["likelihood"].values())
+            rest = max(set(values), key=values.count)
+            if values.count(rest) > 1:  # write the common value once, as "*"
+                card["likelihood"] = {**{k: v for k, v in card["likelihood"].items() if v != rest}, "*": rest}
+            if not card["unethical"]:
+                del card["unethical"]
+            if card["biased_against"] is None:
+                del card["biased_against"]
+            evidence.append(card)
+    return {"version": CASE_VERSION, "title": case.title, "intro": case.intro, "suspects": suspects,
+            "integrity_cost": case.integrity_cost, "caution_points": case.caution_points,
+            "escape_risk_per_round": case.escape_risk_per_round, "evidence": evidence}
+
+def write_case(path: str, case: Case):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(case_to_dict(case), f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+def synthetic_case(n_suspects: int, cards_per_source: int = 40, seed: int = 0,
+                   title: Optional[str] = None) -> Case:
+    """A big random case for load testing: each card points at one or two suspects and
+    leaves everyone else at a small shared likelihood."""
+    rng = np.random.default_rng(seed)
+    suspects = [f"S{i:02d}" for i in range(1, n_suspects + 1)]
+    strength = {"CCTV": 0.45, "RUMOR": 0.55, "INTERROGATION": 0.7}
+    pools = {}
+    for source in SOURCES:
+        cards = []
+        for i in range(cards_per_source):
+            picked = rng.choice(n_suspects, size=int(rng.integers(1, 3)), replace=False)
+            lik = {"*": round(float(rng.uniform(0.02, 0.08)), 3)}
+            lik.update({suspects[j]: round(float(strength[source] * rng.uniform(0.8, 1.2)), 3) for j in picked})
+            names = " or ".join(f"Suspect {suspects[j]}" for j in picked)
+            cards.append(_card({
+                "id": f"{source.lower()}_{i}", "source": source,
+                "text": f"{source.title()} clue #{i} points at {names}.", "likelihood": lik,
+                "unethical": source == "INTERROGATION",
+                "biased_against": suspects[picked[0]] if source == "RUMOR" else None,
+                "rarity": "rare" if rng.random() < 0.1 else "common",
+            }, suspects))
+        pools[source] = cards
+    return Case(title=title or f"The Grand Gala ({n_suspects} suspects)", suspects=suspects, pools=pools,
+                names={s: f"Suspect {s}" for s in suspects},
+                intro=f"A {n_suspects}-guest gala, one stolen tiara. Find the thief.")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write or inspect case files.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("default", help="write the built-in case as JSON")
+    d.add_argument("path")
+    s = sub.add_parser("synth", help="write a random case with many suspects")
+    s.add_argument("path")
+    s.add_argument("--suspects", type=int, default=60)
+    s.add_argument("--cards", type=int, default=40, help="cards per source")
+    s.add_argument("--seed", type=int, default=0)
+    i = sub.add_parser("info", help="summarize a case file")
+    i.add_argument("path")
+    args = parser.parse_args()
+
+    if args.cmd == "default":
+        write_case(args.path, DEFAULT_CASE)
+    elif args.cmd == "synth":
+        write_case(args.path, synthetic_case(args.suspects, args.cards, args.seed))
+    case = load_case(args.path)
+    print(f"{args.path}: {case.title!r}, {len(case)} suspects")
+    for source, pool in case.pools.items():
+        print(f"  {source:<14} {len(pool):>6,} cards, −{case.integrity_cost[source]} integrity")
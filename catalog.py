@@ -0,0 +1,229 @@
+# catalog.py
+# On-disk columnar evidence catalog. Likelihoods and card attributes are stored as .npy columns
+# and text as UTF-8 blobs, all memory-mapped read-only so every Streamlit worker process shares
+# one copy of the pages. Rows are stored grouped by (source, rarity), so a pool's columns are
+# contiguous slices (views of the mapping, never copies); card ids have a hash index.
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from game_engine import GUARDS, POOL_BY_SOURCE, RARITY_WEIGHTS, EvidenceCard
+
+CATALOG_VERSION = 2  # 2: rows stored grouped by (source, rarity) instead of through an index
+SOURCES = tuple(POOL_BY_SOURCE)
+RARITIES = ("common", "rare")
+
+def _id_hash(card_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(card_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _write_strings(path: str, name: str, strings: Iterable[str]):
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+        f.write(b"".join(blobs))
+    np.save(os.path.join(path, f"{name}_offsets.npy"), offsets)
+
+def write_catalog(path: str, cards: Sequence[EvidenceCard], suspects: Sequence[str] = GUARDS):
+    """Write `cards` as a catalog directory at `path`, grouped by source, then rarity
+    (in their given order within each group)."""
+    os.makedirs(path, exist_ok=True)
+    suspect_pos = {s: i for i, s in enumerate(suspects)}
+    n = len(cards)
+    key = [SOURCES.index(c.source) * len(RARITIES) + RARITIES.index(c.rarity) for c in cards]
+    cards = [cards[i] for i in np.argsort(np.array(key, dtype=np.int64), kind="stable")]
+
+    likelihood = np.array([[c.likelihood[s] for s in suspects] for c in cards], dtype=np.float64).reshape(n, len(suspects))
+    source = np.array([SOURCES.index(c.source) for c in cards], dtype=np.uint8)
+    rarity = np.array([RARITIES.index(c.rarity) for c in cards], dtype=np.uint8)
+    biased = np.array([suspect_pos[c.biased_against] if c.biased_against else -1 for c in cards], dtype=np.int32)
+    unethical = np.array([c.unethical for c in cards], dtype=bool)
+
+    # (source, rarity) bucket boundaries: bucket b is rows bucket_offsets[b]:bucket_offsets[b + 1].
+    bucket = source.astype(np.int64) * len(RARITIES) + rarity
+    bucket_offsets = np.searchsorted(bucket, np.arange(len(SOURCES) * len(RARITIES) + 1))
+
+    # id index: sorted 64-bit hashes of the card ids for O(log n) lookups.
+    hashes = np.array([_id_hash(c.id) for c in cards], dtype=np.uint64)
+    hash_order = np.argsort(hashes).astype(np.int64)
+    if n and (np.diff(hashes[hash_order]) == 0).any():
+        raise ValueError("duplicate card ids (or a 64-bit hash collision) in catalog")
+
+    for name, arr in {
+        "likelihood": likelihood, "source": source, "rarity": rarity,
+        "biased_against": biased, "unethical": unethical,
+        "bucket_offsets": bucket_offsets,
+        "id_hash": hashes[hash_order], "id_hash_rows": hash_order,
+    }.items():
+        np.save(os.path.join(path, f"{name}.npy"), arr)
+    _write_strings(path, "ids", (c.id for c in cards))
+    _write_strings(path, "text", (c.text for c in cards))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"version": CATALOG_VERSION, "cards": n, "suspects": list(suspects),
+                   "sources": list(SOURCES), "rarities": list(RARITIES)}, f, indent=2)
+
+class EvidenceCatalog:
+    """Read-only, memory-mapped view of a catalog directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != CATALOG_VERSION:
+            raise ValueError(f"catalog version {meta['version']} is not supported (expected {CATALOG_VERSION}); "
+                             "rebuild it with catalog.py")
+        self.suspects = tuple(meta["suspects"])
+
+        def col(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.likelihood = col("likelihood")
+        self.source = col("source")
+        self.rarity = col("rarity")
+        self.biased_against = col("biased_against")
+        self.unethical = col("unethical")
+        self._bucket_offsets = col("bucket_offsets")
+        self._id_hash = col("id_hash")
+        self._id_hash_rows = col("id_hash_rows")
+        self._ids = self._strings("ids")
+        self._text = self._strings("text")
+
+    def _strings(self, name):
+        blob_path = os.path.join(self.path, f"{name}.bin")
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if os.path.getsize(blob_path) else np.zeros(0, np.uint8)
+        return blob, np.load(os.path.join(self.path, f"{name}_offsets.npy"), mmap_mode="r")
+
+    @staticmethod
+    def _string_at(strings, i: int) -> str:
+        blob, offsets = strings
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def __len__(self):
+        return len(self.source)
+
+    def card_id(self, row: int) -> str:
+        return self._string_at(self._ids, row)
+
+    def text(self, row: int) -> str:
+        return self._string_at(self._text, row)
+
+    def card(self, row: int) -> EvidenceCard:
+        """Materialize one row as an EvidenceCard."""
+        biased = int(self.biased_against[row])
+        return EvidenceCard(
+            id=self.card_id(row),
+            source=SOURCES[self.source[row]],
+            text=self.text(row),
+            likelihood=dict(zip(self.suspects, self.likelihood[row].tolist())),
+            unethical=bool(self.unethical[row]),
+            biased_against=self.suspects[biased] if biased >= 0 else None,
+            rarity=RARITIES[self.rarity[row]],
+        )
+
+    def row_of(self, card_id: str) -> int:
+        h = np.uint64(_id_hash(card_id))
+        i = int(np.searchsorted(self._id_hash, h))
+        if i == len(self._id_hash) or self._id_hash[i] != h:
+            raise KeyError(card_id)
+        return int(self._id_hash_rows[i])
+
+    def span(self, source: str, rarity: Optional[str] = None) -> slice:
+        """The rows of one source (and optionally one rarity): a contiguous range."""
+        s = SOURCES.index(source)
+        if rarity is None:
+            lo, hi = s * len(RARITIES), (s + 1) * len(RARITIES)
+        else:
+            lo = s * len(RARITIES) + RARITIES.index(rarity)
+            hi = lo + 1
+        return slice(int(self._bucket_offsets[lo]), int(self._bucket_offsets[hi]))
+
+    def indices(self, source: str, rarity: Optional[str] = None) -> np.ndarray:
+        """Rows for one source (and optionally one rarity)."""
+        span = self.span(source, rarity)
+        return np.arange(span.start, span.stop)
+
+    def pools(self) -> Dict[str, "CatalogPool"]:
+        return {s: CatalogPool(self, s) for s in SOURCES}
+
+class CatalogPool:
+    """One source of a catalog, usable wherever the engine expects a pool of cards."""
+
+    def __init__(self, catalog: EvidenceCatalog, source: str):
+        self.catalog = catalog
+        self.source = source
+        self.span = catalog.span(source)
+
+    def __len__(self):
+        return self.span.stop - self.span.start
+
+    @property
+    def suspects(self) -> tuple:
+        """Likelihood column order."""
+        return self.catalog.suspects
+
+    def __getitem__(self, i: int) -> EvidenceCard:
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(i)
+        return self.catalog.card(self.span.start + i % n)
+
+    @property
+    def likelihood(self) -> np.ndarray:
+        """(cards × suspects) likelihoods in pool order: a view of the mapped file."""
+        return self.catalog.likelihood[self.span]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Rarity draw weights in pool order, without materializing cards."""
+        table = np.array([RARITY_WEIGHTS[r] for r in RARITIES])
+        return table[self.catalog.rarity[self.span]]
+
+    def index_of(self, card_id: str) -> int:
+        i = self.catalog.row_of(card_id) - self.span.start
+        if not 0 <= i < len(self):
+            raise KeyError(card_id)
+        return i
+
+def builtin_cards() -> List[EvidenceCard]:
+    return [c for pool in POOL_BY_SOURCE.values() for c in pool]
+
+def synthetic_cards(n: int, suspects: Sequence[str] = GUARDS, seed: int = 0) -> List[EvidenceCard]:
+    """Random cards for load testing a large catalog."""
+    rng = np.random.default_rng(seed)
+    lik = rng.dirichlet(np.ones(len(suspects)), size=n)
+    src = rng.integers(len(SOURCES), size=n)
+    rare = rng.random(n) < 0.1
+    return [
+        EvidenceCard(f"synth_{i}", SOURCES[src[i]], f"Synthetic {SOURCES[src[i]].lower()} clue #{i}.",
+                     dict(zip(suspects, lik[i].round(4).tolist())),
+                     unethical=SOURCES[src[i]] == "INTERROGATION",
+                     rarity="rare" if rare[i] else "common")
+        for i in range(n)
+    ]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect a memory-mapped evidence catalog.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="write the built-in pools as a catalog")
+    b.add_argument("path")
+    s = sub.add_parser("synth", help="write a synthetic catalog for load testing")
+    s.add_argument("path")
+    s.add_argument("--cards", type=int, default=100_000)
+    i = sub.add_parser("info", help="summarize a catalog")
+    i.add_argument("path")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        write_catalog(args.path, builtin_cards())
+    elif args.cmd == "synth":
+        write_catalog(args.path, synthetic_cards(args.cards))
+    cat = EvidenceCatalog(args.path)
+    print(f"{args.path}: {len(cat):,} cards, suspects {', '.join(cat.suspects)}")
+    for src in SOURCES:
+        print(f"  {src:<14} common {len(cat.indices(src, 'common')):>8,}  rare {len(cat.indices(src, 'rare')):>8,}")
@@ -0,0 +1,146 @@
+# charts.py
+# Vega-Lite specs for the suspicion meter, suspicion history and debrief radar. Specs are
+# memoized process-wide in bounded LRU caches keyed on rounded numbers, so every session
+# showing the same state shares one spec; render them with st.vega_lite_chart.
+
+import functools
+from typing import Dict, Sequence, Tuple
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from game_engine import GUARDS
+
+CHART_CACHE_SIZE = 1024
+TOP_K_SUSPECTS = 8  # past this (plus one), charts show the top suspects and an "Others" total
+OTHERS = "Others"
+RADAR_CATEGORIES = ("accuracy", "integrity", "efficiency", "caution")
+RADAR_ANGLE = {"accuracy": 0, "integrity": 90, "efficiency": 180, "caution": 270}
+RADAR_RINGS = (25, 50, 75, 100)
+RADAR_DOMAIN = [-110, 110]
+
+# ----------------------------------- cache keys ---------------------------------------
+def top_k(percent: Sequence[float], suspects: Sequence[str], k: int = TOP_K_SUSPECTS) -> Tuple[tuple, tuple]:
+    """(labels, values) for a bar per suspect, or, past k + 1 suspects, the k most suspected
+    (highest first) plus one "Others" bar, so big cases draw (and cache) a few bars."""
+    if len(suspects) <= k + 1:
+        return tuple(suspects), tuple(percent)
+    p = np.asarray(percent, dtype=np.float64)
+    top = np.argsort(-p, kind="stable")[:k]
+    rest = round(float(p.sum() - p[top].sum()), 1)
+    return tuple(suspects[i] for i in top) + (OTHERS,), tuple(p[top].tolist()) + (rest,)
+
+def history_key(view: np.ndarray, suspects: Sequence[str] = GUARDS, k: int = TOP_K_SUSPECTS) -> tuple:
+    """(rounds, bytes of the rounded percentage matrix, labels) for a (rounds × suspects)
+    history; big cases keep the k suspects on top now and fold the rest into "Others"."""
+    view = np.asarray(view, dtype=np.float64)
+    labels = tuple(suspects)
+    if len(suspects) > k + 1:
+        top = np.argsort(-view[-1], kind="stable")[:k]
+        view = np.column_stack([view[:, top], 1.0 - view[:, top].sum(axis=1)])
+        labels = tuple(suspects[i] for i in top) + (OTHERS,)
+    return len(view), np.round(100 * view, 1).tobytes(), labels
+
+def score_key(scores: Dict[str, float]) -> tuple:
+    return tuple(round(float(scores[c]), 1) for c in RADAR_CATEGORIES)
+
+# ----------------------------------- chart specs --------------------------------------
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def _suspicion_spec(labels: tuple, values: tuple) -> dict:
+    df = pd.DataFrame({"Suspect": list(labels), "Suspicion": list(values)})
+    ch = (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(
+            x=alt.X("Suspect:N", sort=list(labels)),
+            y=alt.Y("Suspicion:Q", scale=alt.Scale(domain=[0,100])),
+            color=alt.Color("Suspect:N", legend=None),
+            tooltip=["Suspect", alt.Tooltip("Suspicion:Q", format=".1f")]
+        )
+        .properties(height=180)
+    )
+    return ch.to_dict()
+
+def suspicion_spec(percent: tuple, suspects: Sequence[str] = GUARDS) -> dict:
+    """Meter for percentages in `suspects` order (MemoEntry.percent)."""
+    return _suspicion_spec(*top_k(percent, suspects))
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def _history_spec(n_rounds: int, percents: bytes, labels: tuple) -> dict:
+    data = np.frombuffer(percents).reshape(n_rounds, len(labels))
+    df = pd.DataFrame(data, columns=list(labels))
+    ch = (
+        alt.Chart(df)
+        .transform_window(Round="row_number()")
+        .transform_fold(list(labels), as_=["Suspect", "Suspicion"])
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("Round:Q"),
+            y=alt.Y("Suspicion:Q", scale=alt.Scale(domain=[0,100])),
+            color=alt.Color("Suspect:N", sort=list(labels)),
+            tooltip=["Round:Q","Suspect:N",alt.Tooltip("Suspicion:Q", format=".1f")]
+        )
+        .properties(height=250)
+    )
+    return ch.to_dict()
+
+def history_spec(view: np.ndarray, suspects: Sequence[str] = GUARDS) -> dict:
+    return _history_spec(*history_key(view, suspects))
+
+def _radar_xy(base: alt.Chart) -> alt.Chart:
+    return base.encode(
+        x=alt.X("x:Q", axis=None, scale=alt.Scale(domain=RADAR_DOMAIN)),
+        y=alt.Y("y:Q", axis=None, scale=alt.Scale(domain=RADAR_DOMAIN))
+    )
+
+def _radar_static_layers() -> alt.LayerChart:
+    """Rings and spokes never change, so they are built once at import time."""
+    theta = np.deg2rad(np.arange(0, 361, 10))
+    rings = pd.DataFrame({
+        "x": np.concatenate([r * np.cos(theta) for r in RADAR_RINGS]),
+        "y": np.concatenate([r * np.sin(theta) for r in RADAR_RINGS]),
+        "ring": np.repeat(RADAR_RINGS, len(theta)),
+        "order": np.tile(np.arange(len(theta)), len(RADAR_RINGS)),
+    })
+    ring_layer = _radar_xy(alt.Chart(rings).mark_line(stroke="#475569", strokeWidth=1)).encode(
+        detail="ring:N", order="order:Q"
+    )
+    angles = np.deg2rad([RADAR_ANGLE[c] for c in RADAR_CATEGORIES])
+    spokes = pd.DataFrame({
+        "x": 0.0, "y": 0.0,
+        "x2": 100 * np.cos(angles), "y2": 100 * np.sin(angles),
+        "category": list(RADAR_CATEGORIES),
+    })
+    spoke_layer = _radar_xy(alt.Chart(spokes).mark_rule(stroke="#334155", strokeWidth=1)).encode(
+        x2="x2:Q", y2="y2:Q"
+    )
+    return ring_layer + spoke_layer
+
+RADAR_STATIC = _radar_static_layers()
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def radar_spec(key: tuple) -> dict:
+    scores = list(key) + [key[0]]
+    cats = list(RADAR_CATEGORIES) + [RADAR_CATEGORIES[0]]
+    angle = np.deg2rad([RADAR_ANGLE[c] for c in cats])
+    data_loop = pd.DataFrame({
+        "category": cats,
+        "score": scores,
+        "x": np.array(scores) * np.cos(angle),
+        "y": np.array(scores) * np.sin(angle),
+        "order": np.arange(len(cats)),
+    })
+    polygon = _radar_xy(alt.Chart(data_loop).mark_line(point=True, stroke="#6366F1", strokeWidth=3)).encode(
+        order="order:Q",
+        tooltip=["category:N","score:Q"]
+    )
+    return (RADAR_STATIC + polygon).properties(height=350).to_dict()
+
+def cache_info() -> Dict[str, tuple]:
+    """Hit/miss counters per chart cache, for debugging."""
+    return {
+        "suspicion": _suspicion_spec.cache_info(),
+        "history": _history_spec.cache_info(),
+        "radar": radar_spec.cache_info(),
+    }
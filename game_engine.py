@@ -0,0 +1,1007 @@
+# game_engine.py
+# Headless rules for The Lost Painting Heist: evidence pools, Bayesian updates, scoring and
+# adaptive-tutoring triggers. No Streamlit import, so scripts can step thousands of games.
+
+import functools
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import types
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Literal, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from inference import bayes_update, bayes_update_list
+
+GuardID = str  # a suspect id from the case file
+GUARDS = ("A", "B", "C")  # the built-in case's suspects
+
+# --------------------------------------------------------------------------------------
+# ----------------------------- GAME CONSTANTS / CONFIG --------------------------------
+# --------------------------------------------------------------------------------------
+START_INTEGRITY = 100
+INTEGRITY_COST = {"CCTV": 0, "RUMOR": 5, "INTERROGATION": 15}
+CAUTION_POINTS = {"CCTV": 2, "RUMOR": 1, "INTERROGATION": 0}
+ACCURACY_WEIGHT = 0.50
+INTEGRITY_WEIGHT = 0.25
+EFFICIENCY_WEIGHT = 0.15
+CAUTION_WEIGHT = 0.10
+ESCAPE_RISK_INCREASE_PER_ROUND = 9
+MAX_ESCAPE_RISK = 100
+ETHICS_MODAL_CHANCE = 0.35
+EPS = 1e-6
+HISTORY_START_ROUNDS = 16  # initial timeline capacity, in rows
+SMALL_CASE = 16  # up to this many suspects, posterior updates use Python floats
+
+# Evidence decks: relative draw odds per rarity, and what happens when a source runs dry.
+RARITY_WEIGHTS = {"common": 1.0, "rare": 0.5}
+DECK_RESHUFFLE = "reshuffle"  # shuffle the full pool again (the old fallback)
+DECK_CYCLE = "cycle"          # replay the same order from the top
+DECK_EXHAUST = "exhaust"      # refuse to draw; raises DeckExhausted
+DECK_POLICIES = (DECK_RESHUFFLE, DECK_CYCLE, DECK_EXHAUST)
+
+# Adaptive tutoring thresholds
+LOW_CONFIDENCE_THRESHOLD = 0.6
+LOW_INTEGRITY_THRESHOLD = 70
+TOO_MANY_INVASIVE_IN_ROW = 2
+
+@dataclass
+class EvidenceCard:
+    id: str
+    source: Literal["CCTV", "RUMOR", "INTERROGATION"]
+    text: str
+    likelihood: Dict[GuardID, float]  # P(evidence | suspect i)
+    unethical: bool = False
+    biased_against: Optional[GuardID] = None
+    rarity: Literal["common", "rare"] = "common"
+
+# Evidence pools
+CCTV_POOL: List[EvidenceCard] = [
+    EvidenceCard("cctv_keycard_a_905","CCTV","Keycard swipe recorded at 9:05 PM by Guard A.",
+                 {"A":0.75,"B":0.15,"C":0.10}),
+    EvidenceCard("cctv_b_missing_5mins","CCTV","Guard B is missing from the corridor for 5 minutes on CCTV.",
+                 {"A":0.20,"B":0.70,"C":0.10}),
+    EvidenceCard("cctv_c_wrong_wing","CCTV","Guard C seen walking towards the wrong wing right before the alarm.",
+                 {"A":0.10,"B":0.20,"C":0.70}),
+    EvidenceCard("cctv_glove_b","CCTV","A missing glove found near the vault resembles Guard B’s uniform.",
+                 {"A":0.10,"B":0.80,"C":0.10}),
+    EvidenceCard("cctv_motion_off_a","CCTV","Motion sensor logs show the detector in Guard A’s zone was manually disabled.",
+                 {"A":0.80,"B":0.10,"C":0.10}, rarity="rare"),
+]
+
+RUMOR_POOL: List[EvidenceCard] = [
+    EvidenceCard("rumor_a_debt","RUMOR","Staff say Guard A has gambling debts and needed money.",
+                 {"A":0.65,"B":0.25,"C":0.10}, biased_against="A"),
+    EvidenceCard("rumor_b_attitude","RUMOR","People say Guard B’s been acting cocky about 'big changes' coming.",
+                 {"A":0.20,"B":0.65,"C":0.15}, biased_against="B"),
+    EvidenceCard("rumor_c_new_car","RUMOR","Rumor says Guard C just bought a new car in cash.",
+                 {"A":0.15,"B":0.20,"C":0.65}, biased_against="C"),
+]
+
+INTERROGATION_POOL: List[EvidenceCard] = [
+    EvidenceCard("int_a_slip","INTERROGATION","Under aggressive questioning, Guard A slips up on the timeline.",
+                 {"A":0.85,"B":0.10,"C":0.05}, unethical=True),
+    EvidenceCard("int_b_sweat","INTERROGATION","Guard B starts sweating when asked about keycards.",
+                 {"A":0.10,"B":0.80,"C":0.10}, unethical=True),
+    EvidenceCard("int_c_alibi","INTERROGATION","Guard C’s alibi breaks under repeated questioning.",
+                 {"A":0.05,"B":0.15,"C":0.80}, unethical=True),
+]
+
+POOL_BY_SOURCE = {"CCTV": CCTV_POOL, "RUMOR": RUMOR_POOL, "INTERROGATION": INTERROGATION_POOL}
+SOURCES = tuple(POOL_BY_SOURCE)
+SOURCE_INDEX = {s: i for i, s in enumerate(SOURCES)}
+
+class PoolTables(NamedTuple):
+    """Per-pool lookups shared by every session that plays from that pool."""
+    likelihood: np.ndarray           # (cards × guards) float64
+    weights: np.ndarray              # rarity draw weights, floored at EPS
+    position: Callable[[str], int]   # card id -> position in the pool
+
+_POOL_TABLES: Dict[Tuple[int, tuple], Tuple[object, PoolTables]] = {}
+
+def pool_suspects(pool) -> Tuple[GuardID, ...]:
+    """The pool's own likelihood column order: a catalog's suspects, else the first card's keys."""
+    own = getattr(pool, "suspects", None)
+    if own is not None:
+        return tuple(own)
+    return tuple(pool[0].likelihood) if len(pool) else GUARDS
+
+def pool_tables(pool, suspects: Optional[Sequence[GuardID]] = None) -> PoolTables:
+    """Build (once per pool object and suspect order) the arrays sessions need. Catalog pools
+    bring their own. Likelihood columns follow `suspects`, by default pool_suspects(pool)."""
+    own = pool_suspects(pool)
+    suspects = tuple(suspects) if suspects else own
+    hit = _POOL_TABLES.get((id(pool), suspects))
+    if hit is not None and hit[0] is pool:
+        return hit[1]
+    likelihood = getattr(pool, "likelihood", None)
+    if likelihood is None:
+        likelihood = np.array([[c.likelihood[g] for g in suspects] for c in pool], dtype=np.float64)
+        likelihood = likelihood.reshape(len(pool), len(suspects))
+    elif suspects != own:  # a case that reorders or subsets the catalog's suspects
+        missing = set(suspects) - set(own)
+        if missing:
+            raise ValueError(f"pool has no likelihood columns for suspects {sorted(missing)}")
+        likelihood = likelihood[:, [own.index(g) for g in suspects]]
+    weights = getattr(pool, "weights", None)
+    if weights is None:
+        weights = [RARITY_WEIGHTS[c.rarity] for c in pool]
+    position = getattr(pool, "index_of", None)
+    if position is None:
+        position = {c.id: i for i, c in enumerate(pool)}.__getitem__
+    tables = PoolTables(
+        likelihood=np.asarray(likelihood, dtype=np.float64),
+        weights=np.maximum(np.asarray(weights, dtype=np.float64), EPS),
+        position=position,
+    )
+    _POOL_TABLES[(id(pool), suspects)] = (pool, tables)  # holding `pool` keeps its id from being reused
+    return tables
+
+def pool_positions(pool) -> Callable[[str], int]:
+    """card id -> position in `pool`."""
+    return pool_tables(pool).position
+
+# --------------------------------------------------------------------------------------
+# ---------------------------------------- CASES ---------------------------------------
+# --------------------------------------------------------------------------------------
+class Case:
+    """A case file: the suspects, the prior over them, the evidence pools and what each
+    source costs. Everything per-suspect in the game is sized from `suspects`; cases.py
+    loads them from JSON."""
+
+    def __init__(self, title: str, suspects: Sequence[GuardID],
+                 pools: Dict[str, Sequence[EvidenceCard]],
+                 priors: Optional[Sequence[float]] = None,
+                 integrity_cost: Optional[Dict[str, int]] = None,
+                 caution_points: Optional[Dict[str, int]] = None,
+                 names: Optional[Dict[GuardID, str]] = None,
+                 intro: str = "",
+                 escape_risk_per_round: int = ESCAPE_RISK_INCREASE_PER_ROUND):
+        self.title = title
+        self.suspects = tuple(suspects)
+        if len(set(self.suspects)) != len(self.suspects) or len(self.suspects) < 2:
+            raise ValueError("a case needs at least two suspects with distinct ids")
+        self.index = {s: i for i, s in enumerate(self.suspects)}
+        unknown = set(pools) - set(SOURCES)
+        if unknown:
+            raise ValueError(f"unknown evidence sources {sorted(unknown)}; expected some of {SOURCES}")
+        self.pools = {s: pools.get(s, []) for s in SOURCES}
+        priors = np.full(len(self.suspects), 1.0) if priors is None else np.asarray(priors, dtype=np.float64)
+        if priors.shape != (len(self.suspects),) or (priors < 0).any() or priors.sum() <= 0:
+            raise ValueError("priors must be one non-negative weight per suspect")
+        self.priors = priors / priors.sum()
+        self.uniform = bool(np.ptp(self.priors) < EPS)
+        self.integrity_cost = {**INTEGRITY_COST, **(integrity_cost or {})}
+        self.caution_points = {**CAUTION_POINTS, **(caution_points or {})}
+        self.names = dict(names or {})
+        self.intro = intro
+        self.escape_risk_per_round = escape_risk_per_round
+        self.signature = zlib.crc32(json.dumps([
+            title, self.suspects, self.priors.round(6).tolist(), [len(p) for p in self.pools.values()],
+            self.integrity_cost, self.caution_points, escape_risk_per_round,
+        ], sort_keys=True).encode("utf-8"))  # recorded in action traces (see replay.py)
+        for pool in self.pools.values():
+            width = pool_tables(pool, self.suspects).likelihood.shape[1]
+            if len(pool) and width != len(self.suspects):
+                raise ValueError(f"a pool has {width} likelihood columns for {len(self.suspects)} suspects")
+
+    def __len__(self):
+        return len(self.suspects)
+
+    def name(self, suspect: GuardID) -> str:
+        """Display name, e.g. "Guard A"."""
+        return self.names.get(suspect, suspect)
+
+    def draw_culprit(self, rng: random.Random) -> GuardID:
+        if self.uniform:
+            return rng.choice(self.suspects)
+        return rng.choices(self.suspects, weights=self.priors.tolist())[0]
+
+    def replace(self, **changes) -> "Case":
+        """A copy with some fields changed (priors reset to uniform if the suspects change)."""
+        fields = dict(title=self.title, suspects=self.suspects, pools=self.pools, priors=self.priors,
+                      integrity_cost=self.integrity_cost, caution_points=self.caution_points,
+                      names=self.names, intro=self.intro, escape_risk_per_round=self.escape_risk_per_round)
+        if "suspects" in changes and tuple(changes["suspects"]) != self.suspects:
+            fields["priors"] = None
+            fields["names"] = {}
+        fields.update(changes)
+        return Case(**fields)
+
+DEFAULT_CASE = Case(
+    title="The Lost Painting Heist",
+    suspects=GUARDS,
+    pools=POOL_BY_SOURCE,
+    names={g: f"Guard {g}" for g in GUARDS},
+    intro="You’re the museum’s lead investigator. A priceless painting is missing. "
+          "Three guards — **A, B, C** — were on duty. "
+          "Your job: **infer who’s guilty**, balancing speed, certainty, and ethics.",
+)
+
+# --------------------------------------------------------------------------------------
+# ------------------------------------ INFERENCE ---------------------------------------
+# --------------------------------------------------------------------------------------
+def uniform_prior(suspects: Sequence[GuardID] = GUARDS):
+    return {k: 1/len(suspects) for k in suspects}
+
+def normalize(d):
+    s = sum(d.values())
+    if s == 0:
+        return uniform_prior(tuple(d))
+    return {k:v/s for k,v in d.items()}
+
+def bayesian_update(posterior, card: EvidenceCard):
+    post = bayes_update_list(list(posterior.values()), [card.likelihood[g] for g in posterior])
+    return dict(zip(posterior, post))
+
+# --------------------------------------------------------------------------------------
+# ---------------------------------------- DECKS ---------------------------------------
+# --------------------------------------------------------------------------------------
+class DeckExhausted(IndexError):
+    """Raised when an "exhaust" deck has no cards left."""
+
+class EvidenceDeck:
+    """Draw order over one source's pool: a rarity-weighted shuffled index array and a cursor.
+
+    order[:pos] has been drawn, order[pos:] is still in the deck, and where[] is the inverse
+    of order so undo/redo can move a single card across the cursor in O(1). Both use the
+    smallest unsigned dtype that fits the pool; `weights` is shared, not copied.
+    """
+    __slots__ = ("weights", "policy", "order", "where", "pos", "epoch")
+
+    def __init__(self, weights, policy: str = DECK_RESHUFFLE):
+        if policy not in DECK_POLICIES:
+            raise ValueError(f"unknown reshuffle policy {policy!r}; expected one of {DECK_POLICIES}")
+        weights = np.asarray(weights, dtype=np.float64)
+        self.weights = weights if weights.min(initial=EPS) >= EPS else np.maximum(weights, EPS)
+        self.policy = policy
+        self.order = np.arange(len(self.weights), dtype=np.min_scalar_type(max(len(self.weights) - 1, 0)))
+        self.where = self.order.copy()
+        self.pos = 0
+        self.epoch = -1  # shuffled lazily on the first draw
+
+    @classmethod
+    def for_pool(cls, pool: Sequence[EvidenceCard], policy: str = DECK_RESHUFFLE):
+        return cls(pool_tables(pool).weights, policy)
+
+    def __len__(self):
+        return len(self.order)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.order) - self.pos if self.epoch >= 0 else len(self.order)
+
+    def shuffle(self, rng: random.Random):
+        # Exponential keys divided by weight, sorted: weighted sampling without replacement.
+        n = len(self.weights)
+        keys = np.fromiter((rng.expovariate(1.0) for _ in range(n)), dtype=np.float64, count=n)
+        self.order[:] = np.argsort(keys / self.weights)
+        self.where[self.order] = np.arange(n)
+        self.pos = 0
+        self.epoch += 1
+
+    def draw(self, rng: random.Random) -> int:
+        """Index (into the pool) of the next card."""
+        if self.epoch < 0:
+            self.shuffle(rng)
+        if self.pos == len(self.order):
+            if self.policy == DECK_EXHAUST:
+                raise DeckExhausted("no cards left in this deck")
+            if self.policy == DECK_RESHUFFLE:
+                self.shuffle(rng)
+            else:
+                self.pos = 0
+                self.epoch += 1
+        idx = int(self.order[self.pos])
+        self.pos += 1
+        return idx
+
+    def peek(self) -> Optional[int]:
+        """Next card without drawing it, or None if drawing needs a (random) reshuffle."""
+        if self.epoch < 0 or self.pos == len(self.order):
+            return None
+        return int(self.order[self.pos])
+
+    def next_candidates(self) -> np.ndarray:
+        """Pool indices the next draw can return: the whole pool when a (re)shuffle is due,
+        nothing for a spent "exhaust" deck."""
+        if self.epoch < 0 or (self.pos == len(self.order) and self.policy != DECK_EXHAUST):
+            return np.arange(len(self.order))
+        return np.sort(self.order[self.pos:])
+
+    def _swap(self, i: int, j: int):
+        a, b = int(self.order[i]), int(self.order[j])
+        self.order[i], self.order[j] = b, a
+        self.where[a], self.where[b] = j, i
+
+    def put_back(self, idx: int):
+        """Return a drawn card to the top of the deck (undo)."""
+        p = int(self.where[idx])
+        if self.epoch < 0 or p >= self.pos:
+            return  # not drawn in this pass, e.g. the deck was reshuffled since
+        self._swap(p, self.pos - 1)
+        self.pos -= 1
+
+    def take(self, idx: int):
+        """Mark a specific card as drawn (redo)."""
+        p = int(self.where[idx])
+        if self.epoch < 0 or p < self.pos:
+            return
+        self._swap(p, self.pos)
+        self.pos += 1
+
+# --------------------------------------------------------------------------------------
+# --------------------------------------- STATE ----------------------------------------
+# --------------------------------------------------------------------------------------
+# One row per game position: row 0 is the opening, row i the position after i clues.
+# source/card say which clue led here (-1 on row 0); card is the position in that source's pool.
+# post is float64: each row seeds the next update, and float32 would flush posteriors under
+# ~1e-38 to zero for good. Charts and the memo's percentages round it for display.
+@functools.lru_cache(maxsize=None)
+def timeline_dtype(n_suspects: int) -> np.dtype:
+    return np.dtype([
+        ("source", np.int8),
+        ("card", np.int32),
+        ("integrity", np.int16),
+        ("caution", np.int16),
+        ("post", np.float64, (n_suspects,)),
+    ])
+
+TIMELINE_DTYPE = timeline_dtype(len(GUARDS))
+ACHIEVEMENTS = ("High Integrity", "Sherlock", "Clutch Call")
+
+class Snapshot(NamedTuple):
+    """Game position after `round` clues, unpacked from a timeline row for display."""
+    round: int
+    posteriors: Dict[GuardID, float]
+    integrity: int
+    escape_risk: int
+    caution_points: int
+    card: Optional[EvidenceCard] = None  # the clue that led here
+
+class _Bit:
+    """A bool attribute stored as one bit of an int slot."""
+
+    def __init__(self, slot: str, bit: int):
+        self.slot = slot
+        self.mask = 1 << bit
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return bool(getattr(obj, self.slot) & self.mask)
+
+    def __set__(self, obj, value):
+        bits = getattr(obj, self.slot)
+        setattr(obj, self.slot, bits | self.mask if value else bits & ~self.mask)
+
+def _names(bits: int, names: Sequence[str]) -> List[str]:
+    return [n for i, n in enumerate(names) if bits >> i & 1]
+
+class GameState:
+    """One session's game, packed small: positions live in a numpy timeline, clues are
+    (source, pool position) ints, and flags, achievements and tutor keys are bitsets."""
+    __slots__ = ("case", "guilty", "timeline", "length", "cursor", "decks", "accused", "scores", "step",
+                 "flags", "achievement_flags", "tutor_seen", "tutor_pending", "pending_accuse",
+                 "seed", "trace")
+
+    done = _Bit("flags", 0)
+    show_math = _Bit("flags", 1)
+    show_tutorial = _Bit("flags", 2)
+    show_ethics_modal = _Bit("flags", 3)
+    show_accuse_modal = _Bit("flags", 4)
+
+    def __init__(self, guilty: GuardID, priors: Optional[Dict[GuardID, float]] = None,
+                 case: Optional[Case] = None):
+        self.case = case or DEFAULT_CASE
+        self.guilty = guilty
+        # timeline[:length] is in use and timeline[cursor] is the current position. Rows past
+        # the cursor are kept for redo until a new clue is drawn; the buffer grows by doubling.
+        self.timeline = np.zeros(HISTORY_START_ROUNDS, dtype=timeline_dtype(len(self.case)))
+        opening = self.timeline[0]
+        opening["source"] = opening["card"] = -1
+        opening["integrity"] = START_INTEGRITY
+        opening["post"] = [priors[k] for k in self.case.suspects] if priors else self.case.priors
+        self.length = 1
+        self.cursor = 0
+        self.decks: Dict[str, EvidenceDeck] = {}  # per source, created on first draw
+        self.accused: Optional[GuardID] = None
+        self.scores: Dict[str, float] = {}
+        self.step = 0  # 0-intro, 1-evidence, 2-accuse (modal), 3-debrief
+        self.flags = 0
+        self.show_tutorial = True
+        self.achievement_flags = 0  # bit i set: ACHIEVEMENTS[i] earned
+        self.tutor_seen = 0         # bit i set: TUTOR_KEYS[i] has been shown
+        self.tutor_pending = 0      # bit i set: TUTOR_KEYS[i] is on screen
+        self.pending_accuse: Optional[GuardID] = None
+        self.seed: Optional[int] = None  # the session RNG's seed; None if the RNG came from outside
+        self.trace = bytearray()          # player actions, see TRACE_OPERANDS
+
+    @property
+    def round(self) -> int:
+        return self.cursor
+
+    @property
+    def probs(self) -> np.ndarray:
+        """Current posterior as float64 in case.suspects order (a view into the timeline)."""
+        return self.timeline["post"][self.cursor]
+
+    @property
+    def posteriors(self) -> Dict[GuardID, float]:
+        return dict(zip(self.case.suspects, self.probs.tolist()))
+
+    @property
+    def integrity(self) -> int:
+        return int(self.timeline["integrity"][self.cursor])
+
+    @property
+    def escape_risk(self) -> int:
+        return min(MAX_ESCAPE_RISK, self.cursor * self.case.escape_risk_per_round)
+
+    @property
+    def caution_points(self) -> int:
+        return int(self.timeline["caution"][self.cursor])
+
+    @property
+    def can_redo(self) -> bool:
+        return self.cursor + 1 < self.length
+
+    @property
+    def achievements(self) -> List[str]:
+        return _names(self.achievement_flags, ACHIEVEMENTS)
+
+    @property
+    def tutor_messages(self) -> List[dict]:
+        """Tutor messages on screen, in the shape the UI renders."""
+        return [dict(key=k, **TUTOR_MESSAGES[k]) for k in self.tutor_keys(self.tutor_pending)]
+
+    @staticmethod
+    def tutor_keys(bits: int) -> List[str]:
+        return _names(bits, TUTOR_KEYS)
+
+    def sources(self, start: int, stop: int) -> List[str]:
+        """Source of each clue in timeline rows [start, stop)."""
+        return [SOURCES[s] for s in self.timeline["source"][start:stop].tolist()]
+
+    def push(self, source: int, card: int, likelihood: np.ndarray, posterior: Optional[Sequence[float]] = None):
+        """Record a clue after the cursor, dropping any redo branch, and move onto it.
+        `posterior` skips the update when the result is already known (see PosteriorMemo)."""
+        row = self.cursor + 1
+        if row == len(self.timeline):
+            grown = np.zeros(2 * len(self.timeline), dtype=self.timeline.dtype)
+            grown[:row] = self.timeline[:row]
+            self.timeline = grown
+        _, _, integrity, caution, prev = self.timeline.item(self.cursor)
+        if posterior is None and len(prev) <= SMALL_CASE:
+            # For a handful of suspects, Python floats beat numpy ops on a single record.
+            posterior = bayes_update_list(prev.tolist(), likelihood.tolist())
+        elif posterior is None:
+            posterior = bayes_update(prev, likelihood)
+        name = SOURCES[source]
+        self.timeline[row] = (
+            source,
+            card,
+            max(0, integrity - self.case.integrity_cost[name]),
+            caution + self.case.caution_points[name],
+            posterior,
+        )
+        self.cursor = row
+        self.length = row + 1
+
+    def history_view(self) -> np.ndarray:
+        """(rounds × suspects) float64 posteriors after each clue. A view, not a copy."""
+        return self.timeline["post"][1:self.cursor + 1]
+
+    def card_multiset(self, row: Optional[int] = None, extra: Optional[int] = None) -> bytes:
+        """Canonical key for the clues in rows 1..row (default: the cursor), plus an optional
+        extra (source << 32 | card) code. Order does not matter to the posterior, so it is sorted."""
+        row = self.cursor if row is None else row
+        tl = self.timeline[1:row + 1]
+        codes = (tl["source"].astype(np.int64) << 32) | tl["card"]
+        if extra is not None:
+            codes = np.append(codes, extra)
+        return np.sort(codes).tobytes()
+
+# --------------------------------------------------------------------------------------
+# ----------------------------------- POSTERIOR MEMO -----------------------------------
+# --------------------------------------------------------------------------------------
+POSTERIOR_MEMO_SIZE = 65536
+NEXT_CARD_LIMIT = 256  # pools larger than this get no per-card "what if" matrices
+
+class MemoEntry:
+    """Everything derived from one (priors, clue multiset) position."""
+    __slots__ = ("posterior", "percent", "next")
+
+    def __init__(self, posterior: np.ndarray):
+        # a float64 copy, since it seeds timeline rows: callers pass rows, which a rewind overwrites
+        self.posterior = np.array(posterior, dtype=np.float64)
+        self.percent = tuple(round(100 * p, 1) for p in self.posterior.tolist())  # chart data
+        self.next: Dict[str, np.ndarray] = {}
+
+    def next_posteriors(self, source: str, tables: PoolTables) -> Optional[np.ndarray]:
+        """(cards × suspects) posterior after each card of `source`'s pool, computed once."""
+        if len(tables.likelihood) > NEXT_CARD_LIMIT:
+            return None
+        if source not in self.next:
+            # display only (what_if), so float32 halves the matrix
+            self.next[source] = bayes_update(self.posterior, tables.likelihood).astype(np.float32)
+        return self.next[source]
+
+class PosteriorMemo:
+    """Process-wide LRU from (pools, priors, multiset of drawn cards) to a MemoEntry. The same
+    positions recur constantly across players, so sessions share one memo."""
+
+    def __init__(self, maxsize: int = POSTERIOR_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[tuple, MemoEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._pools: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def key(self, pools, priors: bytes, multiset: bytes) -> tuple:
+        token = self._pools.get(id(pools))
+        if token is None or token[0] is not pools:
+            with self._lock:
+                token = self._pools[id(pools)] = (pools, len(self._pools))  # pins `pools` alive
+        return token[1], priors, multiset
+
+    def get(self, key: tuple) -> Optional[MemoEntry]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+    def peek(self, key: tuple) -> Optional[MemoEntry]:
+        """Lookup that leaves recency and hit/miss counters alone (for background work)."""
+        with self._lock:
+            return self.entries.get(key)
+
+    def put(self, key: tuple, entry: MemoEntry, replace: bool = True) -> MemoEntry:
+        """Store `entry`; with replace=False an entry already there is kept and returned."""
+        with self._lock:
+            if not replace and key in self.entries:
+                return self.entries[key]
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return dict(hits=self.hits, misses=self.misses, size=len(self.entries), maxsize=self.maxsize,
+                    hit_rate=self.hits / total if total else 0.0)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+POSTERIOR_MEMO = PosteriorMemo()
+
+# --------------------------------------------------------------------------------------
+# ------------------------------------ TUTOR COPY --------------------------------------
+# --------------------------------------------------------------------------------------
+TUTOR_MESSAGES = {
+    "low_confidence_midgame": dict(
+        title="Your suspicion is still low 🤔",
+        body="Your top suspicion is under 60%. Inference often needs more evidence. "
+             "Try pulling a neutral CCTV clue instead of a biased source to raise confidence reliably.",
+        show_math_button=True,
+    ),
+    "integrity_warning": dict(
+        title="Integrity is dropping fast ⚠️",
+        body="Biased or unethical methods can push your probabilities hard — but at the cost of integrity. "
+             "Consider switching back to CCTV to balance ethics and accuracy.",
+        show_math_button=False,
+    ),
+    "too_many_invasive": dict(
+        title="You're leaning heavily on risky evidence 😬",
+        body="Two invasive/biased clues in a row. This can nuke your integrity and teach the wrong inference habit. "
+             "Try balancing with some neutral CCTV instead.",
+        show_math_button=False,
+    ),
+}
+TUTOR_KEYS = tuple(TUTOR_MESSAGES)
+
+# --------------------------------------------------------------------------------------
+# ------------------------------------ ACTION TRACE ------------------------------------
+# --------------------------------------------------------------------------------------
+# Every player action appends an opcode byte and its packed operand to GameState.trace. With
+# the session seed that is enough to replay the game exactly (see replay.py).
+(OP_START, OP_DRAW, OP_ADD, OP_UNDO, OP_REWIND, OP_REDO, OP_ACCUSE, OP_ACCUSE_CHECK,
+ OP_PROCEED, OP_CANCEL, OP_KEEP, OP_RETRACT, OP_DISMISS) = range(13)
+TRACE_OPERANDS = {
+    OP_START: struct.Struct(""),
+    OP_DRAW: struct.Struct("<B"),           # source index
+    OP_ADD: struct.Struct("<BI"),           # source index, pool position
+    OP_UNDO: struct.Struct(""),
+    OP_REWIND: struct.Struct("<H"),         # to round
+    OP_REDO: struct.Struct(""),
+    OP_ACCUSE: struct.Struct("<H"),         # suspect index
+    OP_ACCUSE_CHECK: struct.Struct("<H"),   # suspect index
+    OP_PROCEED: struct.Struct(""),
+    OP_CANCEL: struct.Struct(""),
+    OP_KEEP: struct.Struct(""),
+    OP_RETRACT: struct.Struct(""),
+    OP_DISMISS: struct.Struct("<B"),        # TUTOR_KEYS index
+}
+
+def new_seed() -> int:
+    """A fresh 64-bit session seed."""
+    return int.from_bytes(os.urandom(8), "little")
+
+# --------------------------------------------------------------------------------------
+# --------------------------------------- ENGINE ---------------------------------------
+# --------------------------------------------------------------------------------------
+class GameEngine:
+    """Applies the game rules to a GameState. The Streamlit UI keeps one per session.
+
+    Each engine owns a random.Random seeded from `seed` (a fresh one if not given), so
+    sessions share no RNG state and a game is reproducible from its seed and action trace.
+    Passing `rng` instead (e.g. one generator for a batch of bot games) skips that.
+    """
+    __slots__ = ("rng", "reshuffle", "pools", "memo", "state")
+
+    def __init__(self, state: Optional[GameState] = None, rng: Optional[random.Random] = None,
+                 reshuffle: str = DECK_RESHUFFLE,
+                 pools: Optional[Dict[str, Sequence[EvidenceCard]]] = None,
+                 memo: Optional[PosteriorMemo] = None,
+                 case: Optional[Case] = None,
+                 seed: Optional[int] = None):
+        if rng is None:
+            seed = new_seed() if seed is None else seed
+            rng = random.Random(seed)
+        self.rng = rng
+        self.reshuffle = reshuffle
+        case = case or (state.case if state else DEFAULT_CASE)
+        self.pools = pools or case.pools
+        self.memo = memo or POSTERIOR_MEMO
+        if state is None:
+            state = GameState(guilty=case.draw_culprit(self.rng), case=case)
+            state.seed = seed
+        self.state = state
+
+    @property
+    def case(self) -> Case:
+        return self.state.case
+
+    def deck(self, source) -> EvidenceDeck:
+        decks = self.state.decks
+        if source not in decks:
+            decks[source] = EvidenceDeck.for_pool(self.pools[source], self.reshuffle)
+        return decks[source]
+
+    def tables(self, source: str) -> PoolTables:
+        """`source`'s pool tables, likelihood columns in this case's suspect order."""
+        return pool_tables(self.pools[source], self.case.suspects)
+
+    def position(self, card: EvidenceCard) -> int:
+        """Where `card` sits in its source pool (and so in that source's deck)."""
+        return self.tables(card.source).position(card.id)
+
+    def card_at(self, row: int) -> Optional[EvidenceCard]:
+        """The clue recorded on timeline row `row` (None for the opening row)."""
+        source, card = self.state.timeline[["source", "card"]][row].tolist()
+        return None if source < 0 else self.pools[SOURCES[source]][card]
+
+    def snapshot(self, row: int) -> Snapshot:
+        t = self.state.timeline[row]
+        return Snapshot(
+            round=row,
+            posteriors=dict(zip(self.case.suspects, t["post"].tolist())),
+            integrity=int(t["integrity"]),
+            escape_risk=min(MAX_ESCAPE_RISK, row * self.case.escape_risk_per_round),
+            caution_points=int(t["caution"]),
+            card=self.card_at(row),
+        )
+
+    def evidence_log(self, start: int = 0, stop: Optional[int] = None) -> List[Snapshot]:
+        """Snapshots of clues start..stop-1 (0-based, default: all drawn so far), oldest first."""
+        stop = self.state.cursor if stop is None else min(stop, self.state.cursor)
+        return [self.snapshot(row) for row in range(start + 1, stop + 1)]
+
+    @property
+    def last_card(self) -> Optional[EvidenceCard]:
+        return self.card_at(self.state.cursor)
+
+    def _memo_key(self, multiset: bytes) -> tuple:
+        return self.memo.key(self.pools, self.state.timeline["post"][0].tobytes(), multiset)
+
+    def memo_entry(self, row: Optional[int] = None) -> MemoEntry:
+        """Shared derived data for timeline row `row` (default: the current position)."""
+        g = self.state
+        row = g.cursor if row is None else row
+        key = self._memo_key(g.card_multiset(row))
+        return self.memo.get(key) or self.memo.put(key, MemoEntry(g.timeline["post"][row]))
+
+    def what_if(self, source: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(draw odds, posterior after) for each card the next `source` draw could give, or
+        None for pools too big to preview."""
+        tables = self.tables(source)
+        after = self.memo_entry().next_posteriors(source, tables)
+        if after is None:
+            return None
+        deck = self.state.decks.get(source)
+        rows = deck.next_candidates() if deck is not None else np.arange(len(after))
+        odds = tables.weights[rows]
+        return odds / odds.sum() if len(rows) else odds, after[rows]
+
+    def _record(self, op: int, *operand):
+        self.state.trace += bytes((op,)) + TRACE_OPERANDS[op].pack(*operand)
+
+    def pick_evidence(self, source) -> EvidenceCard:
+        return self.pools[source][self.deck(source).draw(self.rng)]
+
+    def add_evidence(self, card: EvidenceCard):
+        """Add a specific card (rather than drawing one). It leaves the source's deck as if drawn,
+        so draw() won't deal it again this pass and undo puts it back."""
+        pos = self.position(card)
+        self._record(OP_ADD, SOURCE_INDEX[card.source], pos)
+        deck = self.deck(card.source)
+        if deck.epoch < 0:
+            deck.shuffle(self.rng)  # the first draw would have; take() needs a pass to take from
+        deck.take(pos)
+        self._add_evidence(card)
+
+    def _add_evidence(self, card: EvidenceCard):
+        g = self.state
+        tables = self.tables(card.source)
+        pos = tables.position(card.id)
+        source = SOURCE_INDEX[card.source]
+        key = self._memo_key(g.card_multiset(extra=source << 32 | pos))
+        entry = self.memo.get(key)
+        g.push(source, pos, tables.likelihood[pos], entry.posterior.tolist() if entry else None)
+        if entry is None:
+            self.memo.put(key, MemoEntry(g.probs))
+
+        # potentially open ethics modal
+        if card.source in ("RUMOR","INTERROGATION") and self.rng.random() < ETHICS_MODAL_CHANCE:
+            g.show_ethics_modal = True
+
+        # run adaptive tutoring triggers after each evidence
+        self.run_tutoring_triggers(event="after_evidence")
+
+    # --------------------------------- Time travel ------------------------------------
+    def rewind(self, to_round: int):
+        """Step back to the position after `to_round` clues, keeping later ones for redo."""
+        self._record(OP_REWIND, max(0, min(to_round, self.state.cursor)))
+        self._rewind(to_round)
+
+    def _rewind(self, to_round: int):
+        g = self.state
+        to_round = max(0, min(to_round, g.cursor))
+        rows = g.timeline[to_round + 1:g.cursor + 1][["source", "card"]].tolist()
+        for source, card in reversed(rows):
+            self.deck(SOURCES[source]).put_back(card)
+        g.cursor = to_round
+
+    def undo(self):
+        self._record(OP_UNDO)
+        self._rewind(self.state.cursor - 1)
+
+    def redo(self):
+        g = self.state
+        if not g.can_redo:
+            return
+        self._record(OP_REDO)
+        g.cursor += 1
+        source, card = g.timeline[["source", "card"]][g.cursor].tolist()
+        self.deck(SOURCES[source]).take(card)
+
+    def draw(self, source) -> EvidenceCard:
+        self._record(OP_DRAW, SOURCE_INDEX[source])
+        card = self.pick_evidence(source)
+        self._add_evidence(card)
+        return card
+
+    def start(self):
+        """Close the tutorial / intro and open the evidence board."""
+        self._record(OP_START)
+        self.state.show_tutorial = False
+        self.state.step = 1
+
+    def stand_by_evidence(self):
+        """Ethics modal: keep the last clue."""
+        self._record(OP_KEEP)
+        self.state.show_ethics_modal = False
+
+    def retract_evidence(self):
+        """Ethics modal: take the last clue back."""
+        self._record(OP_RETRACT)
+        self._rewind(self.state.cursor - 1)
+        self.state.show_ethics_modal = False
+
+    def accuse(self, guard: GuardID) -> bool:
+        """Close the case. Returns False if it was already closed."""
+        if guard not in self.case.index:
+            raise ValueError(f"{guard!r} is not a suspect in {self.case.title!r}")
+        self._record(OP_ACCUSE, self.case.index[guard])
+        return self._accuse(guard)
+
+    def _accuse(self, guard: GuardID) -> bool:
+        g = self.state
+        if g.done:
+            return False
+        g.accused = guard
+        correct = (guard == g.guilty)
+        g.done = True
+        g.step = 3
+        g.scores = self.compute_final_scores(correct)
+
+        earned = (
+            correct and g.integrity >= 90,       # High Integrity
+            correct and g.cursor <= 3,           # Sherlock
+            correct and g.escape_risk >= 80,     # Clutch Call
+        )
+        for i, hit in enumerate(earned):
+            if hit:
+                g.achievement_flags |= 1 << i
+        return True
+
+    def compute_final_scores(self, correct: bool):
+        g = self.state
+        accuracy = 100.0 if correct else 0.0
+        n = g.cursor
+        efficiency = max(0.0, 100.0 - (n-1)*12.5)
+        integrity = g.integrity
+        max_possible = 2 * max(1, g.round)
+        caution_raw = g.caution_points / max_possible
+        caution = int(100 * caution_raw)
+        final = (
+            ACCURACY_WEIGHT * accuracy +
+            INTEGRITY_WEIGHT * integrity +
+            EFFICIENCY_WEIGHT * efficiency +
+            CAUTION_WEIGHT * caution
+        )
+        return dict(
+            final=final,
+            accuracy=accuracy,
+            integrity=integrity,
+            efficiency=efficiency,
+            caution=caution
+        )
+
+    # ------------------------------ Adaptive Tutoring ---------------------------------
+    def push_tutor_message(self, key: str):
+        g = self.state
+        bit = 1 << TUTOR_KEYS.index(key)
+        if g.tutor_seen & bit:
+            return
+        g.tutor_seen |= bit
+        g.tutor_pending |= bit
+
+    def dismiss_tutor_message(self, key: str):
+        self._record(OP_DISMISS, TUTOR_KEYS.index(key))
+        self.state.tutor_pending &= ~(1 << TUTOR_KEYS.index(key))
+
+    def run_tutoring_triggers(self, event: str):
+        g = self.state
+        max_post = float(g.probs.max())
+
+        if g.round >= 2 and max_post < LOW_CONFIDENCE_THRESHOLD:
+            self.push_tutor_message("low_confidence_midgame")
+
+        if g.round >= 3 and g.integrity < LOW_INTEGRITY_THRESHOLD:
+            self.push_tutor_message("integrity_warning")
+
+        if g.cursor >= TOO_MANY_INVASIVE_IN_ROW:
+            last_two = g.sources(g.cursor - TOO_MANY_INVASIVE_IN_ROW + 1, g.cursor + 1)
+            if all(s in ("RUMOR","INTERROGATION") for s in last_two):
+                self.push_tutor_message("too_many_invasive")
+
+    def accuse_guard_with_check(self, guard: GuardID) -> bool:
+        """Accuse right away, or open the confirmation modal when confidence/integrity is low.
+        Returns True if the accusation went through."""
+        if guard not in self.case.index:
+            raise ValueError(f"{guard!r} is not a suspect in {self.case.title!r}")
+        self._record(OP_ACCUSE_CHECK, self.case.index[guard])
+        g = self.state
+        max_post = float(g.probs.max())
+        if (max_post < LOW_CONFIDENCE_THRESHOLD) or (g.integrity < LOW_INTEGRITY_THRESHOLD):
+            g.pending_accuse = guard
+            g.show_accuse_modal = True
+            return False
+        return self._accuse(guard)
+
+    def proceed_accuse(self) -> bool:
+        """Confirmation modal: accuse the pending suspect anyway."""
+        self._record(OP_PROCEED)
+        g = self.state
+        accused = g.pending_accuse is not None and self._accuse(g.pending_accuse)
+        g.show_accuse_modal = False
+        return accused
+
+    def cancel_accuse(self):
+        """Confirmation modal: go back for more evidence."""
+        self._record(OP_CANCEL)
+        self.state.pending_accuse = None
+        self.state.show_accuse_modal = False
+
+# --------------------------------------------------------------------------------------
+# --------------------------------------- MEMORY ---------------------------------------
+# --------------------------------------------------------------------------------------
+def deep_sizeof(obj, exclude: Iterable = ()) -> int:
+    """Bytes reachable from `obj` (containers, __dict__, __slots__, numpy buffers), counting
+    each object once and skipping anything in `exclude` and everything reachable from it."""
+    seen = {id(o) for o in exclude}
+    stack, total = [obj], 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, (type, types.ModuleType, types.FunctionType,
+                                           types.BuiltinFunctionType, types.MethodType)):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)  # includes the data buffer for arrays that own it
+        if isinstance(o, np.ndarray):
+            if o.base is not None:
+                stack.append(o.base)
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        if hasattr(o, "__dict__"):
+            stack.append(o.__dict__)
+        for cls in type(o).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(o, slot):
+                    stack.append(getattr(o, slot))
+    return total
+
+def session_nbytes(engine: GameEngine) -> int:
+    """Memory one session adds: its engine, state and RNG, but not the card pools or the
+    per-pool tables, which are shared across sessions."""
+    shared = [engine.pools, engine.memo, engine.case, GUARDS, SOURCES]
+    shared += [deck.weights for deck in engine.state.decks.values()]
+    return deep_sizeof(engine, exclude=shared)
+
+# --------------------------------------------------------------------------------------
+# ------------------------------------ HEADLESS RUN ------------------------------------
+# --------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Step random headless games and report throughput.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=4, help="evidence draws per game before accusing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--case", help="case file (JSON, see cases.py); default: the built-in case")
+    args = parser.parse_args()
+
+    if args.case:
+        from cases import load_case
+
+        case = load_case(args.case)
+    else:
+        case = DEFAULT_CASE
+    rng = random.Random(args.seed)
+    sources = [s for s, pool in case.pools.items() if len(pool)]
+    t0 = time.perf_counter()
+    total = 0.0
+    nbytes = 0
+    for _ in range(args.games):
+        engine = GameEngine(rng=rng, case=case)
+        for _ in range(args.rounds):
+            engine.draw(rng.choice(sources))
+        engine.accuse(case.suspects[int(engine.state.probs.argmax())])
+        total += engine.state.scores["final"]
+        nbytes = nbytes or session_nbytes(engine)
+    dt = time.perf_counter() - t0
+    print(f"{args.games} games in {dt:.2f}s ({args.games/dt:,.0f} games/s), mean final score {total/args.games:.1f}")
+    print(f"session after {args.rounds} clues: {nbytes:,} bytes")
+    memo = POSTERIOR_MEMO.stats()
+    print(f"posterior memo: {memo['size']:,} positions, hit rate {memo['hit_rate']:.1%}")
@@ -0,0 +1,160 @@
+# inference.py
+# Log-space Bayesian inference over N suspects. Card likelihoods live in a precomputed
+# (cards × suspects) matrix, so a batch of k clues is one gather + sum, for one game or many.
+# game_engine applies every clue through bayes_update(), so this module imports it only lazily.
+
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from game_engine import EvidenceCard
+
+# Smallest likelihood we take the log of; keeps impossible clues finite instead of -inf.
+LOG_FLOOR = 1e-300
+
+def log_normalize(log_post: np.ndarray) -> np.ndarray:
+    """Shift log-posteriors (last axis) so they log-sum-exp to 0. Never underflows."""
+    m = log_post.max(axis=-1, keepdims=True)
+    return log_post - (m + np.log(np.exp(log_post - m).sum(axis=-1, keepdims=True)))
+
+def bayes_update(posterior: np.ndarray, likelihood: np.ndarray) -> np.ndarray:
+    """Normalized posterior(s) after one clue: posterior · likelihood over the last axis,
+    summed in log space. Broadcasts, e.g. one posterior against a (cards × suspects) matrix."""
+    log_post = np.log(np.maximum(posterior, LOG_FLOOR)) + np.log(np.maximum(likelihood, LOG_FLOOR))
+    return np.exp(log_normalize(log_post))
+
+def bayes_update_list(posterior: Sequence[float], likelihood: Sequence[float]) -> List[float]:
+    """bayes_update for one short posterior in Python floats (cheaper than numpy below ~16 values)."""
+    log_post = [math.log(max(p, LOG_FLOOR)) + math.log(max(l, LOG_FLOOR)) for p, l in zip(posterior, likelihood)]
+    m = max(log_post)
+    post = [math.exp(x - m) for x in log_post]
+    total = sum(post)
+    return [p / total for p in post]
+
+class LikelihoodMatrix:
+    """log P(card | suspect) for every card in a case, one row per card."""
+
+    def __init__(self, likelihood: np.ndarray, card_ids: Optional[Sequence[str]] = None,
+                 suspects: Optional[Sequence[str]] = None):
+        likelihood = np.asarray(likelihood, dtype=np.float64)
+        if likelihood.ndim != 2:
+            raise ValueError("likelihood must be a (cards × suspects) matrix")
+        self.log = np.log(np.maximum(likelihood, LOG_FLOOR))
+        self.card_ids = list(card_ids) if card_ids is not None else [str(i) for i in range(len(likelihood))]
+        self.suspects = list(suspects) if suspects is not None else [str(i) for i in range(likelihood.shape[1])]
+        self._row = {cid: i for i, cid in enumerate(self.card_ids)}
+
+    @classmethod
+    def from_cards(cls, cards: Iterable["EvidenceCard"], suspects: Optional[Sequence[str]] = None):
+        from game_engine import GUARDS
+
+        cards = list(cards)
+        suspects = suspects or GUARDS
+        lik = [[c.likelihood[s] for s in suspects] for c in cards]
+        return cls(np.array(lik), [c.id for c in cards], suspects)
+
+    @classmethod
+    def from_pools(cls, pools: Optional[Dict[str, List["EvidenceCard"]]] = None,
+                   suspects: Optional[Sequence[str]] = None):
+        from game_engine import POOL_BY_SOURCE
+
+        pools = pools or POOL_BY_SOURCE
+        return cls.from_cards([c for pool in pools.values() for c in pool], suspects)
+
+    @property
+    def n_cards(self) -> int:
+        return self.log.shape[0]
+
+    @property
+    def n_suspects(self) -> int:
+        return self.log.shape[1]
+
+    def rows(self, card_ids: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self._row[c] for c in card_ids), dtype=np.intp)
+
+class LogPosteriorEngine:
+    """Keeps normalized log-posteriors for one game (shape (S,)) or a batch (shape (G, S))."""
+
+    def __init__(self, likelihood: LikelihoodMatrix, prior: Optional[np.ndarray] = None,
+                 n_games: Optional[int] = None):
+        self.likelihood = likelihood
+        s = likelihood.n_suspects
+        if prior is None:
+            prior = np.full(s, 1.0 / s)
+        log_prior = log_normalize(np.log(np.maximum(np.asarray(prior, dtype=np.float64), LOG_FLOOR)))
+        self.log_prior = log_prior
+        self.log_post = log_prior.copy() if n_games is None else np.tile(log_prior, (n_games, 1))
+
+    def reset(self):
+        self.log_post[...] = self.log_prior
+
+    def update(self, cards, games: Optional[np.ndarray] = None) -> np.ndarray:
+        """Apply a batch of clues at once.
+
+        Single game: `cards` is a 1-D array of row indices (repeats allowed).
+        Batched: `cards` is (G, k), one row of k clues per game; use -1 to pad. With `games`
+        (indices into the batch), `cards` has one row per listed game and the rest are untouched.
+        """
+        cards = np.asarray(cards, dtype=np.intp)
+        log = self.likelihood.log
+        if self.log_post.ndim == 1:
+            delta = log[cards].sum(axis=0)
+        else:
+            gathered = log[cards.clip(min=0)]
+            if (cards < 0).any():
+                gathered = np.where((cards >= 0)[..., None], gathered, 0.0)
+            delta = gathered.sum(axis=-2)
+        if games is None:
+            self.log_post = log_normalize(self.log_post + delta)
+        else:
+            self.log_post[games] = log_normalize(self.log_post[games] + delta)
+        return self.log_post
+
+    def update_counts(self, counts: np.ndarray) -> np.ndarray:
+        """Apply clues given as per-card counts, shape (cards,) or (G, cards)."""
+        self.log_post = log_normalize(self.log_post + np.asarray(counts) @ self.likelihood.log)
+        return self.log_post
+
+    def update_ids(self, card_ids: Iterable[str]) -> np.ndarray:
+        return self.update(self.likelihood.rows(card_ids))
+
+    def probs(self) -> np.ndarray:
+        return np.exp(self.log_post)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Single-game posterior keyed by suspect, in the shape the UI expects."""
+        return dict(zip(self.likelihood.suspects, self.probs().tolist()))
+
+    def top(self, k: int = 1):
+        """Indices of the k most suspected suspects (per game when batched), best first."""
+        lp = self.log_post
+        k = min(k, lp.shape[-1])
+        part = np.argpartition(-lp, k - 1, axis=-1)[..., :k]
+        order = np.take_along_axis(lp, part, axis=-1).argsort(axis=-1)[..., ::-1]
+        return np.take_along_axis(part, order, axis=-1)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark batched log-space updates on a synthetic case.")
+    parser.add_argument("--suspects", type=int, default=500)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--clues", type=int, default=200, help="clues applied per game")
+    parser.add_argument("--batch", type=int, default=20, help="clues applied per vectorized step")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lik = LikelihoodMatrix(rng.dirichlet(np.ones(args.suspects), size=args.cards))
+    eng = LogPosteriorEngine(lik, n_games=args.games)
+    t0 = time.perf_counter()
+    for _ in range(0, args.clues, args.batch):
+        eng.update(rng.integers(args.cards, size=(args.games, args.batch)))
+    dt = time.perf_counter() - t0
+    total = args.games * args.clues
+    print(f"{total:,} clue updates over {args.suspects} suspects in {dt:.3f}s ({total/dt:,.0f}/s)")
+    print(f"posterior sums to {eng.probs().sum(axis=1).mean():.6f}; "
+          f"min log-posterior {eng.log_post.min():.1f} (no underflow to -inf)")
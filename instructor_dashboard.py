@@ -0,0 +1,95 @@
+# instructor_dashboard.py
+# Instructor view of how the class plays, read from the summary tables analytics.py writes
+# (never from the raw event store):  python analytics.py events.db --out analytics
+# A separate app, so it never shows up in the students' sidebar:
+#   streamlit run instructor_dashboard.py --server.port 8502
+
+import os
+import time
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from analytics import read_summaries
+
+ANALYTICS_DIR = os.environ.get(  # summary tables written by analytics.py
+    "BAYES_GAME_ANALYTICS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "analytics"))
+
+st.set_page_config(page_title="📊 Instructor Dashboard", page_icon="📊", layout="wide")
+
+@st.cache_data(show_spinner=False)
+def load_summaries(path: str, mtime: float) -> dict:
+    """The precomputed tables; `mtime` makes a fresh analytics run invalidate the cache."""
+    return read_summaries(path)
+
+def summaries_mtime(path: str) -> float:
+    try:
+        return max(e.stat().st_mtime for e in os.scandir(path))
+    except (FileNotFoundError, ValueError):
+        return 0.0
+
+st.markdown("## 📊 Instructor Dashboard")
+tables = load_summaries(ANALYTICS_DIR, summaries_mtime(ANALYTICS_DIR))
+if "overview" not in tables:
+    st.info(f"No summaries in `{ANALYTICS_DIR}` yet. Run "
+            f"`python analytics.py <events.db or log dir> --out {ANALYTICS_DIR}` first.")
+    st.stop()
+
+ov = tables["overview"].iloc[0]
+if pd.notna(ov["last_ts"]):
+    st.caption(f"Games finished up to {time.strftime('%Y-%m-%d %H:%M', time.localtime(ov['last_ts']))}")
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Finished games", f"{int(ov['games']):,}")
+c2.metric("Correct accusations", f"{ov['accuracy']:.0%}")
+c3.metric("Avg. rounds before accusing", f"{ov['mean_rounds']:.1f}")
+c4.metric("Brier score", f"{ov['brier']:.3f}", help="Mean (confidence in the accused − correct)². Lower is better.")
+
+# ------------------------------------ accuracy by mix ---------------------------------
+st.markdown("### 🧪 Accuracy by evidence mix")
+mix = tables["mix_accuracy"]
+min_games = st.slider("Hide mixes played fewer times than", 1, 100, 10)
+st.dataframe(
+    mix[mix["games"] >= min_games],
+    hide_index=True,
+    column_config={"accuracy": st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+                   "mean_rounds": st.column_config.NumberColumn(format="%.1f")},
+)
+
+left, right = st.columns(2)
+# ------------------------------------- calibration ------------------------------------
+with left:
+    st.markdown("### 🎯 Calibration")
+    st.caption("Confidence in the accused guard vs. how often they were the thief.")
+    cal = tables["calibration"].dropna()
+    diagonal = alt.Chart(pd.DataFrame({"x": [0, 1]})).mark_line(strokeDash=[4, 4], color="gray").encode(
+        x="x:Q", y="x:Q")
+    points = alt.Chart(cal).mark_line(point=True).encode(
+        x=alt.X("mean_posterior:Q", title="Final confidence", scale=alt.Scale(domain=[0, 1])),
+        y=alt.Y("accuracy:Q", title="Actually guilty", scale=alt.Scale(domain=[0, 1])),
+        size=alt.Size("games:Q", legend=None),
+        tooltip=["games", alt.Tooltip("mean_posterior:Q", format=".2f"), alt.Tooltip("accuracy:Q", format=".2f")],
+    )
+    st.altair_chart((diagonal + points).properties(height=280), use_container_width=True)
+
+# ------------------------------------- integrity --------------------------------------
+with right:
+    st.markdown("### 🛡️ Final integrity")
+    st.caption("Share of finished games by integrity left at the accusation.")
+    st.bar_chart(tables["integrity"], x="integrity_from", y="share", height=280)
+
+left, right = st.columns(2)
+# ---------------------------------------- rounds --------------------------------------
+with left:
+    st.markdown("### ⏱️ Rounds before accusing")
+    st.bar_chart(tables["rounds"].query("games > 0"), x="rounds", y="games", height=240)
+
+# ---------------------------------------- tutor ---------------------------------------
+with right:
+    st.markdown("### 🧑‍🏫 Tutor triggers")
+    st.dataframe(
+        tables["tutor"].sort_values("shown", ascending=False),
+        hide_index=True,
+        column_config={"per_100_games": st.column_config.NumberColumn("per 100 games", format="%.1f")},
+    )
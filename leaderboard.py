@@ -0,0 +1,392 @@
+# leaderboard.py
+# Persistent leaderboard in a local SQLite file (WAL, one connection pool per process). Top-K
+# lists come from covering indexes (global, per class, per achievement) and are then kept in
+# in-memory heaps; ranks come from per-score bucket counts held in Fenwick trees, so neither
+# ever scans the runs table. Boards are per case (Case.signature), so scores stay comparable.
+
+import contextlib
+import heapq
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from game_engine import ACHIEVEMENTS, GameEngine
+
+POOL_SIZE = 4
+TOP_K = 10                  # rows the debrief shows
+TOP_K_CACHE = 100           # rows kept in each in-memory heap; deeper lists go to SQLite
+SCORE_SCALE = 100           # scores are kept to 0.01 points: bucket = round(final * 100)
+MAX_BUCKET = 100 * SCORE_SCALE
+BUSY_TIMEOUT = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    board INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    player TEXT NOT NULL,
+    class_id TEXT NOT NULL,
+    final REAL NOT NULL,
+    achievements INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    rounds INTEGER NOT NULL,
+    integrity INTEGER NOT NULL,
+    code TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_board_final ON runs (board, final DESC, id);
+CREATE INDEX IF NOT EXISTS runs_board_class_final ON runs (board, class_id, final DESC, id);
+CREATE TABLE IF NOT EXISTS run_achievements (
+    board INTEGER NOT NULL,
+    achievement INTEGER NOT NULL,
+    final REAL NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (board, achievement, final DESC, run_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS score_buckets (
+    board INTEGER NOT NULL,
+    class_id TEXT,              -- NULL: the whole board
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (board, class_id, bucket)
+);
+"""
+_RUN_COLUMNS = "id, ts, player, class_id, final, achievements, correct, rounds, integrity, code"
+
+class Run(NamedTuple):
+    id: int
+    ts: float
+    player: str
+    class_id: str
+    final: float
+    achievements: int   # bit i set: ACHIEVEMENTS[i] earned
+    correct: bool
+    rounds: int
+    integrity: int
+    code: Optional[str] = None  # session code (see replay.py)
+
+    @property
+    def achievement_names(self) -> List[str]:
+        return [a for i, a in enumerate(ACHIEVEMENTS) if self.achievements >> i & 1]
+
+def bucket(final: float) -> int:
+    return min(MAX_BUCKET, max(0, round(final * SCORE_SCALE)))
+
+# ------------------------------------- connections ------------------------------------
+class ConnectionPool:
+    """Up to `size` SQLite connections shared by a process's threads (Streamlit reruns)."""
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                grow = self.opened < self.size
+                self.opened += grow
+            conn = self._open() if grow else self.idle.get(timeout=BUSY_TIMEOUT)
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# ---------------------------------------- caches --------------------------------------
+class Fenwick:
+    """Counts per score bucket with O(log n) "how many scored above" queries."""
+
+    def __init__(self, size: int = MAX_BUCKET + 1):
+        self.tree = [0] * (size + 1)
+        self.total = 0
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[Tuple[int, int]], size: int = MAX_BUCKET + 1) -> "Fenwick":
+        """Build from (bucket, n) pairs in O(size)."""
+        fw = cls(size)
+        tree = fw.tree
+        for i, n in counts:
+            tree[i + 1] += n
+            fw.total += n
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        return fw
+
+    def add(self, i: int, n: int = 1):
+        self.total += n
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += n
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """How many counts sit in buckets [0, i)."""
+        s = 0
+        while i > 0:
+            s += self.tree[i]
+            i -= i & -i
+        return s
+
+    def above(self, i: int) -> int:
+        return self.total - self.prefix(i + 1)
+
+class TopK:
+    """Min-heap of the best `k` runs (by final score, then earliest)."""
+
+    def __init__(self, k: int, runs: Iterable[Run] = ()):
+        self.k = k
+        self.heap: List[Tuple[float, int, Run]] = []
+        for run in runs:
+            self.push(run)
+
+    def push(self, run: Run):
+        item = (run.final, -run.id, run)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+
+    def top(self, n: int) -> List[Run]:
+        return [run for _, _, run in heapq.nlargest(n, self.heap)]
+
+# -------------------------------------- leaderboard -----------------------------------
+class Leaderboard:
+    """One case's board. Heaps and Fenwick trees are filled from indexed queries on first use,
+    updated in place by add(), and dropped when another process has added runs."""
+
+    def __init__(self, pool: ConnectionPool, board: int = 0, cache_k: int = TOP_K_CACHE):
+        self.pool = pool
+        self.board = board
+        self.cache_k = cache_k
+        self.lock = threading.Lock()
+        self.heaps: Dict[tuple, TopK] = {}          # ("all",), ("class", id) or ("achievement", i)
+        self.counts: Dict[Optional[str], Fenwick] = {}  # None: the whole board, else a class
+        self.last_id: Optional[int] = None
+        self.generation = 0     # bumped on every write, so a cache built from a stale query isn't kept
+
+    # ----------------------------------- writes ---------------------------------------
+    def add(self, player: str, final: float, achievements: int = 0, class_id: str = "",
+            correct: bool = False, rounds: int = 0, integrity: int = 0, code: Optional[str] = None,
+            ts: Optional[float] = None) -> Run:
+        final = bucket(final) / SCORE_SCALE
+        row = (self.board, time.time() if ts is None else ts, player, class_id, final, achievements,
+               int(correct), rounds, integrity, code)
+        with self.pool.connection() as conn, conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (board, ts, player, class_id, final, achievements, correct, rounds, "
+                "integrity, code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row).lastrowid
+            self._write_indexes(conn, [(run_id, class_id, final, achievements)])
+        run = Run(run_id, row[1], player, class_id, final, achievements, bool(correct), rounds, integrity, code)
+        with self.lock:
+            if self.last_id is not None and self.last_id + 1 == run_id:
+                for key, heap in self.heaps.items():
+                    if self._in_scope(key, run):
+                        heap.push(run)
+                for class_key, counts in self.counts.items():
+                    if class_key is None or class_key == class_id:
+                        counts.add(bucket(final))
+            else:  # someone else wrote in between: reload on next read
+                self.heaps.clear()
+                self.counts.clear()
+            self.last_id = run_id
+            self.generation += 1
+        return run
+
+    def add_many(self, rows: Iterable[tuple]) -> int:
+        """Bulk insert (player, final, achievements, class_id, correct, rounds, integrity, code, ts)
+        rows in one transaction, e.g. to import old results. Returns the number added."""
+        n = 0
+        with self.pool.connection() as conn, conn:
+            cur = conn.cursor()
+            indexed = []
+            for player, final, achievements, class_id, correct, rounds, integrity, code, ts in rows:
+                final = bucket(final) / SCORE_SCALE
+                cur.execute(
+                    "INSERT INTO runs (board, ts, player, class_id, final, achievements, correct, rounds, "
+                    "integrity, code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.board, ts, player, class_id, final, achievements, int(correct), rounds, integrity, code))
+                indexed.append((cur.lastrowid, class_id, final, achievements))
+                n += 1
+            self._write_indexes(conn, indexed)
+        with self.lock:
+            self.heaps.clear()
+            self.counts.clear()
+            self.last_id = None
+            self.generation += 1
+        return n
+
+    def record(self, engine: GameEngine, player: str, class_id: str = "", code: Optional[str] = None) -> Run:
+        """Add a finished game."""
+        g = engine.state
+        return self.add(player, g.scores["final"], g.achievement_flags, class_id, g.accused == g.guilty,
+                        g.round, g.integrity, code)
+
+    def _write_indexes(self, conn: sqlite3.Connection, runs: List[Tuple[int, str, float, int]]):
+        conn.executemany(
+            "INSERT INTO run_achievements (board, achievement, final, run_id) VALUES (?, ?, ?, ?)",
+            [(self.board, i, final, run_id) for run_id, _, final, flags in runs
+             for i in range(len(ACHIEVEMENTS)) if flags >> i & 1])
+        buckets = Counter()
+        for _, class_id, final, _ in runs:
+            b = bucket(final)
+            buckets[(None, b)] += 1
+            buckets[(class_id, b)] += 1
+        # the whole board's rows carry class_id NULL, which a primary key won't match on conflict,
+        # so update first and insert what was missing
+        for (class_id, b), n in buckets.items():
+            if not conn.execute("UPDATE score_buckets SET n = n + ? WHERE board = ? AND class_id IS ? AND bucket = ?",
+                                (n, self.board, class_id, b)).rowcount:
+                conn.execute("INSERT INTO score_buckets (board, class_id, bucket, n) VALUES (?, ?, ?, ?)",
+                             (self.board, class_id, b, n))
+
+    # ------------------------------------ reads ---------------------------------------
+    def _sync(self, conn: sqlite3.Connection) -> int:
+        """Drop the caches if runs were added behind our back (another process or import).
+        Returns the cache generation a query made now will belong to."""
+        last_id = conn.execute("SELECT max(id) FROM runs").fetchone()[0]
+        with self.lock:
+            if last_id != self.last_id:
+                self.heaps.clear()
+                self.counts.clear()
+                self.last_id = last_id
+                self.generation += 1
+            return self.generation
+
+    @staticmethod
+    def _in_scope(key: tuple, run: Run) -> bool:
+        kind = key[0]
+        return (kind == "all" or (kind == "class" and run.class_id == key[1])
+                or (kind == "achievement" and run.achievements >> key[1] & 1))
+
+    def _query_top(self, conn: sqlite3.Connection, key: tuple, k: int) -> List[Run]:
+        kind = key[0]
+        if kind == "all":
+            rows = conn.execute(f"SELECT {_RUN_COLUMNS} FROM runs WHERE board = ? "
+                                "ORDER BY final DESC, id LIMIT ?", (self.board, k))
+        elif kind == "class":
+            rows = conn.execute(f"SELECT {_RUN_COLUMNS} FROM runs WHERE board = ? AND class_id = ? "
+                                "ORDER BY final DESC, id LIMIT ?", (self.board, key[1], k))
+        else:
+            rows = conn.execute(
+                f"SELECT {', '.join('r.' + c.strip() for c in _RUN_COLUMNS.split(','))} "
+                "FROM run_achievements a JOIN runs r ON r.id = a.run_id "
+                "WHERE a.board = ? AND a.achievement = ? ORDER BY a.final DESC, a.run_id LIMIT ?",
+                (self.board, key[1], k))
+        return [Run(*row[:6], bool(row[6]), *row[7:]) for row in rows]
+
+    def top(self, k: int = TOP_K, class_id: Optional[str] = None, achievement: Optional[str] = None) -> List[Run]:
+        """The best `k` runs on the board, in a class, or among runs that earned `achievement`."""
+        if achievement is not None:
+            key = ("achievement", ACHIEVEMENTS.index(achievement))
+        elif class_id is not None:
+            key = ("class", class_id)
+        else:
+            key = ("all",)
+        with self.pool.connection() as conn:
+            generation = self._sync(conn)
+            if k > self.cache_k:
+                return self._query_top(conn, key, k)
+            with self.lock:
+                heap = self.heaps.get(key)
+            if heap is None:
+                heap = TopK(self.cache_k, self._query_top(conn, key, self.cache_k))
+                with self.lock:
+                    # an add() since _sync may have missed this heap: use it once, don't keep it
+                    if self.generation == generation:
+                        heap = self.heaps.setdefault(key, heap)
+        with self.lock:
+            return heap.top(k)
+
+    def _counts(self, class_id: Optional[str]) -> Fenwick:
+        with self.pool.connection() as conn:
+            generation = self._sync(conn)
+            with self.lock:
+                counts = self.counts.get(class_id)
+            if counts is None:
+                counts = Fenwick.from_counts(conn.execute(
+                    "SELECT bucket, n FROM score_buckets WHERE board = ? AND class_id IS ?", (self.board, class_id)))
+                with self.lock:
+                    if self.generation == generation:
+                        counts = self.counts.setdefault(class_id, counts)
+        return counts
+
+    def rank(self, final: float, class_id: Optional[str] = None) -> int:
+        """1 + how many runs (in `class_id`, if given) scored strictly more than `final`."""
+        counts = self._counts(class_id)
+        with self.lock:
+            return 1 + counts.above(bucket(final))
+
+    def size(self, class_id: Optional[str] = None) -> int:
+        counts = self._counts(class_id)
+        with self.lock:
+            return counts.total
+
+if __name__ == "__main__":
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser(description="Show or benchmark a leaderboard database.")
+    parser.add_argument("db", help="leaderboard SQLite file")
+    parser.add_argument("--board", type=int, default=None, help="case signature (default: the built-in case)")
+    parser.add_argument("--class", dest="class_id", help="show one class")
+    parser.add_argument("--achievement", choices=ACHIEVEMENTS, help="show runs that earned this")
+    parser.add_argument("--top", type=int, default=TOP_K)
+    parser.add_argument("--bench", type=int, metavar="N", help="first add N random runs, then time lookups")
+    args = parser.parse_args()
+
+    if args.board is None:
+        from game_engine import DEFAULT_CASE
+
+        args.board = DEFAULT_CASE.signature
+    lb = Leaderboard(ConnectionPool(args.db), args.board)
+    if args.bench:
+        rng = random.Random(0)
+        classes = [f"class-{i}" for i in range(50)]
+        t0 = time.perf_counter()
+        lb.add_many((f"bot{i}", rng.uniform(0, 100), rng.randrange(1 << len(ACHIEVEMENTS)), rng.choice(classes),
+                     rng.random() < 0.33, rng.randrange(1, 12), rng.randrange(0, 101), None, time.time())
+                    for i in range(args.bench))
+        print(f"added {args.bench:,} runs in {time.perf_counter() - t0:.1f}s")
+        for label, fn in [
+            ("first top-10 (indexed query)", lambda: lb.top()),
+            ("top-10 (heap)", lambda: lb.top()),
+            ("first rank (bucket table)", lambda: lb.rank(50.0)),
+            ("rank (Fenwick)", lambda: lb.rank(rng.uniform(0, 100))),
+            ("add", lambda: lb.add("you", rng.uniform(0, 100), 1, "class-0")),
+            ("top-10 by class (index)", lambda: lb.top(class_id=rng.choice(classes))),
+            ("top-10 by achievement (index)", lambda: lb.top(achievement=rng.choice(ACHIEVEMENTS))),
+        ]:
+            t0 = time.perf_counter()
+            reps = 1 if label.startswith("first") else 1000
+            for _ in range(reps):
+                fn()
+            print(f"  {label:<32}{(time.perf_counter() - t0) / reps * 1e6:>10.1f} µs")
+    runs = lb.top(args.top, args.class_id, args.achievement)
+    if not args.achievement:
+        print(f"{lb.size(args.class_id):,} runs" + (f" in {args.class_id}" if args.class_id else ""))
+    for i, r in enumerate(runs, 1):
+        print(f"{i:>4}. {r.player:<20} {r.class_id:<12} {r.final:>6.2f}  {', '.join(r.achievement_names)}")
@@ -0,0 +1,184 @@
+# loadtest.py
+# Headless load test: N simulated players drive bayes_game.py concurrently through Streamlit's
+# AppTest (intro → k mixed evidence draws with an ethics-modal undo → accusation → debrief).
+# Reports per-action rerun latency, throughput and per-session memory as stable JSON.
+# AppTest shares runtime globals between instances in a process, so concurrent players run in
+# worker processes (like a multi-worker deployment), each playing its sessions in turn.
+
+import functools
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from game_engine import session_nbytes
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bayes_game.py")
+SOURCE_BUTTONS = {
+    "CCTV": "📹 CCTV Footage",
+    "RUMOR": "🗣️ Staff Rumors (−5 Integrity)",
+    "INTERROGATION": "🚨 Aggressive Interrogation (−15 Integrity)",
+}
+DEFAULT_MIX = (0.5, 0.3, 0.2)  # CCTV, RUMOR, INTERROGATION
+PERCENTILES = (50, 90, 95, 99)
+REPORT_VERSION = 1
+
+@dataclass
+class PlayerRun:
+    """What one simulated player did and how long each rerun took (seconds)."""
+    player: int
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    draws: int = 0
+    ethics_undos: int = 0
+    correct: Optional[bool] = None
+    session_bytes: int = 0
+    error: Optional[str] = None
+
+def _click(at, run: PlayerRun, action: str, label: str = None, key: str = None):
+    button = at.button(key=key) if key else next((b for b in at.button if b.label == label), None)
+    if button is None:
+        raise LookupError(f"{action}: no {label!r} button on screen")
+    t0 = time.perf_counter()
+    button.click().run()
+    run.latencies.setdefault(action, []).append(time.perf_counter() - t0)
+    if at.exception:
+        raise RuntimeError(f"{action}: {at.exception[0].message}")
+
+def _labels(at) -> set:
+    return {b.label for b in at.button}
+
+def play(player: int, draws: int, mix=DEFAULT_MIX, seed: int = 0, app_path: str = APP_PATH,
+         timeout: float = 60, think: float = 0.0) -> PlayerRun:
+    """One scripted session. The first ethics modal is undone, later ones are accepted.
+    `think` seconds (±50%) pass before each evidence draw, as a player reads the board.
+    The deal comes from ?seed=, so a run is reproducible (and never ranked on a leaderboard)."""
+    from streamlit.testing.v1 import AppTest
+
+    game_seed = seed * 1_000_003 + player
+    rng = random.Random(game_seed)
+    run = PlayerRun(player)
+    try:
+        at = AppTest.from_file(app_path, default_timeout=timeout)
+        at.query_params["seed"] = str(game_seed)
+        t0 = time.perf_counter()
+        at.run()
+        run.latencies["intro"] = [time.perf_counter() - t0]
+        _click(at, run, "start", key="start_game_button")
+
+        sources = rng.choices(list(SOURCE_BUTTONS), weights=mix, k=draws)
+        for source in sources:
+            if think:
+                time.sleep(think * rng.uniform(0.5, 1.5))
+            _click(at, run, "draw", SOURCE_BUTTONS[source])
+            run.draws += 1
+            if "Undo last evidence" in _labels(at):
+                if run.ethics_undos == 0:
+                    _click(at, run, "ethics_undo", "Undo last evidence")
+                    run.ethics_undos += 1
+                else:
+                    _click(at, run, "ethics_keep", "I stand by it")
+
+        engine = at.session_state["engine"]
+        case = engine.case
+        top = case.suspects[int(engine.state.probs.argmax())]
+        _click(at, run, "accuse", f"🎯 Accuse {case.name(top)}")
+        if "Proceed anyway" in _labels(at):
+            _click(at, run, "accuse_confirm", "Proceed anyway")
+        if engine.state.step != 3:
+            raise RuntimeError("session did not reach the debrief")
+        run.correct = engine.state.accused == engine.state.guilty
+        run.session_bytes = session_nbytes(engine)
+    except Exception as e:  # report and keep the other players going
+        run.error = f"{type(e).__name__}: {e}"
+    finally:
+        from telemetry import flush_all  # worker processes exit without running atexit
+
+        flush_all()
+    return run
+
+def _dist(seconds: List[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds) * 1000
+    out = {"n": len(ms), "mean_ms": round(float(ms.mean()), 2), "max_ms": round(float(ms.max()), 2)}
+    for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        out[f"p{p}_ms"] = round(float(v), 2)
+    return out
+
+def run_load(players: int, concurrency: int, draws: int, mix=DEFAULT_MIX, seed: int = 0,
+             app_path: str = APP_PATH, think: float = 0.0) -> dict:
+    """Run `players` sessions, `concurrency` at a time in worker processes."""
+    import streamlit
+
+    t0 = time.perf_counter()
+    player = functools.partial(play, draws=draws, mix=mix, seed=seed, app_path=app_path, think=think)
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(player, range(players)))
+    wall = time.perf_counter() - t0
+
+    ok = [r for r in runs if r.error is None]
+    by_action: Dict[str, List[float]] = {}
+    for r in ok:
+        for action, samples in r.latencies.items():
+            by_action.setdefault(action, []).extend(samples)
+    all_reruns = [s for samples in by_action.values() for s in samples]
+    session_bytes = [r.session_bytes for r in ok]
+    return {
+        "version": REPORT_VERSION,
+        "config": {
+            "players": players, "concurrency": concurrency, "draws": draws,
+            "mix": dict(zip(SOURCE_BUTTONS, mix)), "seed": seed, "think_s": think,
+            "streamlit": streamlit.__version__,
+        },
+        "sessions": {
+            "completed": len(ok),
+            "failed": len(runs) - len(ok),
+            "errors": sorted({r.error for r in runs if r.error})[:5],
+            "ethics_undos": sum(r.ethics_undos for r in ok),
+            "accuracy": round(sum(bool(r.correct) for r in ok) / max(1, len(ok)), 4),
+        },
+        "latency": {
+            "all": _dist(all_reruns) if all_reruns else {},
+            **{a: _dist(s) for a, s in sorted(by_action.items())},
+        },
+        "throughput": {
+            "wall_s": round(wall, 3),
+            "reruns_per_s": round(len(all_reruns) / wall, 2),
+            "sessions_per_s": round(len(ok) / wall, 3),
+        },
+        "memory": {
+            "session_bytes_mean": round(statistics.fmean(session_bytes)) if session_bytes else 0,
+            "session_bytes_max": max(session_bytes, default=0),
+        },
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description="Drive concurrent headless sessions of the app.")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--draws", type=int, default=6, help="evidence draws per player")
+    parser.add_argument("--mix", default=",".join(map(str, DEFAULT_MIX)),
+                        help="relative CCTV,RUMOR,INTERROGATION odds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds before each draw")
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    # AppTest swaps sys.modules["__main__"] in the workers, so hand them loadtest.play, not __main__.play
+    from loadtest import run_load
+    report = run_load(args.players, args.concurrency, args.draws,
+                      tuple(float(x) for x in args.mix.split(",")), args.seed, args.app, args.think)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,111 @@
+# prefetch.py
+# Background prefetch of the next step. While a player reads the board, a worker thread works
+# out the position after each possible next clue (the deck's next card when it is already
+# known, every candidate when a shuffle is due), stores it in the shared posterior memo and
+# warms the chart caches, so the click's add_evidence and re-render are cache hits. A job the
+# next click made stale stops before its next memo write.
+
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from game_engine import SOURCE_INDEX, GameEngine, MemoEntry, PosteriorMemo
+from inference import bayes_update
+
+PREFETCH_WORKERS = 2
+MAX_CANDIDATES = 64  # per source; past this only a known next card is prefetched
+
+class Candidate(NamedTuple):
+    key: tuple              # PosteriorMemo key of the position after this clue
+    likelihood: np.ndarray  # the clue's likelihood row
+    known: bool             # the deck's next card for sure (worth warming charts for)
+
+class Plan(NamedTuple):
+    """Everything a job needs, copied on the session's thread so the worker never reads
+    state a click might be changing."""
+    posterior: np.ndarray
+    history: np.ndarray
+    candidates: List[Candidate]
+    suspects: tuple
+    stale: threading.Event  # set when a newer plan replaces this one
+
+def plan_next(engine: GameEngine) -> Plan:
+    g = engine.state
+    priors = g.timeline["post"][0].tobytes()
+    candidates = []
+    for source, pool in engine.pools.items():
+        deck = g.decks.get(source)
+        nxt = deck.peek() if deck is not None else None
+        known = nxt is not None
+        if known:
+            rows = [nxt]
+        elif len(pool) <= MAX_CANDIDATES:
+            rows = (deck.next_candidates() if deck is not None else np.arange(len(pool))).tolist()
+        else:
+            continue
+        likelihood = engine.tables(source).likelihood
+        code = SOURCE_INDEX[source] << 32
+        for row in rows:
+            key = engine.memo.key(engine.pools, priors, g.card_multiset(extra=code | row))
+            candidates.append(Candidate(key, likelihood[row], known))
+    return Plan(g.probs.copy(), g.history_view().copy(), candidates, g.case.suspects, threading.Event())
+
+def run_plan(memo: PosteriorMemo, plan: Plan, warm_charts: bool = True) -> int:
+    """Fill the memo (and chart caches) for every candidate until the plan goes stale.
+    Returns how many entries were new."""
+    new = 0
+    for cand in plan.candidates:
+        if plan.stale.is_set():
+            break
+        entry = memo.peek(cand.key)
+        if entry is None:
+            fresh = MemoEntry(bayes_update(plan.posterior, cand.likelihood))
+            if plan.stale.is_set():
+                break
+            entry = memo.put(cand.key, fresh, replace=False)  # the session may have got there first
+            new += entry is fresh
+        if warm_charts and cand.known:  # chart specs cost ~25 ms each; only build sure things
+            import charts
+
+            charts.suspicion_spec(entry.percent, plan.suspects)
+            charts.history_spec(np.vstack([plan.history, entry.posterior]), plan.suspects)
+    return new
+
+class Prefetcher:
+    """A small thread pool shared by all sessions; each session keeps at most one job queued."""
+
+    def __init__(self, workers: int = PREFETCH_WORKERS, warm_charts: bool = True):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self.warm_charts = warm_charts
+        self.jobs = 0
+        self.prefetched = 0
+        self._lock = threading.Lock()
+        self._plans: "weakref.WeakKeyDictionary[Future, Plan]" = weakref.WeakKeyDictionary()
+
+    def schedule(self, engine: GameEngine, previous: Optional[Future] = None) -> Future:
+        """Queue a prefetch for the engine's current position, dropping the stale previous one:
+        cancelled if still queued, stopped before its next memo write if already running."""
+        if previous is not None:
+            previous.cancel()
+            with self._lock:
+                stale = self._plans.pop(previous, None)
+            if stale is not None:
+                stale.stale.set()
+        plan = plan_next(engine)
+        future = self.pool.submit(self._run, engine.memo, plan)
+        with self._lock:
+            self._plans[future] = plan
+        return future
+
+    def _run(self, memo: PosteriorMemo, plan: Plan) -> int:
+        new = run_plan(memo, plan, self.warm_charts)
+        with self._lock:
+            self.jobs += 1
+            self.prefetched += new
+        return new
+
+    def stats(self) -> dict:
+        return dict(jobs=self.jobs, prefetched=self.prefetched)
@@ -0,0 +1,120 @@
+# profiler.py
+# Hot-path timings for the Streamlit script: each named section records its wall time into a
+# fixed-size ring buffer shared by the whole process, summarized as p50/p95 and exportable
+# in the Prometheus text format (for node_exporter's textfile collector or a scrape sidecar).
+
+import functools
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+import numpy as np
+
+RING_SIZE = 512  # samples kept per section
+QUANTILES = (0.5, 0.95)
+METRIC_NAME = "bayes_game_section_seconds"
+
+class SectionRing:
+    """The last RING_SIZE durations (seconds) of one section, plus lifetime count and sum."""
+    __slots__ = ("samples", "next", "count", "total")
+
+    def __init__(self, size: int = RING_SIZE):
+        self.samples = np.zeros(size)
+        self.next = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float):
+        self.samples[self.next] = seconds
+        self.next = (self.next + 1) % len(self.samples)
+        self.count += 1
+        self.total += seconds
+
+    def window(self) -> np.ndarray:
+        return self.samples[:min(self.count, len(self.samples))]
+
+class Profiler:
+    """Process-wide section timer. Streamlit runs sessions on threads, so updates take a lock."""
+
+    def __init__(self, size: int = RING_SIZE):
+        self.size = size
+        self.rings: Dict[str, SectionRing] = {}
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def record(self, section: str, seconds: float):
+        with self._lock:
+            ring = self.rings.get(section)
+            if ring is None:
+                ring = self.rings[section] = SectionRing(self.size)
+            ring.add(seconds)
+
+    @contextmanager
+    def section(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def timed(self, name: str):
+        """Decorator form of section()."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.section(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def summary(self) -> Dict[str, dict]:
+        """Per section: lifetime count, last sample and p50/p95 over the ring, in milliseconds."""
+        with self._lock:
+            rings = {name: (ring.window().copy(), ring.count, ring.total, ring.samples[ring.next - 1])
+                     for name, ring in self.rings.items()}
+        out = {}
+        for name, (window, count, total, last) in sorted(rings.items()):
+            p50, p95 = np.quantile(window, QUANTILES) * 1000
+            out[name] = dict(count=count, last_ms=float(last) * 1000, p50_ms=float(p50), p95_ms=float(p95),
+                             mean_ms=total / count * 1000)
+        return out
+
+    def prometheus_text(self) -> str:
+        """All sections as one Prometheus summary metric."""
+        lines = [
+            f"# HELP {METRIC_NAME} Wall time of each section of a Streamlit script run.",
+            f"# TYPE {METRIC_NAME} summary",
+        ]
+        with self._lock:
+            rings = {name: (ring.window().copy(), ring.count, ring.total) for name, ring in self.rings.items()}
+        for name, (window, count, total) in sorted(rings.items()):
+            for q, v in zip(QUANTILES, np.quantile(window, QUANTILES)):
+                lines.append(f'{METRIC_NAME}{{section="{name}",quantile="{q}"}} {v:.6g}')
+            lines.append(f'{METRIC_NAME}_sum{{section="{name}"}} {total:.6g}')
+            lines.append(f'{METRIC_NAME}_count{{section="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, min_interval: float = 5.0) -> bool:
+        """Atomically rewrite `path` with prometheus_text(), at most every `min_interval`
+        seconds so busy servers don't write on every rerun. Returns True if it wrote."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_export < min_interval:
+                return False
+            self._last_export = now
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".prom.tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)  # scrapers never see a half-written file
+        return True
+
+    def reset(self):
+        with self._lock:
+            self.rings.clear()
+
+PROFILER = Profiler()
+section = PROFILER.section
+timed = PROFILER.timed
@@ -0,0 +1,200 @@
+# replay.py
+# Session codes: a game's seed plus its action trace (GameState.trace), compressed into a short
+# URL-safe token. Replaying one re-runs the real engine headlessly, so a reported session can be
+# reproduced exactly:  python replay.py <code>   or check it at scale:  python replay.py --bench 5000
+
+import base64
+import struct
+import zlib
+from typing import Iterator, Tuple
+
+from game_engine import (
+    DECK_POLICIES,
+    DEFAULT_CASE,
+    OP_ACCUSE,
+    OP_ACCUSE_CHECK,
+    OP_ADD,
+    OP_CANCEL,
+    OP_DISMISS,
+    OP_DRAW,
+    OP_KEEP,
+    OP_PROCEED,
+    OP_REDO,
+    OP_RETRACT,
+    OP_REWIND,
+    OP_START,
+    OP_UNDO,
+    SOURCES,
+    TRACE_OPERANDS,
+    TUTOR_KEYS,
+    Case,
+    DeckExhausted,
+    GameEngine,
+)
+
+TRACE_VERSION = 1
+HEADER = struct.Struct("<BQBI")  # version, seed, reshuffle policy, case signature
+
+# op → how to re-apply it to an engine, given the unpacked operand
+ACTIONS = {
+    OP_START: lambda e: e.start(),
+    OP_DRAW: lambda e, source: e.draw(SOURCES[source]),
+    OP_ADD: lambda e, source, pos: e.add_evidence(e.pools[SOURCES[source]][pos]),
+    OP_UNDO: lambda e: e.undo(),
+    OP_REWIND: lambda e, to_round: e.rewind(to_round),
+    OP_REDO: lambda e: e.redo(),
+    OP_ACCUSE: lambda e, i: e.accuse(e.case.suspects[i]),
+    OP_ACCUSE_CHECK: lambda e, i: e.accuse_guard_with_check(e.case.suspects[i]),
+    OP_PROCEED: lambda e: e.proceed_accuse(),
+    OP_CANCEL: lambda e: e.cancel_accuse(),
+    OP_KEEP: lambda e: e.stand_by_evidence(),
+    OP_RETRACT: lambda e: e.retract_evidence(),
+    OP_DISMISS: lambda e, key: e.dismiss_tutor_message(TUTOR_KEYS[key]),
+}
+
+def encode_trace(engine: GameEngine) -> str:
+    """The session code for `engine`'s game so far."""
+    g = engine.state
+    if g.seed is None:
+        raise ValueError("this game's RNG was passed in from outside, so it has no seed to replay")
+    header = HEADER.pack(TRACE_VERSION, g.seed, DECK_POLICIES.index(engine.reshuffle), g.case.signature)
+    return base64.urlsafe_b64encode(zlib.compress(header + bytes(g.trace), 9)).rstrip(b"=").decode("ascii")
+
+def decode_trace(code: str) -> Tuple[int, str, int, bytes]:
+    """(seed, reshuffle policy, case signature, trace) from a session code."""
+    try:
+        raw = zlib.decompress(base64.urlsafe_b64decode(code.strip() + "=" * (-len(code.strip()) % 4)))
+        version, seed, policy, signature = HEADER.unpack_from(raw)
+    except (ValueError, zlib.error, struct.error) as e:
+        raise ValueError(f"not a session code: {e}") from None
+    if version != TRACE_VERSION:
+        raise ValueError(f"session code version {version} is not supported (expected {TRACE_VERSION})")
+    return seed, DECK_POLICIES[policy], signature, raw[HEADER.size:]
+
+def iter_ops(trace: bytes) -> Iterator[Tuple[int, tuple]]:
+    """(op, operand) for each recorded action, oldest first."""
+    i = 0
+    while i < len(trace):
+        op = trace[i]
+        if op not in TRACE_OPERANDS:
+            raise ValueError(f"unknown trace op {op} at byte {i}")
+        operand = TRACE_OPERANDS[op]
+        yield op, operand.unpack_from(trace, i + 1)
+        i += 1 + operand.size
+
+def replay(code: str, case: Case = DEFAULT_CASE, check_case: bool = True) -> GameEngine:
+    """Re-run a session from its code. The replayed engine records the same trace again."""
+    seed, policy, signature, trace = decode_trace(code)
+    if check_case and signature != case.signature:
+        raise ValueError(f"session code is for a different case than {case.title!r}")
+    engine = GameEngine(case=case, seed=seed, reshuffle=policy)
+    for op, operand in iter_ops(trace):
+        try:
+            ACTIONS[op](engine, *operand)
+        except DeckExhausted:  # the player saw "no cards left" and carried on
+            pass
+    return engine
+
+def describe(engine: GameEngine) -> str:
+    g, case = engine.state, engine.case
+    lines = [f"{case.title}: seed {g.seed}, culprit {case.name(g.guilty)}, {len(list(iter_ops(g.trace)))} actions"]
+    for snap in engine.evidence_log():
+        lines.append(f"  round {snap.round}: {snap.card.source:<14} {snap.card.id:<16} integrity {snap.integrity}")
+    if g.done:
+        verdict = "correct" if g.accused == g.guilty else "wrong"
+        lines.append(f"  accused {case.name(g.accused)} ({verdict}), final score {g.scores['final']:.1f}")
+    else:
+        lines.append("  (not accused yet)")
+    return "\n".join(lines)
+
+# ------------------------------------- benchmark --------------------------------------
+def random_session(case: Case, seed: int, max_rounds: int = 10) -> GameEngine:
+    """A headless player that touches every recorded action (undo, redo, modals, tips)."""
+    import random
+
+    rng = random.Random(seed)
+    engine = GameEngine(case=case, seed=seed)
+    g = engine.state
+    sources = [s for s, pool in case.pools.items() if len(pool)]
+    engine.start()
+    while not g.done:
+        r = rng.random()
+        if g.show_accuse_modal:
+            engine.proceed_accuse() if r < 0.7 else engine.cancel_accuse()
+        elif g.show_ethics_modal:
+            engine.stand_by_evidence() if r < 0.7 else engine.retract_evidence()
+        elif g.tutor_pending and r < 0.5:
+            engine.dismiss_tutor_message(g.tutor_keys(g.tutor_pending)[0])
+        elif g.round >= max_rounds or r < 0.1:
+            engine.accuse_guard_with_check(case.suspects[int(g.probs.argmax())])
+        elif r < 0.15:
+            engine.undo()
+        elif r < 0.2:
+            engine.redo()
+        elif r < 0.22:
+            engine.rewind(rng.randrange(g.cursor + 1))
+        elif r < 0.25:
+            engine.add_evidence(rng.choice(case.pools[rng.choice(sources)]))
+        else:
+            engine.draw(rng.choice(sources))
+    return engine
+
+def same_game(a: GameEngine, b: GameEngine) -> bool:
+    ga, gb = a.state, b.state
+    return (ga.guilty == gb.guilty and ga.accused == gb.accused and ga.scores == gb.scores
+            and ga.trace == gb.trace and ga.length == gb.length and ga.cursor == gb.cursor
+            and ga.timeline[:ga.length].tobytes() == gb.timeline[:gb.length].tobytes())
+
+def check_events(store: str, case: Case) -> Tuple[int, int]:
+    """Replay every final_score event that carries a session code; (checked, mismatched)."""
+    from telemetry import read_events
+
+    checked = bad = 0
+    for e in read_events(store):
+        d = e["data"]
+        if e["type"] != "final_score" or not d.get("trace"):
+            continue
+        g = replay(d["trace"], case).state
+        checked += 1
+        bad += not (g.accused == d["accused"] and g.guilty == d["guilty"] and g.scores == d["scores"])
+    return checked, bad
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Replay session codes headlessly.")
+    parser.add_argument("code", nargs="?", help="a session code from the debrief screen or the final_score event")
+    parser.add_argument("--case", help="case file (JSON, see cases.py); default: the built-in case")
+    parser.add_argument("--bench", type=int, metavar="N", help="play N random sessions, replay and verify them")
+    parser.add_argument("--events", help="replay and verify every session code in a telemetry store")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.case:
+        from cases import load_case
+
+        case = load_case(args.case)
+    else:
+        case = DEFAULT_CASE
+    if args.code:
+        print(describe(replay(args.code, case)))
+    if args.events:
+        checked, bad = check_events(args.events, case)
+        print(f"{checked:,} sessions replayed from {args.events}, {bad:,} mismatched")
+        if bad:
+            raise SystemExit(1)
+    if args.bench:
+        originals = [random_session(case, args.seed * 1_000_003 + i) for i in range(args.bench)]
+        codes = [encode_trace(e) for e in originals]
+        t0 = time.perf_counter()
+        replayed = [replay(c, case) for c in codes]
+        dt = time.perf_counter() - t0
+        mismatched = sum(not same_game(a, b) for a, b in zip(originals, replayed))
+        mean_len = sum(map(len, codes)) / len(codes)
+        print(f"{args.bench:,} sessions replayed in {dt:.2f}s ({args.bench / dt:,.0f} games/s), "
+              f"{mismatched} mismatched; codes average {mean_len:.0f} characters")
+        if mismatched:
+            raise SystemExit(1)
+    if not (args.code or args.events or args.bench):
+        parser.print_help()
@@ -0,0 +1,273 @@
+# sensitivity.py
+# How much do the scoring weights matter? Re-scores a corpus of finished games (simulated with
+# simulate.py, played by tournament.py's bots, or recorded by telemetry.py) under a grid of
+# thousands of (accuracy, integrity, efficiency, caution) weightings at once: finals are
+# (games × 4 components) @ (weights × 4).T, so no game is ever replayed.
+#   python sensitivity.py --step 0.02 --out weights.csv
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from game_engine import ACHIEVEMENTS, ESCAPE_RISK_INCREASE_PER_ROUND, MAX_ESCAPE_RISK, SOURCES
+from simulate import DEFAULT_WEIGHTS, DRAW_MODELS, Policy, simulate
+
+COMPONENTS = ("accuracy", "integrity", "efficiency", "caution")  # compute_final_scores order
+TOP_SHARE = 0.10            # "the leaderboard": the best 10% of games under each weighting
+CHUNK_ELEMENTS = 2**23      # distinct games × weightings scored per matmul (64 MiB)
+
+SIM_STYLES: Dict[str, Policy] = {
+    "snap_judgement": Policy((1, 0, 0), accuse_threshold=0.0, max_rounds=1),
+    "cctv_until_60": Policy((1, 0, 0), accuse_threshold=0.6),
+    "cctv_until_80": Policy((1, 0, 0), accuse_threshold=0.8),
+    "balanced_until_80": Policy((1, 1, 1), accuse_threshold=0.8),
+    "rumor_heavy": Policy((1, 3, 0), accuse_threshold=0.8),
+    "interrogation_heavy": Policy((1, 0, 3), accuse_threshold=0.8),
+    "thorough": Policy((1, 1, 1), accuse_threshold=0.95, max_rounds=12),
+}
+
+@dataclass
+class Corpus:
+    """Finished games reduced to what scoring needs."""
+    components: np.ndarray   # (games × 4) float32, COMPONENTS order
+    style: np.ndarray        # int16 index into `styles`
+    achievements: np.ndarray  # uint8, bit i set: ACHIEVEMENTS[i] earned
+    styles: Sequence[str]
+
+    def __len__(self):
+        return len(self.style)
+
+def achievement_bits(correct: np.ndarray, integrity: np.ndarray, rounds: np.ndarray,
+                     escape_risk_per_round: int = ESCAPE_RISK_INCREASE_PER_ROUND) -> np.ndarray:
+    """Vectorized GameEngine.accuse achievement rules."""
+    escape = np.minimum(MAX_ESCAPE_RISK, rounds * escape_risk_per_round)
+    earned = (correct & (integrity >= 90), correct & (rounds <= 3), correct & (escape >= 80))
+    return sum(hit.astype(np.uint8) << i for i, hit in enumerate(earned)).astype(np.uint8)
+
+# -------------------------------------- corpora ---------------------------------------
+def simulated_corpus(games_per_style: int = 100_000, styles: Optional[Dict[str, Policy]] = None,
+                     seed: int = 0, draw_model: str = "deck") -> Corpus:
+    """Games from simulate.py's batched simulator, one Policy per play style."""
+    styles = styles or SIM_STYLES
+    parts, labels, bits = [], [], []
+    for i, (name, policy) in enumerate(styles.items()):
+        r = simulate(games_per_style, policy, seed=seed * 1_000_003 + i, draw_model=draw_model)
+        parts.append(np.column_stack([r.scores[c] for c in COMPONENTS]))
+        labels.append(np.full(len(r), i, dtype=np.int16))
+        bits.append(achievement_bits(r.scores["accuracy"] > 0, r.integrity, r.rounds))
+    return Corpus(np.vstack(parts).astype(np.float32), np.concatenate(labels), np.concatenate(bits),
+                  tuple(styles))
+
+def tournament_corpus(strategies: Optional[Sequence[str]] = None, games: int = 20_000, seed: int = 0,
+                      case=None) -> Corpus:
+    """Games played through the real engine by tournament.py's bots."""
+    import random
+
+    from game_engine import DEFAULT_CASE, GameEngine
+    from tournament import STRATEGIES
+
+    case = case or DEFAULT_CASE
+    names = tuple(strategies or STRATEGIES)
+    components = np.empty((games * len(names), len(COMPONENTS)), dtype=np.float32)
+    bits = np.empty(len(components), dtype=np.uint8)
+    for i, name in enumerate(names):
+        bot, rng = STRATEGIES[name], random.Random(seed * 1_000_003 + i)
+        for j in range(i * games, (i + 1) * games):
+            engine = GameEngine(rng=rng, case=case)
+            bot.play(engine, rng)
+            components[j] = [engine.state.scores[c] for c in COMPONENTS]
+            bits[j] = engine.state.achievement_flags
+    return Corpus(components, np.repeat(np.arange(len(names), dtype=np.int16), games), bits, names)
+
+def recorded_corpus(store: str) -> Corpus:
+    """Players' finished games from a telemetry store. A game's style is the source it drew
+    most clues from ("none" for an accusation without evidence)."""
+    from telemetry import read_events
+
+    styles = (*(f"mostly_{s.lower()}" for s in SOURCES), "none")
+    rows, labels, bits = [], [], []
+    for e in read_events(store):
+        if e["type"] != "final_score":
+            continue
+        d = e["data"]
+        rows.append([d["scores"][c] for c in COMPONENTS])
+        counts = [d["sources"].count(s) for s in SOURCES]
+        labels.append(int(np.argmax(counts)) if any(counts) else len(SOURCES))
+        bits.append(sum(1 << ACHIEVEMENTS.index(a) for a in d.get("achievements", []) if a in ACHIEVEMENTS))
+    return Corpus(np.asarray(rows, dtype=np.float32).reshape(-1, len(COMPONENTS)),
+                  np.asarray(labels, dtype=np.int16), np.asarray(bits, dtype=np.uint8), styles)
+
+# ----------------------------------- weightings ---------------------------------------
+def weight_grid(step: float = 0.05, minimum: float = 0.0) -> np.ndarray:
+    """Every weighting on a `step` grid that sums to 1 with each weight ≥ `minimum`,
+    as a (weightings × 4) array."""
+    n = round(1 / step)
+    lo = round(minimum / step)
+    a, i, e = np.meshgrid(*[np.arange(lo, n + 1)] * 3, indexing="ij")
+    c = n - a - i - e
+    keep = c >= lo
+    return np.column_stack([a[keep], i[keep], e[keep], c[keep]]).astype(np.float64) / n
+
+@dataclass
+class Sensitivity:
+    weights: np.ndarray        # (W × 4); row 0 is the game's current weighting
+    styles: Sequence[str]
+    style_means: np.ndarray    # (W × styles) mean final score of each play style
+    best_style: np.ndarray     # (W,) index of the style with the highest mean
+    style_tau: np.ndarray      # (W,) Kendall tau of the style ranking vs. row 0
+    top_overlap: np.ndarray    # (W,) Jaccard overlap of the top-share games with row 0's
+    top_achievements: np.ndarray  # (W × achievements) rate among the top-share games
+    top_styles: np.ndarray     # (W × styles) share of the top-share games per style
+    seconds: float = 0.0
+
+    def rows(self) -> List[dict]:
+        out = []
+        for w in range(len(self.weights)):
+            out.append({
+                **{f"w_{c}": round(float(x), 4) for c, x in zip(COMPONENTS, self.weights[w])},
+                "best_style": self.styles[self.best_style[w]],
+                "best_mean": float(self.style_means[w, self.best_style[w]]),
+                "style_tau": float(self.style_tau[w]),
+                "top_overlap": float(self.top_overlap[w]),
+                **{f"top_{a.lower().replace(' ', '_')}_rate": float(r)
+                   for a, r in zip(ACHIEVEMENTS, self.top_achievements[w])},
+                **{f"top_share_{s}": float(r) for s, r in zip(self.styles, self.top_styles[w])},
+            })
+        return out
+
+def _kendall_tau(means: np.ndarray) -> np.ndarray:
+    """Tau between each row's style ordering and row 0's, all rows at once."""
+    n = means.shape[1]
+    if n < 2:
+        return np.ones(len(means))
+    i, j = np.triu_indices(n, 1)
+    order = np.sign(means[:, i] - means[:, j])
+    return (order * order[0]).sum(axis=1) / len(i)
+
+def collapse(corpus: Corpus):
+    """Distinct component rows with their game counts and per-style / per-achievement counts.
+    Components are coarse (accuracy is 0 or 100, efficiency moves in 12.5s), so hundreds of
+    thousands of games come down to a few hundred rows, and results stay exact."""
+    rows, inverse, counts = np.unique(corpus.components, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    by_style = np.zeros((len(rows), len(corpus.styles)))
+    np.add.at(by_style, (inverse, corpus.style), 1)
+    by_achievement = np.zeros((len(rows), len(ACHIEVEMENTS)))
+    for i in range(len(ACHIEVEMENTS)):
+        by_achievement[:, i] = np.bincount(inverse, weights=(corpus.achievements >> i) & 1, minlength=len(rows))
+    return rows.astype(np.float64), counts.astype(np.float64), by_style, by_achievement
+
+def explore(corpus: Corpus, weights: np.ndarray, baseline: Sequence[float] = DEFAULT_WEIGHTS,
+            top_share: float = TOP_SHARE, chunk_elements: int = CHUNK_ELEMENTS) -> Sensitivity:
+    """Score every game under every weighting (plus `baseline`, as row 0)."""
+    t0 = time.perf_counter()
+    W = np.vstack([np.asarray(baseline, dtype=np.float64), weights])
+    X, counts, by_style, by_achievement = collapse(corpus)
+    n = counts.sum()
+
+    # Finals are linear in the weights, so each style's mean final is its mean components @ W.T.
+    style_games = by_style.sum(axis=0)
+    style_components = (by_style.T @ X) / np.maximum(style_games, 1)[:, None]
+    style_means = (style_components @ W.T).T
+    style_means[:, style_games == 0] = -np.inf  # styles with no games never win
+
+    # The top share needs every game's final under every weighting: (rows × chunk) scores,
+    # sorted per weighting to find the cutoff. Ties at the cutoff all count as "top".
+    k = max(1.0, round(n * top_share))
+    top_overlap = np.empty(len(W))
+    top_achievements = np.empty((len(W), len(ACHIEVEMENTS)))
+    top_styles = np.empty((len(W), len(corpus.styles)))
+    base_top = None
+    step = max(1, chunk_elements // len(X))
+    for lo in range(0, len(W), step):
+        finals = X @ W[lo:lo + step].T                        # (rows × chunk)
+        order = np.argsort(-finals, axis=0, kind="stable")
+        reached = np.cumsum(counts[order], axis=0) >= k
+        cutoff = np.take_along_axis(finals, order, axis=0)[reached.argmax(axis=0), np.arange(finals.shape[1])]
+        top = (finals >= cutoff - 1e-9).astype(np.float64)
+        if base_top is None:
+            base_top = top[:, 0] * counts
+        size = top.T @ counts
+        both = top.T @ base_top
+        top_overlap[lo:lo + step] = both / (size + base_top.sum() - both)
+        top_achievements[lo:lo + step] = (top.T @ by_achievement) / size[:, None]
+        top_styles[lo:lo + step] = (top.T @ by_style) / size[:, None]
+
+    return Sensitivity(
+        weights=W, styles=tuple(corpus.styles), style_means=style_means,
+        best_style=style_means.argmax(axis=1), style_tau=_kendall_tau(style_means[:, style_games > 0]),
+        top_overlap=top_overlap, top_achievements=top_achievements, top_styles=top_styles,
+        seconds=time.perf_counter() - t0,
+    )
+
+def format_report(s: Sensitivity, n_games: int) -> str:
+    lines = [f"{n_games:,} games × {len(s.weights):,} weightings scored in {s.seconds:.2f}s"]
+    base = s.weights[0]
+    lines.append("current weights " + ", ".join(f"{c} {w:.2f}" for c, w in zip(COMPONENTS, base))
+                 + f": best style {s.styles[s.best_style[0]]} ({s.style_means[0, s.best_style[0]]:.1f})")
+    lines.append("  top-share achievement rates: " + ", ".join(
+        f"{a} {r:.1%}" for a, r in zip(ACHIEVEMENTS, s.top_achievements[0])))
+
+    lines.append("\nbest style across the grid (share of weightings, mean weights where it wins):")
+    grid = slice(1, None)
+    for i in np.argsort(-np.bincount(s.best_style[grid], minlength=len(s.styles))):
+        wins = s.best_style[grid] == i
+        if not wins.any():
+            continue
+        mean_w = s.weights[grid][wins].mean(axis=0)
+        lines.append(f"  {s.styles[i]:<22}{wins.mean():>7.1%}   "
+                     + "  ".join(f"{c[:3]} {w:.2f}" for c, w in zip(COMPONENTS, mean_w)))
+
+    lines.append("\nhow much each weight moves things (correlation across the grid):")
+    for label, values in (("style ranking tau", s.style_tau), ("top-share overlap", s.top_overlap),
+                          *((f"top {a} rate", s.top_achievements[:, j]) for j, a in enumerate(ACHIEVEMENTS))):
+        v = values[grid]
+        corr = [float(np.corrcoef(s.weights[grid][:, c], v)[0, 1]) if v.std() > 0 else 0.0
+                for c in range(len(COMPONENTS))]
+        lines.append(f"  {label:<26}range {v.min():.2f}–{v.max():.2f}   "
+                     + "  ".join(f"{c[:3]} {r:+.2f}" for c, r in zip(COMPONENTS, corr)))
+
+    far = np.argsort(s.top_overlap[grid])[:3] + 1
+    lines.append("\nweightings that reshuffle the top games most:")
+    for w in far:
+        lines.append("  " + ", ".join(f"{c} {x:.2f}" for c, x in zip(COMPONENTS, s.weights[w]))
+                     + f": overlap {s.top_overlap[w]:.2f}, style tau {s.style_tau[w]:+.2f}, "
+                     f"best {s.styles[s.best_style[w]]}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-score a corpus of games under a grid of scoring weights.")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--events", help="use players' games from a telemetry store")
+    src.add_argument("--tournament", action="store_true", help="use tournament.py's bots (real engine, slower)")
+    parser.add_argument("--games", type=int, default=100_000, help="games per simulated style or bot")
+    parser.add_argument("--draw-model", choices=DRAW_MODELS, default="deck",
+                        help="simulated clue draws: as in the app, or informative (see simulate.py)")
+    parser.add_argument("--step", type=float, default=0.05, help="weight grid spacing")
+    parser.add_argument("--min-weight", type=float, default=0.0, help="smallest weight on the grid")
+    parser.add_argument("--top-share", type=float, default=TOP_SHARE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write one row per weighting here (CSV)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.events:
+        corpus = recorded_corpus(args.events)
+    elif args.tournament:
+        corpus = tournament_corpus(games=args.games, seed=args.seed)
+    else:
+        corpus = simulated_corpus(args.games, seed=args.seed, draw_model=args.draw_model)
+    if not len(corpus):
+        raise SystemExit("no finished games in the corpus")
+    print(f"corpus: {len(corpus):,} games in {len(corpus.styles)} styles ({time.perf_counter() - t0:.1f}s)")
+    result = explore(corpus, weight_grid(args.step, args.min_weight), top_share=args.top_share)
+    print(format_report(result, len(corpus)))
+    if args.out:
+        import pandas as pd
+
+        pd.DataFrame(result.rows()).to_csv(args.out, index=False)
+        print(f"\nwrote {args.out}")
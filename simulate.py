@@ -0,0 +1,224 @@
+# simulate.py
+# Vectorized Monte Carlo for The Lost Painting Heist: whole arrays of games advance in lockstep
+# (culprit, card draws, (games × guards) posteriors, scoring) so weights and pool likelihoods
+# can be tuned from millions of games instead of a per-game Python loop.
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from game_engine import (
+    ACCURACY_WEIGHT,
+    CAUTION_POINTS,
+    CAUTION_WEIGHT,
+    EFFICIENCY_WEIGHT,
+    ESCAPE_RISK_INCREASE_PER_ROUND,
+    INTEGRITY_COST,
+    INTEGRITY_WEIGHT,
+    MAX_ESCAPE_RISK,
+    POOL_BY_SOURCE,
+    START_INTEGRITY,
+    EvidenceCard,
+    pool_tables,
+)
+from inference import LOG_FLOOR, LikelihoodMatrix, LogPosteriorEngine
+
+SOURCES = tuple(POOL_BY_SOURCE)
+DRAW_MODELS = ("deck", "likelihood")
+DEFAULT_WEIGHTS = (ACCURACY_WEIGHT, INTEGRITY_WEIGHT, EFFICIENCY_WEIGHT, CAUTION_WEIGHT)
+
+@dataclass
+class Policy:
+    """A scripted detective: pick sources at random with `source_probs`, accuse the top
+    suspect once it reaches `accuse_threshold` or after `max_rounds` clues."""
+    source_probs: Sequence[float] = (1/3, 1/3, 1/3)  # in SOURCES order
+    accuse_threshold: float = 0.8
+    max_rounds: int = 8
+
+@dataclass
+class SimulationResult:
+    culprit: np.ndarray        # int8 guard index
+    accused: np.ndarray        # int8 guard index
+    rounds: np.ndarray         # int16 evidence cards drawn
+    integrity: np.ndarray      # int16
+    caution_points: np.ndarray  # int16
+    source_counts: np.ndarray  # (games × sources) int16
+    top_posterior: np.ndarray  # float32 max posterior at accusation
+    weights: Sequence[float] = DEFAULT_WEIGHTS
+    scores: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.culprit)
+
+    def summary(self) -> Dict[str, float]:
+        s = self.scores
+        correct = s["accuracy"] > 0
+        escape = np.minimum(MAX_ESCAPE_RISK, self.rounds * ESCAPE_RISK_INCREASE_PER_ROUND)
+        return {
+            "games": len(self),
+            "accuracy_rate": float(correct.mean()),
+            "mean_final": float(s["final"].mean()),
+            "mean_rounds": float(self.rounds.mean()),
+            "mean_integrity": float(self.integrity.mean()),
+            "mean_caution": float(s["caution"].mean()),
+            "high_integrity_rate": float((correct & (self.integrity >= 90)).mean()),
+            "sherlock_rate": float((correct & (self.rounds <= 3)).mean()),
+            "clutch_call_rate": float((correct & (escape >= 80)).mean()),
+        }
+
+def pool_arrays(pools: Optional[Dict[str, List[EvidenceCard]]] = None,
+                suspects: Optional[Sequence[str]] = None):
+    """Stack the pools into one (cards × suspects) likelihood matrix plus per-source offsets.
+    Columns follow `suspects` (default: the pools' own order)."""
+    pools = pools or POOL_BY_SOURCE
+    likelihood = np.vstack([pool_tables(pools[s], suspects).likelihood for s in SOURCES])
+    sizes = np.array([len(pools[s]) for s in SOURCES])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return likelihood, offsets, sizes
+
+def score_components(accuracy, integrity, rounds, caution_points, weights=DEFAULT_WEIGHTS):
+    """Vectorized compute_final_scores over arrays of games."""
+    efficiency = np.maximum(0.0, 100.0 - (rounds - 1) * 12.5)
+    caution = np.floor(100 * caution_points / (2 * np.maximum(1, rounds)))
+    wa, wi, we, wc = weights
+    final = wa * accuracy + wi * integrity + we * efficiency + wc * caution
+    return dict(final=final, accuracy=accuracy, integrity=integrity.astype(np.float64),
+                efficiency=efficiency, caution=caution)
+
+def simulate_batch(n: int, policy: Policy, rng: np.random.Generator,
+                   pools: Optional[Dict[str, List[EvidenceCard]]] = None,
+                   draw_model: str = "deck",
+                   weights: Sequence[float] = DEFAULT_WEIGHTS) -> SimulationResult:
+    """Play `n` games in lockstep.
+
+    draw_model="deck" mirrors the app's default decks: each source is shuffled with its
+    rarity weights, independent of the culprit, dealt without replacement, and reshuffled
+    in full once it runs dry. draw_model="likelihood" also scales each card's odds by
+    P(card | culprit), so clues point at the culprit.
+    """
+    if draw_model not in DRAW_MODELS:
+        raise ValueError(f"unknown draw model {draw_model!r}; expected one of {DRAW_MODELS}")
+    pools = pools or POOL_BY_SOURCE
+    likelihood, offsets, sizes = pool_arrays(pools)
+    rarity = [pool_tables(pools[s]).weights for s in SOURCES]
+    n_guards = likelihood.shape[1]
+    rows = np.arange(n)
+
+    culprit = rng.integers(n_guards, size=n)
+
+    def shuffle(s: int, games: np.ndarray) -> np.ndarray:
+        """A fresh deck order of source `s` for each of `games`: exponential keys divided by
+        the draw weight, sorted (weighted sampling without replacement, as EvidenceDeck does)."""
+        w = rarity[s][None, :]
+        if draw_model == "likelihood":
+            w = w * likelihood[offsets[s]:offsets[s] + sizes[s]][:, culprit[games]].T
+        keys = rng.exponential(size=(len(games), sizes[s])) / w
+        return np.argsort(keys, axis=1).astype(np.int32)
+
+    orders = [shuffle(s, rows) for s in range(len(SOURCES))]
+
+    cum = np.cumsum(np.asarray(policy.source_probs, dtype=np.float64))
+    cum /= cum[-1]
+    cost = np.array([INTEGRITY_COST[s] for s in SOURCES], dtype=np.int16)
+    caution_pts = np.array([CAUTION_POINTS[s] for s in SOURCES], dtype=np.int16)
+
+    beliefs = LogPosteriorEngine(LikelihoodMatrix(likelihood), n_games=n)
+    log_threshold = np.log(max(policy.accuse_threshold, LOG_FLOOR))  # 0: accuse after one clue
+    integrity = np.full(n, START_INTEGRITY, dtype=np.int16)
+    caution_points = np.zeros(n, dtype=np.int16)
+    rounds = np.zeros(n, dtype=np.int16)
+    counts = np.zeros((n, len(SOURCES)), dtype=np.int16)
+    active = np.ones(n, dtype=bool)
+
+    for _ in range(policy.max_rounds):
+        idx = np.flatnonzero(active)
+        if not len(idx):
+            break
+        m = len(idx)
+        src = np.searchsorted(cum, rng.random(m), side="right").clip(max=len(SOURCES) - 1)
+        k = counts[idx, src]
+        local = np.empty(m, dtype=np.int64)
+        for s in range(len(SOURCES)):
+            sel = src == s
+            if not sel.any():
+                continue
+            games, ks = idx[sel], k[sel]
+            pos = ks % sizes[s]
+            dry = games[(pos == 0) & (ks > 0)]  # dealt the whole deck: reshuffle it
+            if len(dry):
+                orders[s][dry] = shuffle(s, dry)
+            local[sel] = orders[s][games, pos]
+        card = offsets[src] + local
+
+        log_post = beliefs.update(card[:, None], games=idx)
+        integrity[idx] = np.maximum(0, integrity[idx] - cost[src])
+        caution_points[idx] += caution_pts[src]
+        rounds[idx] += 1
+        counts[idx, src] += 1
+
+        active[idx[log_post[idx].max(axis=1) >= log_threshold]] = False
+
+    log_post = beliefs.log_post
+    accused = log_post.argmax(axis=1)
+    accuracy = np.where(accused == culprit, 100.0, 0.0)
+    return SimulationResult(
+        culprit=culprit.astype(np.int8),
+        accused=accused.astype(np.int8),
+        rounds=rounds,
+        integrity=integrity,
+        caution_points=caution_points,
+        source_counts=counts,
+        top_posterior=np.exp(log_post[rows, accused]).astype(np.float32),
+        weights=tuple(weights),
+        scores=score_components(accuracy, integrity, rounds, caution_points, weights),
+    )
+
+def simulate(n_games: int, policy: Optional[Policy] = None, seed: Optional[int] = None,
+             batch_size: int = 500_000, **kwargs) -> SimulationResult:
+    """Run `n_games` in batches of `batch_size` and concatenate the results."""
+    policy = policy or Policy()
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, n_games, batch_size):
+        parts.append(simulate_batch(min(batch_size, n_games - start), policy, rng, **kwargs))
+    if len(parts) == 1:
+        return parts[0]
+    return SimulationResult(
+        culprit=np.concatenate([r.culprit for r in parts]),
+        accused=np.concatenate([r.accused for r in parts]),
+        rounds=np.concatenate([r.rounds for r in parts]),
+        integrity=np.concatenate([r.integrity for r in parts]),
+        caution_points=np.concatenate([r.caution_points for r in parts]),
+        source_counts=np.concatenate([r.source_counts for r in parts]),
+        top_posterior=np.concatenate([r.top_posterior for r in parts]),
+        weights=parts[0].weights,
+        scores={k: np.concatenate([r.scores[k] for r in parts]) for k in parts[0].scores},
+    )
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batched Monte Carlo over many headless games.")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--mix", default="1,1,1", help="relative CCTV,RUMOR,INTERROGATION draw odds")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--max-rounds", type=int, default=8)
+    parser.add_argument("--draw-model", choices=DRAW_MODELS, default="deck")
+    parser.add_argument("--batch-size", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    policy = Policy(
+        source_probs=[float(x) for x in args.mix.split(",")],
+        accuse_threshold=args.threshold,
+        max_rounds=args.max_rounds,
+    )
+    t0 = time.perf_counter()
+    result = simulate(args.games, policy, seed=args.seed, batch_size=args.batch_size,
+                      draw_model=args.draw_model)
+    dt = time.perf_counter() - t0
+    for k, v in result.summary().items():
+        print(f"{k:>20}: {v:,.4f}" if isinstance(v, float) else f"{k:>20}: {v:,}")
+    print(f"{'throughput':>20}: {args.games / dt * 60:,.0f} games/min ({dt:.2f}s)")
@@ -0,0 +1,293 @@
+# solver.py
+# Optimal detective: the game as an MDP over (posterior bucket, integrity, caution, round,
+# cards drawn this deck pass), solved by memoized backward induction with the subtrees below
+# the first draws farmed out to a process pool. The result is a compact table of per-state
+# action values that the app loads for the debrief:  python solver.py --out policy.npz
+# Clues are dealt as the app's decks deal them unless --draw-model likelihood says otherwise.
+
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_engine import DEFAULT_CASE, START_INTEGRITY, Case, GameEngine, pool_tables
+from inference import bayes_update
+from simulate import DEFAULT_WEIGHTS, DRAW_MODELS, SOURCES, pool_arrays
+
+DEFAULT_HORIZON = 9         # efficiency is 0 from round 9 on, so later draws rarely pay
+POSTERIOR_BUCKETS = 50      # posteriors are snapped to 1/50 for the state key
+POLICY_VERSION = 1
+REVIEW_TIE_TOL = 1e-3       # action values this close are a tie in PolicyTable.review
+
+def actions(suspects: Sequence[str]) -> Tuple[str, ...]:
+    """Action names: accuse suspects[i] for i < len(suspects), then draw from SOURCES[j]."""
+    return tuple(f"accuse {g}" for g in suspects) + tuple(f"draw {s}" for s in SOURCES)
+
+class State(NamedTuple):
+    posterior: np.ndarray  # exact, float64
+    mask: int              # bit i: card i (SOURCES order) drawn in the current pass of its deck
+    round: int
+    integrity: int
+    caution: int
+
+def state_key(posterior, mask: int, rnd: int, integrity: int, caution: int,
+              buckets: int = POSTERIOR_BUCKETS) -> int:
+    """64-bit digest of a discretized state."""
+    bucket = np.rint(np.asarray(posterior, dtype=np.float64) * buckets).astype(np.uint8)
+    packed = struct.pack("<HhH", rnd, integrity, caution) + bucket.tobytes() + mask.to_bytes(16, "little")
+    return int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), "little")
+
+def _pool_signature(pools) -> str:
+    ids = [c.id for s in SOURCES for c in pools[s]]
+    return hashlib.blake2b("\n".join(ids).encode("utf-8"), digest_size=8).hexdigest()
+
+def policy_signature(case: Case, pools=None, weights: Sequence[float] = DEFAULT_WEIGHTS) -> dict:
+    """Everything a policy table's values depend on besides the solver's own settings."""
+    return {"suspects": list(case.suspects), "priors": case.priors.round(6).tolist(),
+            "integrity_cost": {s: case.integrity_cost[s] for s in SOURCES},
+            "caution_points": {s: case.caution_points[s] for s in SOURCES},
+            "weights": list(weights), "pools": _pool_signature(pools or case.pools)}
+
+class PolicySolver:
+    """Expected final score of every action from every reachable state.
+
+    draw_model="deck" plays the game as the app deals it: each draw is a rarity-weighted pick
+    from the cards left in the deck, whoever the culprit is, so clues move the posterior but
+    not the odds of a correct accusation (those stay at the priors). draw_model="likelihood"
+    instead draws in proportion to rarity weight × P(card | culprit), so clues are evidence.
+    """
+
+    def __init__(self, case: Optional[Case] = None, horizon: int = DEFAULT_HORIZON,
+                 buckets: int = POSTERIOR_BUCKETS, weights: Sequence[float] = DEFAULT_WEIGHTS,
+                 draw_model: str = "deck"):
+        if draw_model not in DRAW_MODELS:
+            raise ValueError(f"unknown draw model {draw_model!r}; expected one of {DRAW_MODELS}")
+        self.case = case or DEFAULT_CASE
+        self.pools = self.case.pools
+        self.likelihood, self.offsets, self.sizes = pool_arrays(self.pools, self.case.suspects)
+        if len(self.likelihood) > 128:
+            raise ValueError("the exact solver is for small case files (≤ 128 cards)")
+        self.rarity = np.concatenate([pool_tables(self.pools[s]).weights for s in SOURCES])
+        self.integrity_cost = [self.case.integrity_cost[s] for s in SOURCES]
+        self.caution_points = [self.case.caution_points[s] for s in SOURCES]
+        self.actions = actions(self.case.suspects)
+        self.horizon = horizon
+        self.buckets = buckets
+        self.weights = tuple(weights)
+        self.draw_model = draw_model
+        self.source_mask = [((1 << int(n)) - 1) << int(o) for o, n in zip(self.offsets, self.sizes)]
+        self.memo: Dict[int, np.ndarray] = {}
+
+    def opening(self) -> State:
+        return State(self.case.priors.copy(), 0, 0, START_INTEGRITY, 0)
+
+    def key(self, st: State) -> int:
+        return state_key(st.posterior, st.mask, st.round, st.integrity, st.caution, self.buckets)
+
+    def accuse_values(self, st: State) -> np.ndarray:
+        wa, wi, we, wc = self.weights
+        efficiency = max(0.0, 100.0 - (st.round - 1) * 12.5)
+        caution = int(100 * st.caution / (2 * max(1, st.round)))
+        p_guilty = st.posterior if self.draw_model == "likelihood" else self.case.priors
+        return wa * 100.0 * p_guilty + (wi * st.integrity + we * efficiency + wc * caution)
+
+    def outcomes(self, st: State, s: int) -> List[Tuple[float, State]]:
+        """(probability, next state) for each card the next draw from source `s` can give."""
+        src_bits = self.source_mask[s]
+        mask = st.mask
+        if mask & src_bits == src_bits:
+            mask &= ~src_bits  # deck ran dry: it reshuffles the full pool
+        rows = [self.offsets[s] + i for i in range(self.sizes[s]) if not mask >> (self.offsets[s] + i) & 1]
+        lik = self.likelihood[rows]
+        if self.draw_model == "likelihood":
+            draw = self.rarity[rows, None] * lik
+            p_card = (draw / draw.sum(axis=0)) @ st.posterior
+        else:
+            p_card = self.rarity[rows] / self.rarity[rows].sum()
+        post = bayes_update(st.posterior, lik)
+        integrity = max(0, st.integrity - self.integrity_cost[s])
+        caution = st.caution + self.caution_points[s]
+        return [(float(p), State(post[i], mask | 1 << int(r), st.round + 1, integrity, caution))
+                for i, (p, r) in enumerate(zip(p_card, rows))]
+
+    def q_values(self, st: State) -> np.ndarray:
+        """Expected final score of each action in ACTIONS (-inf where not allowed)."""
+        key = self.key(st)
+        q = self.memo.get(key)
+        if q is not None:
+            return q
+        q = np.full(len(self.actions), -np.inf)
+        n = len(self.case)
+        q[:n] = self.accuse_values(st)
+        if st.round < self.horizon:
+            for s in range(len(SOURCES)):
+                q[n + s] = sum(p * self.q_values(nxt).max() for p, nxt in self.outcomes(st, s))
+        self.memo[key] = q
+        return q
+
+    def frontier(self, depth: int) -> List[State]:
+        """Distinct states `depth` draws below the opening (the units of parallel work)."""
+        level = {self.key(self.opening()): self.opening()}
+        for _ in range(depth):
+            nxt = {}
+            for st in level.values():
+                if st.round < self.horizon:
+                    for s in range(len(SOURCES)):
+                        for _, child in self.outcomes(st, s):
+                            nxt.setdefault(self.key(child), child)
+            level = nxt
+        return list(level.values())
+
+def _solve_subtree(args) -> Dict[int, np.ndarray]:
+    case, horizon, buckets, weights, draw_model, st = args
+    solver = PolicySolver(case, horizon, buckets, weights, draw_model)
+    solver.q_values(st)
+    return solver.memo
+
+def solve(case: Optional[Case] = None, horizon: int = DEFAULT_HORIZON, buckets: int = POSTERIOR_BUCKETS,
+          weights: Sequence[float] = DEFAULT_WEIGHTS, draw_model: str = "deck",
+          workers: Optional[int] = None, split_depth: int = 2) -> PolicySolver:
+    """Solve from the opening. Subtrees below `split_depth` draws run on a process pool;
+    their memos are merged so the top levels are just lookups."""
+    solver = PolicySolver(case, horizon, buckets, weights, draw_model)
+    jobs = [(solver.case, horizon, buckets, solver.weights, draw_model, st)
+            for st in solver.frontier(split_depth)]
+    if workers == 1:
+        for memo in map(_solve_subtree, jobs):
+            solver.memo.update(memo)
+    else:
+        chunk = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for memo in pool.map(_solve_subtree, jobs, chunksize=chunk):
+                solver.memo.update(memo)
+    solver.q_values(solver.opening())
+    return solver
+
+# ------------------------------------ policy table ------------------------------------
+def write_policy(path: str, solver: PolicySolver):
+    keys = np.fromiter(solver.memo.keys(), dtype=np.uint64, count=len(solver.memo))
+    q = np.array(list(solver.memo.values()), dtype=np.float16).reshape(len(keys), len(solver.actions))
+    order = np.argsort(keys)
+    meta = {"version": POLICY_VERSION, "horizon": solver.horizon, "buckets": solver.buckets,
+            "draw_model": solver.draw_model, "sources": list(SOURCES), "actions": list(solver.actions),
+            **policy_signature(solver.case, solver.pools, solver.weights),
+            "opening_value": float(solver.q_values(solver.opening()).max())}
+    with open(path, "wb") as f:
+        np.savez_compressed(f, keys=keys[order], q=q[order], meta=np.array(json.dumps(meta)))
+
+class Decision(NamedTuple):
+    round: int
+    taken: str
+    best: str
+    taken_value: float
+    best_value: float
+
+class PolicyTable:
+    """Loaded policy: O(log n) lookups of action values by state."""
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.keys = data["keys"]
+            self.q = data["q"].astype(np.float32)
+            self.meta = json.loads(str(data["meta"]))
+        if self.meta["version"] != POLICY_VERSION:
+            raise ValueError(f"policy version {self.meta['version']} is not supported")
+        self.buckets = self.meta["buckets"]
+        self.actions = tuple(self.meta["actions"])
+        self.suspects = tuple(self.meta["suspects"])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def matches(self, case: Case, pools=None, weights: Sequence[float] = DEFAULT_WEIGHTS) -> bool:
+        """Whether the table was solved for this case, these pools and these score weights."""
+        pools = pools or case.pools
+        if sum(len(p) for p in pools.values()) > 128 or self.suspects != case.suspects:
+            return False  # never solved for catalogs this big; don't hash them either
+        return all(self.meta.get(k) == v for k, v in policy_signature(case, pools, weights).items())
+
+    @property
+    def draw_model(self) -> str:
+        return self.meta.get("draw_model", "likelihood")
+
+    @property
+    def opening_value(self) -> float:
+        return self.meta["opening_value"]
+
+    def lookup(self, posterior, mask: int, rnd: int, integrity: int, caution: int) -> Optional[np.ndarray]:
+        k = np.uint64(state_key(posterior, mask, rnd, integrity, caution, self.buckets))
+        i = int(np.searchsorted(self.keys, k))
+        if i == len(self.keys) or self.keys[i] != k:
+            return None
+        return self.q[i]
+
+    def _best(self, q: np.ndarray, posterior: np.ndarray) -> int:
+        """Best action; among accusations that tie (every one does under the deck model, whose
+        accuse values only see the priors), the suspect the posterior favours."""
+        best = int(q.argmax())
+        n = len(self.suspects)
+        if best < n:
+            tied = np.flatnonzero(q[:n] >= q[best] - REVIEW_TIE_TOL)
+            best = int(tied[np.argmax(posterior[tied])])
+        return best
+
+    def review(self, engine: GameEngine) -> List[Decision]:
+        """Replay a finished (or running) game and compare each choice with the table."""
+        g = engine.state
+        offsets = np.concatenate([[0], np.cumsum([len(engine.pools[s]) for s in SOURCES])[:-1]])
+        source_mask = [((1 << len(engine.pools[s])) - 1) << int(o) for s, o in zip(SOURCES, offsets)]
+        tl = g.timeline
+        decisions, mask = [], 0
+        for row in range(g.cursor + 1):
+            if row:
+                s, card = int(tl["source"][row]), int(tl["card"][row])
+                if mask & source_mask[s] == source_mask[s]:
+                    mask &= ~source_mask[s]
+                mask |= 1 << int(offsets[s] + card)
+            if row < g.cursor:
+                taken = len(self.suspects) + int(tl["source"][row + 1])
+            elif g.accused is not None:
+                taken = self.suspects.index(g.accused)
+            else:
+                break
+            q = self.lookup(tl["post"][row], mask, row,
+                            int(tl["integrity"][row]), int(tl["caution"][row]))
+            if q is None:
+                continue
+            best = self._best(q, tl["post"][row])
+            decisions.append(Decision(row, self.actions[taken], self.actions[best], float(q[taken]), float(q[best])))
+        return decisions
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Solve the game for the score-maximizing policy.")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="max evidence draws")
+    parser.add_argument("--buckets", type=int, default=POSTERIOR_BUCKETS)
+    parser.add_argument("--case", help="case file (JSON, see cases.py); default: the built-in case")
+    parser.add_argument("--draw-model", choices=DRAW_MODELS, default="deck",
+                        help="clue draws: as the app deals them, or in proportion to P(card | culprit)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--split-depth", type=int, default=2)
+    parser.add_argument("--out", default="policy.npz")
+    args = parser.parse_args()
+
+    case = None
+    if args.case:
+        from cases import load_case
+
+        case = load_case(args.case)
+    t0 = time.perf_counter()
+    solver = solve(case, horizon=args.horizon, buckets=args.buckets, draw_model=args.draw_model,
+                   workers=args.workers, split_depth=args.split_depth)
+    dt = time.perf_counter() - t0
+    write_policy(args.out, solver)
+    q0 = solver.q_values(solver.opening())
+    print(f"{len(solver.memo):,} states in {dt:.1f}s; best opening move {solver.actions[int(q0.argmax())]} "
+          f"(expected final score {q0.max():.1f})")
+    print(f"wrote {args.out} ({os.path.getsize(args.out) / 1024:.0f} KiB)")
@@ -0,0 +1,84 @@
+# startup_bench.py
+# Cold-start budget for the app: import time of each top-level dependency and time to first
+# paint (the first script run a new session sees), each measured in a fresh interpreter.
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bayes_game.py")
+HEAVY_MODULES = ("numpy", "pandas", "altair")
+IMPORTS = ("streamlit", "game_engine", "numpy", "pandas", "altair", "charts")
+
+# Run in a child interpreter so nothing is already in sys.modules.
+_IMPORT_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({"seconds": time.perf_counter() - t0}))
+"""
+
+_PAINT_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+t2 = time.perf_counter()
+loaded_first = [m for m in sys.argv[2:] if m in sys.modules]
+at.button(key="start_game_button").click().run()  # step 1: first charts
+t3 = time.perf_counter()
+print(json.dumps({
+    "streamlit_import": t1 - t0,
+    "first_paint": t2 - t1,
+    "first_chart": t3 - t2,
+    "loaded_at_first_paint": loaded_first,
+    "errors": [e.message for e in at.exception],
+}))
+"""
+
+def _child(code: str, *argv: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", code, *argv], capture_output=True, text=True,
+                         check=True, cwd=os.path.dirname(APP_PATH))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def import_times(modules=IMPORTS, repeats: int = 3) -> Dict[str, float]:
+    """Median cold import time per module, in seconds."""
+    return {m: statistics.median(_child(_IMPORT_CHILD, m)["seconds"] for _ in range(repeats))
+            for m in modules}
+
+def first_paint(app_path: str = APP_PATH, repeats: int = 3) -> dict:
+    """Median cold first-paint and first-chart times, plus which heavy modules the first
+    paint pulled in (ideally none but numpy, which backs the game state)."""
+    runs: List[dict] = [_child(_PAINT_CHILD, app_path, *HEAVY_MODULES) for _ in range(repeats)]
+    errors = [e for r in runs for e in r["errors"]]
+    if errors:
+        raise RuntimeError(f"app raised during the benchmark: {errors[0]}")
+    return {
+        "streamlit_import": statistics.median(r["streamlit_import"] for r in runs),
+        "first_paint": statistics.median(r["first_paint"] for r in runs),
+        "first_chart": statistics.median(r["first_chart"] for r in runs),
+        "loaded_at_first_paint": runs[0]["loaded_at_first_paint"],
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure cold import time and time to first paint.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of a table")
+    args = parser.parse_args()
+
+    report = {"imports": import_times(repeats=args.repeats), **first_paint(args.app, args.repeats)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for m, t in report["imports"].items():
+            print(f"import {m:<22} {t * 1000:8.1f} ms")
+        print(f"{'first paint (intro screen)':<29} {report['first_paint'] * 1000:8.1f} ms")
+        print(f"{'first chart (step 1)':<29} {report['first_chart'] * 1000:8.1f} ms")
+        print(f"{'heavy modules at first paint':<29} {', '.join(report['loaded_at_first_paint']) or 'none'}")
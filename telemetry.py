@@ -0,0 +1,224 @@
+# telemetry.py
+# Game-event telemetry. Reruns call emit(), which only enqueues; a background thread drains the
+# bounded queue in batches into an append-only store: SQLite in WAL mode (path ends in .db or
+# .sqlite) or size-rotated JSONL files in a directory. A full queue drops events and counts them
+# rather than ever blocking a rerun. The writer is a daemon thread and atexit never runs in forked
+# workers, so the app flushes at the end of each game and scripts call flush_all() before exiting.
+
+import atexit
+import heapq
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Dict, Iterator, List, Optional, Union
+
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 1.0            # seconds a partial batch may wait
+JSONL_MAX_BYTES = 16 * 2**20    # rotate JSONL files at 16 MiB
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+EVENT_TYPES = (
+    "add_evidence",     # source, card, round, integrity, posterior, ethics_modal
+    "ethics_undo",      # card, round
+    "ethics_keep",      # card, round
+    "accuse_warning",   # guard, top_posterior, integrity (the confirmation modal opened)
+    "accuse_override",  # guard (accused anyway)
+    "accuse_cancel",    # guard (went back for more evidence)
+    "tutor_show",       # key, round
+    "tutor_dismiss",    # key, round
+    "final_score",      # accused, guilty, correct, rounds, integrity, sources, accused_posterior,
+                        # top_posterior, achievements, scores, trace
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_type_ts ON events (type, ts);
+CREATE INDEX IF NOT EXISTS events_session ON events (session);
+"""
+
+class _SqliteWriter:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def write(self, batch: List[dict]):
+        with self.conn:  # one transaction per batch
+            self.conn.executemany(
+                "INSERT INTO events (ts, session, type, data) VALUES (?, ?, ?, ?)",
+                [(e["ts"], e["session"], e["type"], json.dumps(e["data"], separators=(",", ":")))
+                 for e in batch],
+            )
+
+    def close(self):
+        self.conn.close()
+
+class _JsonlWriter:
+    def __init__(self, directory: str, max_bytes: int = JSONL_MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.f = None
+
+    def _open(self):
+        name = time.strftime("events-%Y%m%d-%H%M%S", time.gmtime())
+        path = os.path.join(self.directory, f"{name}-{os.getpid()}.jsonl")
+        n = 1
+        while os.path.exists(path):  # several rotations within one second
+            path = os.path.join(self.directory, f"{name}-{os.getpid()}-{n}.jsonl")
+            n += 1
+        self.f = open(path, "a", encoding="utf-8")
+
+    def write(self, batch: List[dict]):
+        if self.f is None or self.f.tell() >= self.max_bytes:
+            if self.f is not None:
+                self.f.close()
+            self._open()
+        self.f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch))
+        self.f.flush()
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+
+_SINKS: "weakref.WeakSet[TelemetrySink]" = weakref.WeakSet()
+
+class TelemetrySink:
+    """Non-blocking event sink with one writer thread per process."""
+
+    def __init__(self, path: str, queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.sqlite = path.endswith(SQLITE_SUFFIXES)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # events, a flush request (set once what was queued before it is written) or None (stop)
+        self.queue: "queue.Queue[Union[dict, threading.Event, None]]" = queue.Queue(maxsize=queue_size)
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self._lock = threading.Lock()  # emit() runs on every session's script thread
+        self._thread = threading.Thread(target=self._drain, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        _SINKS.add(self)
+
+    def emit(self, kind: str, session: str, **data):
+        """Enqueue one event. Never blocks: when the writer falls behind, the event is dropped."""
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"unknown telemetry event {kind!r}")
+        try:
+            self.queue.put_nowait({"ts": time.time(), "session": session, "type": kind, "data": data})
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+        else:
+            with self._lock:
+                self.emitted += 1
+
+    def _drain(self):
+        writer = _SqliteWriter(self.path) if self.sqlite else _JsonlWriter(self.path)
+        batch: List[dict] = []
+        done = False
+        while not done:
+            deadline = time.monotonic() + self.flush_interval
+            flushed = None
+            while len(batch) < self.batch_size:
+                try:
+                    event = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if event is None:
+                    done = True
+                    break
+                if isinstance(event, threading.Event):
+                    flushed = event
+                    break
+                batch.append(event)
+            if batch:
+                try:
+                    writer.write(batch)
+                    self.written += len(batch)
+                except Exception:  # a bad disk must not take the app down; count and move on
+                    self.errors += 1
+                batch = []
+            if flushed is not None:
+                flushed.set()
+        writer.close()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Have the writer store everything queued so far now, not at the next interval. Waits
+        up to `timeout` seconds for it (0: don't wait); True once written."""
+        if not self._thread.is_alive():
+            return self.queue.empty()
+        done = threading.Event()
+        try:
+            self.queue.put(done, block=bool(timeout), timeout=timeout or None)
+        except queue.Full:
+            return False
+        return bool(timeout) and done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Flush what is queued and stop the writer."""
+        if self._thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            emitted, dropped = self.emitted, self.dropped
+        return dict(emitted=emitted, written=self.written, dropped=dropped,
+                    errors=self.errors, queued=self.queue.qsize())
+
+def flush_all(timeout: float = 5.0) -> bool:
+    """Flush every sink in this process, e.g. before a worker process exits."""
+    return all([sink.flush(timeout) for sink in list(_SINKS)])
+
+def _rotation_key(name: str) -> tuple:
+    """events-<date>-<time>-<pid>[-<n>].jsonl → (date, time, pid, n); n is 0 for the first file."""
+    parts = name[:-len(".jsonl")].split("-")
+    try:
+        return (parts[1], parts[2], int(parts[3]), int(parts[4]) if len(parts) > 4 else 0)
+    except (IndexError, ValueError):  # not written by _JsonlWriter: after ours, by name
+        return ("~", name, 0, 0)
+
+def event_files(path: str) -> List[str]:
+    """The JSONL files of a log directory, oldest first (by start time, then rotation)."""
+    names = [n for n in os.listdir(path) if n.endswith(".jsonl")]
+    return [os.path.join(path, n) for n in sorted(names, key=_rotation_key)]
+
+def _read_jsonl(name: str) -> Iterator[dict]:
+    with open(name, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_events(path: str) -> Iterator[dict]:
+    """Every stored event, oldest first, from a SQLite store, a log directory or one JSONL file."""
+    if path.endswith(SQLITE_SUFFIXES):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for ts, session, kind, data in conn.execute("SELECT ts, session, type, data FROM events ORDER BY id"):
+                yield {"ts": ts, "session": session, "type": kind, "data": json.loads(data)}
+        finally:
+            conn.close()
+    elif path.endswith(".jsonl"):
+        yield from _read_jsonl(path)
+    else:  # processes write their own files side by side: merge them on the event time
+        yield from heapq.merge(*(_read_jsonl(name) for name in event_files(path)), key=lambda e: e["ts"])
@@ -0,0 +1,63 @@
+# test_deck.py
+# Undo, redo, rewind and added cards keep each source's deck in step with the timeline.
+
+import random
+
+import pytest
+
+from game_engine import DECK_EXHAUST, DeckExhausted, GameEngine
+
+def engine(policy: str = DECK_EXHAUST) -> GameEngine:
+    engine = GameEngine(rng=random.Random(0), reshuffle=policy)
+    engine.start()
+    return engine
+
+def drawn(engine: GameEngine, source: str) -> list:
+    deck = engine.state.decks[source]
+    return sorted(deck.order[:deck.pos].tolist())
+
+def test_undo_puts_the_card_back_and_redo_takes_it():
+    e = engine()
+    card = e.draw("CCTV")
+    pos = e.position(card)
+    assert drawn(e, "CCTV") == [pos]
+    e.undo()
+    assert drawn(e, "CCTV") == [] and e.state.decks["CCTV"].peek() == pos
+    e.redo()
+    assert drawn(e, "CCTV") == [pos]
+    assert e.last_card == card
+
+def test_undone_card_is_dealt_next():
+    e = engine()
+    card = e.draw("RUMOR")
+    e.undo()
+    assert e.draw("RUMOR") == card
+
+def test_rewind_returns_every_later_card():
+    e = engine()
+    for source in ("CCTV", "RUMOR", "CCTV", "INTERROGATION"):
+        e.draw(source)
+    e.rewind(1)
+    assert len(drawn(e, "CCTV")) == 1
+    assert drawn(e, "RUMOR") == drawn(e, "INTERROGATION") == []
+    e.redo()
+    assert len(drawn(e, "RUMOR")) == 1
+
+def test_added_card_is_not_dealt_again():
+    e = engine()
+    pool = e.pools["CCTV"]
+    e.add_evidence(pool[0])
+    dealt = []
+    with pytest.raises(DeckExhausted):
+        while True:
+            dealt.append(e.draw("CCTV"))
+    assert pool[0] not in dealt
+    assert len(dealt) == len(pool) - 1
+
+def test_undoing_an_added_card_returns_it():
+    e = engine()
+    card = e.pools["RUMOR"][2]
+    e.add_evidence(card)
+    e.undo()
+    assert drawn(e, "RUMOR") == []
+    assert e.state.decks["RUMOR"].remaining == len(e.pools["RUMOR"])
@@ -0,0 +1,81 @@
+# test_leaderboard.py
+# Ranks and top-K lists, from the in-memory caches and after another process writes.
+
+import pytest
+
+from game_engine import ACHIEVEMENTS
+from leaderboard import ConnectionPool, Leaderboard
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "leaderboard.db")
+
+@pytest.fixture
+def board(db):
+    pool = ConnectionPool(db)
+    yield Leaderboard(pool, board=1, cache_k=5)
+    pool.close()
+
+def test_rank_counts_strictly_better_runs(board):
+    for player, final in [("a", 80), ("b", 60), ("c", 60), ("d", 40)]:
+        board.add(player, final)
+    assert board.rank(90) == 1
+    assert board.rank(80) == 1
+    assert board.rank(60) == 2
+    assert board.rank(50) == 4
+    assert board.size() == 4
+
+def test_rank_and_top_by_class(board):
+    board.add("a", 90, class_id="x")
+    board.add("b", 70, class_id="y")
+    board.add("c", 50, class_id="y")
+    assert board.rank(60, class_id="y") == 2
+    assert board.size("y") == 2
+    assert [r.player for r in board.top(class_id="y")] == ["b", "c"]
+
+def test_top_orders_by_score_then_age(board):
+    for i, final in enumerate([10, 55.5, 30, 55.5, 99]):
+        board.add(f"p{i}", final)
+    assert [r.player for r in board.top(3)] == ["p4", "p1", "p3"]
+
+def test_top_deeper_than_the_cache(board):
+    for i in range(12):
+        board.add(f"p{i}", i)
+    board.top()  # fill the heap (cache_k=5)
+    assert [r.final for r in board.top(8)] == [11, 10, 9, 8, 7, 6, 5, 4]
+
+def test_top_by_achievement(board):
+    sherlock = 1 << ACHIEVEMENTS.index("Sherlock")
+    board.add("a", 90)
+    board.add("b", 60, achievements=sherlock)
+    board.add("c", 70, achievements=sherlock | 1)
+    assert [r.player for r in board.top(achievement="Sherlock")] == ["c", "b"]
+
+def test_cached_board_updates_in_place(board):
+    board.add("a", 50)
+    assert board.rank(40) == 2 and [r.player for r in board.top()] == ["a"]
+    board.add("b", 70)
+    assert board.rank(40) == 3
+    assert [r.player for r in board.top()] == ["b", "a"]
+
+def test_stale_cache_reloads_after_another_process_writes(db):
+    pool_a, pool_b = ConnectionPool(db), ConnectionPool(db)
+    a, b = Leaderboard(pool_a, board=1), Leaderboard(pool_b, board=1)
+    a.add("a", 50)
+    assert [r.player for r in a.top()] == ["a"] and a.rank(40) == 2  # caches filled
+    b.add("b", 80)
+    b.add("c", 45)
+    assert [r.player for r in a.top()] == ["b", "a", "c"]
+    assert a.rank(40) == 4 and a.size() == 3
+    a.add("d", 90)  # a's caches were reloaded, so this write updates them in place again
+    assert [r.player for r in a.top(2)] == ["d", "b"]
+    assert b.rank(85) == 2
+    pool_a.close()
+    pool_b.close()
+
+def test_boards_are_separate(db):
+    pool = ConnectionPool(db)
+    one, two = Leaderboard(pool, board=1), Leaderboard(pool, board=2)
+    one.add("a", 50)
+    assert two.top() == [] and two.rank(10) == 1
+    pool.close()
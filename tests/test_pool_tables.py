@@ -0,0 +1,51 @@
+# test_pool_tables.py
+# Pool tables follow the case's suspect order, whatever order the pool's cards list them in.
+
+import numpy as np
+import pytest
+
+from catalog import EvidenceCatalog, builtin_cards, write_catalog
+from game_engine import DEFAULT_CASE, GUARDS, POOL_BY_SOURCE, Case, GameEngine, pool_tables
+
+REVERSED = tuple(reversed(GUARDS))
+
+def test_default_order_is_the_pools_own():
+    pool = POOL_BY_SOURCE["CCTV"]
+    assert pool_tables(pool) is pool_tables(pool, GUARDS)
+    assert pool_tables(pool).likelihood[0].tolist() == [pool[0].likelihood[g] for g in GUARDS]
+
+def test_other_order_gets_its_own_columns():
+    pool = POOL_BY_SOURCE["RUMOR"]
+    own, rev = pool_tables(pool), pool_tables(pool, REVERSED)
+    assert rev is not own
+    assert np.array_equal(rev.likelihood, own.likelihood[:, ::-1])
+    assert np.array_equal(rev.weights, own.weights)
+    assert pool_tables(pool, REVERSED) is rev  # cached per order
+
+def test_reordered_case_plays_the_same_game():
+    reordered = Case(DEFAULT_CASE.title, REVERSED, DEFAULT_CASE.pools)
+    a = GameEngine(seed=11)
+    b = GameEngine(seed=11, case=reordered)
+    a.start()
+    b.start()
+    for source in ("CCTV", "RUMOR", "INTERROGATION", "CCTV"):
+        a.add_evidence(a.pools[source][1])
+        b.add_evidence(b.pools[source][1])
+        assert np.allclose(b.state.probs, a.state.probs[::-1])
+        assert b.state.posteriors == pytest.approx(a.state.posteriors)
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog"))
+    write_catalog(path, builtin_cards())
+    return EvidenceCatalog(path)
+
+def test_catalog_pool_in_another_order(catalog):
+    pool = catalog.pools()["INTERROGATION"]
+    own = pool_tables(pool)
+    assert np.array_equal(pool_tables(pool, REVERSED).likelihood, own.likelihood[:, ::-1])
+    assert np.array_equal(pool_tables(pool, ("C", "A")).likelihood, own.likelihood[:, [2, 0]])
+
+def test_catalog_pool_rejects_unknown_suspects(catalog):
+    with pytest.raises(ValueError):
+        pool_tables(catalog.pools()["CCTV"], ("A", "B", "Z"))
@@ -0,0 +1,38 @@
+# test_replay.py
+# Session codes replay to the exact same game.
+
+import pytest
+
+from game_engine import DEFAULT_CASE, GameEngine
+from replay import encode_trace, random_session, replay, same_game
+
+@pytest.mark.parametrize("seed", range(50))
+def test_replay_reproduces_random_session(seed):
+    engine = random_session(DEFAULT_CASE, seed)
+    again = replay(encode_trace(engine))
+    assert same_game(engine, again)
+    assert again.state.scores == engine.state.scores
+
+def test_replay_is_deterministic():
+    code = encode_trace(random_session(DEFAULT_CASE, 7))
+    assert same_game(replay(code), replay(code))
+    assert encode_trace(replay(code)) == code
+
+def test_replay_follows_added_cards():
+    engine = GameEngine(seed=3)
+    engine.start()
+    rumor = engine.pools["RUMOR"]
+    engine.add_evidence(rumor[1])
+    engine.draw("RUMOR")
+    engine.undo()
+    engine.redo()
+    engine.draw("CCTV")
+    again = replay(encode_trace(engine))
+    assert same_game(engine, again)
+    assert again.state.decks["RUMOR"].remaining == engine.state.decks["RUMOR"].remaining
+
+def test_seedless_engine_has_no_code():
+    import random
+
+    with pytest.raises(ValueError):
+        encode_trace(GameEngine(rng=random.Random(0)))
@@ -0,0 +1,279 @@
+# tournament.py
+# Bot tournament: scripted detectives play the real game rules (GameEngine.draw → pick_evidence,
+# accuse → compute_final_scores) in batches across a process pool. Every batch has its own
+# seeded RNG, so results don't depend on scheduling, and the leaderboard (means with 95%
+# confidence intervals) streams in as batches finish. Rule tweaks such as integrity costs or
+# escape risk go through the case, e.g.:  python tournament.py --integrity-cost RUMOR=10
+
+import abc
+import math
+import os
+import random
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_engine import ACHIEVEMENTS, DEFAULT_CASE, LOW_CONFIDENCE_THRESHOLD, Case, GameEngine
+
+DEFAULT_BATCH = 1000   # games per task
+Z95 = 1.959964
+
+# ------------------------------------- strategies -------------------------------------
+@dataclass
+class Strategy(abc.ABC):
+    """Draw clues until the top suspect reaches `accuse_threshold` (or `max_rounds` clues),
+    then accuse them. Subclasses choose the source of each clue."""
+    name: str
+    accuse_threshold: float = 0.8
+    max_rounds: int = 8
+
+    @abc.abstractmethod
+    def next_source(self, engine: GameEngine, rng: random.Random) -> Optional[str]:
+        """The source to draw from next, or None to accuse now."""
+
+    def play(self, engine: GameEngine, rng: random.Random):
+        g = engine.state
+        while g.round < self.max_rounds and float(g.probs.max()) < self.accuse_threshold:
+            source = self.next_source(engine, rng)
+            if source is None:
+                break
+            engine.draw(source)
+        engine.accuse(g.case.suspects[int(g.probs.argmax())])
+
+def _sources(engine: GameEngine) -> List[str]:
+    return [s for s, pool in engine.pools.items() if len(pool)]
+
+@dataclass
+class FixedSource(Strategy):
+    """Always the same source, e.g. "CCTV until 80%"."""
+    source: str = "CCTV"
+
+    def next_source(self, engine, rng):
+        return self.source
+
+@dataclass
+class SourcesFirst(Strategy):
+    """`opening` first (e.g. two interrogations), then `then` for the rest."""
+    opening: Tuple[str, ...] = ("INTERROGATION", "INTERROGATION")
+    then: str = "CCTV"
+
+    def next_source(self, engine, rng):
+        r = engine.state.round
+        return self.opening[r] if r < len(self.opening) else self.then
+
+@dataclass
+class GreedyMaxLikelihood(Strategy):
+    """The source whose next clue gives the highest expected top-suspect posterior, from
+    the engine's what-if table; ties go to the cheaper source."""
+
+    def next_source(self, engine, rng):
+        best, best_value = None, -1.0
+        for source in sorted(_sources(engine), key=engine.case.integrity_cost.get):
+            preview = engine.what_if(source)
+            if preview is None or not len(preview[0]):
+                continue
+            odds, after = preview
+            value = float(odds @ after.max(axis=1))
+            if value > best_value + 1e-9:
+                best, best_value = source, value
+        return best
+
+@dataclass
+class InformationGain(Strategy):
+    """advisor.py's pick: expected entropy reduction net of integrity cost."""
+
+    def next_source(self, engine, rng):
+        best = _advisor(engine).best(engine)
+        return best.source if best else None
+
+@dataclass
+class RandomSource(Strategy):
+    """A uniformly random source each round (the baseline)."""
+
+    def next_source(self, engine, rng):
+        return rng.choice(_sources(engine))
+
+_ADVISORS: Dict[int, object] = {}
+
+def _advisor(engine: GameEngine):
+    case = engine.case
+    if id(case) not in _ADVISORS:
+        from advisor import Advisor
+
+        _ADVISORS[id(case)] = Advisor(engine.pools, integrity_cost=case.integrity_cost)
+    return _ADVISORS[id(case)]
+
+STRATEGIES: Dict[str, Strategy] = {s.name: s for s in (
+    FixedSource("cctv_until_80"),
+    FixedSource("cctv_until_60", accuse_threshold=LOW_CONFIDENCE_THRESHOLD),
+    GreedyMaxLikelihood("greedy_max_likelihood"),
+    SourcesFirst("interrogate_first"),
+    InformationGain("information_gain"),
+    RandomSource("random"),
+)}
+
+# ------------------------------------- batches ----------------------------------------
+@dataclass
+class Tally:
+    """Mergeable per-strategy totals."""
+    games: int = 0
+    final: float = 0.0
+    final_sq: float = 0.0
+    correct: int = 0
+    rounds: int = 0
+    integrity: int = 0
+    achievements: np.ndarray = field(default_factory=lambda: np.zeros(len(ACHIEVEMENTS), dtype=np.int64))
+
+    def add(self, other: "Tally"):
+        self.games += other.games
+        self.final += other.final
+        self.final_sq += other.final_sq
+        self.correct += other.correct
+        self.rounds += other.rounds
+        self.integrity += other.integrity
+        self.achievements += other.achievements
+
+    def row(self, name: str) -> dict:
+        n = max(1, self.games)
+        mean = self.final / n
+        var = max(0.0, self.final_sq / n - mean * mean) * n / max(1, n - 1)
+        acc = self.correct / n
+        return {
+            "strategy": name,
+            "games": self.games,
+            "final": mean,
+            "final_ci95": Z95 * math.sqrt(var / n),
+            "accuracy": acc,
+            "accuracy_ci95": Z95 * math.sqrt(acc * (1 - acc) / n),
+            "rounds": self.rounds / n,
+            "integrity": self.integrity / n,
+            **{f"{a.lower().replace(' ', '_')}_rate": float(k) / n for a, k in zip(ACHIEVEMENTS, self.achievements)},
+        }
+
+_CASE: Optional[Case] = None
+
+def build_case(case_path: Optional[str] = None, integrity_cost: Optional[Dict[str, int]] = None,
+               escape_risk_per_round: Optional[int] = None) -> Case:
+    if case_path:
+        from cases import load_case
+
+        case = load_case(case_path)
+    else:
+        case = DEFAULT_CASE
+    changes = {}
+    if integrity_cost:
+        changes["integrity_cost"] = {**case.integrity_cost, **integrity_cost}
+    if escape_risk_per_round is not None:
+        changes["escape_risk_per_round"] = escape_risk_per_round
+    return case.replace(**changes) if changes else case
+
+def _init_worker(case_args: tuple):
+    global _CASE
+    _CASE = build_case(*case_args)
+
+def play_batch(strategy: str, games: int, seed: int, case: Optional[Case] = None) -> Tally:
+    """`games` games of one strategy from a batch-private RNG."""
+    case = case or _CASE or DEFAULT_CASE
+    bot = STRATEGIES[strategy]
+    rng = random.Random(seed)
+    tally = Tally()
+    for _ in range(games):
+        engine = GameEngine(rng=rng, case=case)
+        bot.play(engine, rng)
+        g = engine.state
+        final = g.scores["final"]
+        tally.games += 1
+        tally.final += final
+        tally.final_sq += final * final
+        tally.correct += g.accused == g.guilty
+        tally.rounds += g.round
+        tally.integrity += g.integrity
+        for i in range(len(ACHIEVEMENTS)):
+            tally.achievements[i] += g.achievement_flags >> i & 1
+    return tally
+
+def _task(args) -> Tuple[str, Tally]:
+    strategy, games, seed = args
+    return strategy, play_batch(strategy, games, seed)
+
+def leaderboard(tallies: Dict[str, Tally]) -> List[dict]:
+    """Rows sorted by mean final score, best first."""
+    return sorted((t.row(name) for name, t in tallies.items()), key=lambda r: r["final"], reverse=True)
+
+def run_tournament(strategies: Sequence[str], games: int, seed: int = 0, workers: Optional[int] = None,
+                   batch: int = DEFAULT_BATCH, case_path: Optional[str] = None,
+                   integrity_cost: Optional[Dict[str, int]] = None,
+                   escape_risk_per_round: Optional[int] = None) -> Iterator[List[dict]]:
+    """Play `games` games per strategy and yield the leaderboard after every finished batch."""
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"unknown strategies {sorted(unknown)}; expected some of {sorted(STRATEGIES)}")
+    # Seeds depend only on (seed, strategy, batch), so a strategy scores the same in any line-up.
+    # Batches are interleaved across strategies so early leaderboards already cover them all.
+    n_batches = math.ceil(games / batch)
+    seeds = {s: np.random.SeedSequence([seed, zlib.crc32(s.encode())]).generate_state(n_batches, np.uint64)
+             for s in strategies}
+    tasks = [(s, min(batch, games - b * batch), int(seeds[s][b])) for b in range(n_batches) for s in strategies]
+    tallies = {s: Tally() for s in strategies}
+    case_args = (case_path, integrity_cost, escape_risk_per_round)
+    if workers == 1:
+        _init_worker(case_args)
+        for task in tasks:
+            name, tally = _task(task)
+            tallies[name].add(tally)
+            yield leaderboard(tallies)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(case_args,)) as pool:
+        for done in as_completed([pool.submit(_task, t) for t in tasks]):
+            name, tally = done.result()
+            tallies[name].add(tally)
+            yield leaderboard(tallies)
+
+def format_leaderboard(rows: List[dict]) -> str:
+    lines = [f"{'strategy':<24}{'games':>9}{'final':>16}{'accuracy':>16}{'rounds':>8}{'integrity':>10}"]
+    for r in rows:
+        lines.append(f"{r['strategy']:<24}{r['games']:>9,}{r['final']:>9.2f} ± {r['final_ci95']:<4.2f}"
+                     f"{100 * r['accuracy']:>8.1f}% ± {100 * r['accuracy_ci95']:<4.1f}"
+                     f"{r['rounds']:>8.2f}{r['integrity']:>10.1f}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Play scripted detective strategies against each other.")
+    parser.add_argument("--strategies", default="all", help=f"comma-separated, from: {', '.join(STRATEGIES)}")
+    parser.add_argument("--games", type=int, default=20000, help="games per strategy")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--case", help="case file (JSON, see cases.py)")
+    parser.add_argument("--integrity-cost", action="append", default=[], metavar="SOURCE=N",
+                        help="override a source's integrity cost (repeatable)")
+    parser.add_argument("--escape-risk", type=int, help="escape risk added per round")
+    parser.add_argument("--every", type=float, default=2.0, help="seconds between live leaderboards")
+    parser.add_argument("--json", help="write the final leaderboard here")
+    args = parser.parse_args()
+
+    names = list(STRATEGIES) if args.strategies == "all" else args.strategies.split(",")
+    costs = {k: int(v) for k, v in (kv.split("=") for kv in args.integrity_cost)}
+    t0 = last = time.perf_counter()
+    rows = []
+    for rows in run_tournament(names, args.games, args.seed, args.workers, args.batch, args.case,
+                               costs, args.escape_risk):
+        now = time.perf_counter()
+        if now - last >= args.every:
+            done = sum(r["games"] for r in rows)
+            print(f"--- {done:,}/{args.games * len(names):,} games, {now - t0:.1f}s\n{format_leaderboard(rows)}\n")
+            last = now
+    dt = time.perf_counter() - t0
+    total = sum(r["games"] for r in rows)
+    print(f"=== {total:,} games in {dt:.1f}s ({total / dt:,.0f} games/s on {args.workers or os.cpu_count()} workers)")
+    print(format_leaderboard(rows))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)